@@ -0,0 +1,222 @@
+"""
+A local stand-in for the Gemini file and batch endpoints, for exercising batch mode
+end to end without an API key or network access.
+
+Usage (from the repository root):
+    python -m benchmarks.gemini_batch_stub                 # self-test against the real client
+    python -m benchmarks.gemini_batch_stub --serve 8765    # then GEMINI_BASE_URL=http://127.0.0.1:8765
+
+Uploaded JSONL requests are answered with placeholder content shaped by each
+request's responseJsonSchema; batches report PENDING for `--polls` status checks
+before they succeed.
+"""
+import os
+import json
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import count
+from urllib.parse import urlparse
+
+
+def placeholder_for_schema(schema: dict, definitions: dict | None = None):
+    """The smallest value matching a JSON schema: one-item arrays, 'stub' strings, zeros."""
+    definitions = definitions if definitions is not None else schema.get('$defs', {})
+    if '$ref' in schema:
+        return placeholder_for_schema(definitions[schema['$ref'].split('/')[-1]], definitions)
+    kind = schema.get('type')
+    if kind == 'object' or 'properties' in schema:
+        return {name: placeholder_for_schema(prop, definitions)
+                for name, prop in schema.get('properties', {}).items()}
+    if kind == 'array':
+        return [placeholder_for_schema(schema.get('items', {}), definitions)]
+    if kind in ('integer', 'number'):
+        return 1
+    if kind == 'boolean':
+        return True
+    return "stub"
+
+
+def default_responder(key: str, request: dict) -> str:
+    generation_config = request.get('generationConfig', {})
+    if 'responseJsonSchema' in generation_config:
+        return json.dumps(placeholder_for_schema(generation_config['responseJsonSchema']))
+    return f"Stub response for {key}."
+
+
+class StubBatchServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, port: int = 0, responder=default_responder, polls_before_done: int = 1):
+        super().__init__(('127.0.0.1', port), _Handler)
+        self.responder = responder
+        self.polls_before_done = polls_before_done
+        self.files = {}       # file id -> bytes
+        self.uploads = {}     # upload session id -> bytearray
+        self.batches = {}     # batch id -> dict
+        self._ids = count(1)
+        self.lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def next_id(self, prefix: str) -> str:
+        with self.lock:
+            return f"{prefix}{next(self._ids)}"
+
+    def answer(self, input_bytes: bytes) -> bytes:
+        lines = []
+        for line in input_bytes.decode('utf-8').splitlines():
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            try:
+                text = self.responder(entry['key'], entry['request'])
+            except Exception as e:
+                lines.append({'key': entry['key'], 'error': {'code': 500, 'message': str(e)}})
+                continue
+            prompt_chars = sum(len(part.get('text', '')) for content in entry['request']['contents']
+                               for part in content.get('parts', []))
+            lines.append({'key': entry['key'], 'response': {
+                'candidates': [{'content': {'role': 'model', 'parts': [{'text': text}]},
+                                'finishReason': 'STOP'}],
+                'usageMetadata': {'promptTokenCount': prompt_chars // 4,
+                                  'candidatesTokenCount': len(text) // 4},
+            }})
+        return "\n".join(json.dumps(line) for line in lines).encode('utf-8') + b"\n"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: StubBatchServer
+
+    def log_message(self, *args):
+        pass
+
+    def _body(self) -> bytes:
+        return self.rfile.read(int(self.headers.get('Content-Length') or 0))
+
+    def _reply(self, status: int = 200, payload=None, headers=None, raw: bytes | None = None):
+        body = raw if raw is not None else json.dumps(payload or {}).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/octet-stream' if raw is not None else 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _batch_payload(self, batch_id: str) -> dict:
+        batch = self.server.batches[batch_id]
+        metadata = {'displayName': batch['display_name'], 'model': batch['model'], 'state': batch['state']}
+        if batch['state'] == 'BATCH_STATE_SUCCEEDED':
+            metadata['output'] = {'responsesFile': f"files/{batch['output_file']}"}
+        return {'name': f"batches/{batch_id}", 'metadata': metadata}
+
+    def do_POST(self):
+        path = urlparse(self.path).path
+        body = self._body()
+        if path.endswith('/upload/v1beta/files'):
+            session = self.server.next_id('upload-')
+            self.server.uploads[session] = bytearray()
+            return self._reply(headers={'X-Goog-Upload-URL': f"{self.server.url}/upload-sessions/{session}"})
+        if path.startswith('/upload-sessions/'):
+            session = path.rsplit('/', 1)[-1]
+            self.server.uploads[session] += body
+            if 'finalize' not in self.headers.get('X-Goog-Upload-Command', ''):
+                return self._reply(headers={'X-Goog-Upload-Status': 'active'})
+            file_id = self.server.next_id('input-')
+            self.server.files[file_id] = bytes(self.server.uploads.pop(session))
+            return self._reply(payload={'file': {
+                'name': f"files/{file_id}", 'mimeType': 'jsonl', 'state': 'ACTIVE',
+                'sizeBytes': str(len(self.server.files[file_id]))}},
+                headers={'X-Goog-Upload-Status': 'final'})
+        if path.endswith(':batchGenerateContent'):
+            batch = json.loads(body)['batch']
+            input_id = batch['inputConfig']['fileName'].split('/', 1)[-1]
+            batch_id = self.server.next_id('batch-')
+            output_id = f"{batch_id}-output"
+            self.server.files[output_id] = self.server.answer(self.server.files[input_id])
+            self.server.batches[batch_id] = {
+                'display_name': batch.get('displayName', batch_id),
+                'model': path.split('/')[-1].split(':')[0], 'state': 'BATCH_STATE_PENDING',
+                'polls_left': self.server.polls_before_done, 'output_file': output_id}
+            return self._reply(payload=self._batch_payload(batch_id))
+        if path.endswith(':cancel'):
+            batch_id = path.split('/')[-1].split(':')[0]
+            self.server.batches[batch_id]['state'] = 'BATCH_STATE_CANCELLED'
+            return self._reply()
+        self._reply(404, {'error': {'code': 404, 'message': f"Unknown path {path}"}})
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if '/batches/' in path:
+            batch_id = path.split('/')[-1]
+            batch = self.server.batches.get(batch_id)
+            if batch is None:
+                return self._reply(404, {'error': {'code': 404, 'message': 'No such batch'}})
+            if batch['state'] == 'BATCH_STATE_PENDING':
+                if batch['polls_left'] <= 0:
+                    batch['state'] = 'BATCH_STATE_SUCCEEDED'
+                batch['polls_left'] -= 1
+            return self._reply(payload=self._batch_payload(batch_id))
+        if path.endswith(':download'):
+            file_id = path.split('/')[-1].split(':')[0]
+            if file_id in self.server.files:
+                return self._reply(raw=self.server.files[file_id])
+        self._reply(404, {'error': {'code': 404, 'message': f"Unknown path {path}"}})
+
+
+def self_test(polls: int):
+    """Runs ranking and tailoring through batch mode against the stub, with one failing request."""
+    # The stub accepts any key; the client just refuses to start without one.
+    os.environ.setdefault('GEMINI_API_KEY', 'stub-key')
+    from models.gemini_output_models import RankingResponse, ResumeContentResponse
+    from modules import gemini_client
+
+    def responder(key, request):
+        if key == 'job-3':
+            raise ValueError("simulated per-request failure")
+        return default_responder(key, request)
+
+    server = StubBatchServer(responder=responder, polls_before_done=polls)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    original_client, original_poll = gemini_client.client, gemini_client.GEMINI_BATCH_POLL_SECONDS
+    gemini_client.client = gemini_client.create_client(server.url)
+    gemini_client.GEMINI_BATCH_POLL_SECONDS = 0.05
+    try:
+        ranking_text = gemini_client._call_gemini(
+            "Rank these jobs.", response_schema=RankingResponse, stage='ranking', batch=True)
+        RankingResponse.model_validate_json(ranking_text)
+        jobs = [{'id': f"job-{index}", 'title': f"Engineer {index}", 'company': 'Acme',
+                 'description': 'Build things.'} for index in range(1, 5)]
+        contents = gemini_client.generate_resume_contents("\\documentclass{article}", jobs)
+        for content in contents.values():
+            ResumeContentResponse.model_validate(content)
+    finally:
+        gemini_client.client, gemini_client.GEMINI_BATCH_POLL_SECONDS = original_client, original_poll
+        server.shutdown()
+
+    assert sorted(contents) == ['job-1', 'job-2', 'job-4'], sorted(contents)
+    print(f"\n✅ Batch mode round trip OK: ranking parsed, {len(contents)} of {len(jobs)} "
+          f"tailoring payloads mapped back to their jobs (job-3 failed on purpose).")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--serve', type=int, metavar='PORT', help="Serve the stub until interrupted.")
+    parser.add_argument('--polls', type=int, default=1, help="Status checks a batch stays pending for.")
+    args = parser.parse_args()
+    if args.serve is None:
+        self_test(args.polls)
+        return
+    server = StubBatchServer(args.serve, polls_before_done=args.polls)
+    print(f"Stub Gemini batch server on {server.url} (set GEMINI_BASE_URL to use it).")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
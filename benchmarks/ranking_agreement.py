@@ -0,0 +1,143 @@
+"""
+Compares the local cross-encoder ranking with Gemini's on a real similarity shortlist.
+
+Usage (from the repository root, after a run in the "gemini" ranking mode with
+INCREMENTAL_RANKING = False):
+    python -m benchmarks.ranking_agreement
+    python -m benchmarks.ranking_agreement --call-gemini     # time fresh Gemini calls too
+
+The shortlist and Gemini's ranking are read from the run manifest; Gemini's latency
+comes from the run report unless --call-gemini measures it (and the hybrid mode) live.
+A checkpointed ranking is only used when it was a fresh, full Gemini ranking: an
+incremental one mixes carried-forward scores, and the other modes rank locally.
+"""
+import os
+import json
+import time
+import argparse
+from itertools import combinations
+
+from config import (
+    RUN_MANIFEST_PATH, RUN_REPORT_JSON_PATH, PARSED_RESUME_PATH, GEMINI_TOP_N, RERANK_GEMINI_POOL
+)
+
+
+def kendall_tau(order_a, order_b) -> float:
+    """Kendall rank correlation of two orderings, over the items they share."""
+    in_b = set(order_b)
+    shared = [item for item in order_a if item in in_b]
+    if len(shared) < 2:
+        return 0.0
+    position_b = {item: index for index, item in enumerate(order_b)}
+    concordant = discordant = 0
+    for first, second in combinations(shared, 2):
+        # `shared` follows order_a, so the pair is concordant when order_b agrees.
+        if position_b[first] < position_b[second]:
+            concordant += 1
+        else:
+            discordant += 1
+    return (concordant - discordant) / (concordant + discordant)
+
+
+def top_k_overlap(order_a, order_b, k: int) -> float:
+    if k <= 0:
+        return 0.0
+    return len(set(order_a[:k]) & set(order_b[:k])) / k
+
+
+def _load_json(path: str):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _gemini_seconds_from_report(report_path: str):
+    """Mean duration of the ranking Gemini calls recorded in the last run report."""
+    if not os.path.exists(report_path):
+        return None
+    for entry in _load_json(report_path).get('spans', []):
+        if entry['name'] == 'gemini_call' and entry['labels'].get('stage') == 'ranking' and entry['count']:
+            return entry['total_seconds'] / entry['count']
+    return None
+
+
+def _timed(fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--manifest', default=RUN_MANIFEST_PATH)
+    parser.add_argument('--report', default=RUN_REPORT_JSON_PATH)
+    parser.add_argument('--parsed-resume', default=PARSED_RESUME_PATH)
+    parser.add_argument('--candidate', help="Candidate name when the run served several candidates.")
+    parser.add_argument('--call-gemini', action='store_true',
+                        help="Time fresh Gemini rankings of the full shortlist and of the hybrid pool.")
+    parser.add_argument('--output', help="Optional path for the JSON results.")
+    args = parser.parse_args()
+
+    from modules.gemini_client import get_job_rankings
+    from modules.nlp_processor import get_cross_encoder, rerank_jobs
+
+    from modules.checkpoint import RunManifest
+
+    prefix = f"{args.candidate}/" if args.candidate else ""
+    manifest = RunManifest.read(args.manifest) if os.path.exists(args.manifest) else None
+    jobs = manifest.stage_output(f"{prefix}similarity_top_n") if manifest else None
+    if not jobs:
+        raise SystemExit(f"No similarity shortlist found in '{args.manifest}'. Run the assistant first.")
+    resume_summary = _load_json(args.parsed_resume)['parsed_text']
+
+    get_cross_encoder()
+    reranked, local_seconds = _timed(rerank_jobs, jobs, resume_summary)
+    local_order = [str(job['id']) for job, _ in reranked]
+
+    gemini_seconds = hybrid_seconds = None
+    if args.call_gemini:
+        gemini_rankings, gemini_seconds = _timed(get_job_rankings, jobs, resume_summary)
+        pool = [job for job, _ in reranked[:RERANK_GEMINI_POOL]]
+        _, hybrid_gemini_seconds = _timed(get_job_rankings, pool, resume_summary)
+        hybrid_seconds = local_seconds + hybrid_gemini_seconds
+    else:
+        meta = manifest.stage_meta(f"{prefix}rankings")
+        if meta.get('ranking_mode') != 'gemini' or meta.get('incremental_ranking') is not False:
+            raise SystemExit(
+                "The checkpointed ranking is not a fresh Gemini ranking of the whole shortlist "
+                f"(mode: {meta.get('ranking_mode', 'unknown')}, incremental: {meta.get('incremental_ranking', 'unknown')}). "
+                "Rerun with RANKING_MODE = \"gemini\" and INCREMENTAL_RANKING = False, or pass --call-gemini.")
+        gemini_rankings = manifest.stage_output(f"{prefix}rankings")
+        gemini_seconds = _gemini_seconds_from_report(args.report)
+    if not gemini_rankings or not gemini_rankings.get('ranked_jobs'):
+        raise SystemExit("No Gemini ranking available. Run in 'gemini' mode first or pass --call-gemini.")
+
+    gemini_order = [str(entry['id']) for entry in sorted(
+        gemini_rankings['ranked_jobs'], key=lambda entry: entry['rank'])]
+    gemini_top = gemini_order[:GEMINI_TOP_N]
+    results = {
+        'jobs': len(jobs),
+        'kendall_tau': round(kendall_tau(gemini_order, local_order), 4),
+        f'top_{GEMINI_TOP_N}_overlap': round(top_k_overlap(gemini_order, local_order, GEMINI_TOP_N), 4),
+        # Share of Gemini's picks that hybrid mode would still show Gemini
+        'hybrid_pool_recall': round(
+            len(set(gemini_top) & set(local_order[:RERANK_GEMINI_POOL])) / len(gemini_top), 4)
+        if gemini_top else None,
+        'local_seconds': round(local_seconds, 3),
+        'gemini_seconds': round(gemini_seconds, 3) if gemini_seconds else None,
+        'hybrid_seconds': round(hybrid_seconds, 3) if hybrid_seconds else None,
+    }
+    if gemini_seconds:
+        results['local_seconds_saved'] = round(gemini_seconds - local_seconds, 3)
+    if gemini_seconds and hybrid_seconds:
+        results['hybrid_seconds_saved'] = round(gemini_seconds - hybrid_seconds, 3)
+
+    print("\n--- Ranking agreement: cross-encoder vs Gemini ---")
+    for key, value in results.items():
+        print(f"   {key:<24} {value}")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
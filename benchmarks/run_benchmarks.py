@@ -0,0 +1,235 @@
+"""
+Offline benchmarks for the local pipeline stages on synthetic job corpora.
+
+Usage (from the repository root):
+    python -m benchmarks.run_benchmarks --sizes 1000 10000
+    python -m benchmarks.run_benchmarks --sizes 100000 --stages experience_filter tracker
+    python -m benchmarks.run_benchmarks --update-baseline
+"""
+import os
+import io
+import sys
+import json
+import time
+import argparse
+import tempfile
+import tracemalloc
+from contextlib import contextmanager, redirect_stdout
+from datetime import datetime
+
+# Never reach out to the network: the embedding model must already be cached.
+os.environ.setdefault('HF_HUB_OFFLINE', '1')
+os.environ.setdefault('TRANSFORMERS_OFFLINE', '1')
+
+from benchmarks.synthetic_jobs import generate_jobs
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE_PATH = os.path.join(BENCHMARK_DIR, "baseline.json")
+DEFAULT_SIZES = [1000, 10000]
+REGRESSION_THRESHOLD = 0.20
+SAMPLE_PROFILE = "Python backend engineer with machine learning, NLP and AWS experience."
+
+
+def _measure(fn, jobs, repeat=1):
+    """
+    Returns (best seconds, peak MiB) for `fn` with stdout silenced. Timing runs are
+    kept separate from the tracemalloc run because tracing slows allocation down.
+    An untimed warm-up run first pays for module imports and model loading.
+    """
+    from modules import descriptions
+    with redirect_stdout(io.StringIO()):
+        fn([dict(job) for job in jobs])
+    best = None
+    for _ in range(repeat):
+        job_copies = [dict(job) for job in jobs]
+        descriptions.clear_cache()
+        started = time.perf_counter()
+        with redirect_stdout(io.StringIO()):
+            fn(job_copies)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+
+    job_copies = [dict(job) for job in jobs]
+    descriptions.clear_cache()
+    tracemalloc.start()
+    with redirect_stdout(io.StringIO()):
+        fn(job_copies)
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak_bytes / (1024 * 1024)
+
+
+def bench_apply_filters(jobs):
+    from main import apply_filters
+    return apply_filters(jobs)
+
+
+def bench_experience_filter(jobs):
+    from keyword_filter import filter_jobs_by_experience
+    from config import MAX_EXPERIENCE_YEARS
+    return filter_jobs_by_experience(jobs, MAX_EXPERIENCE_YEARS)
+
+
+@contextmanager
+def _temporary_tracker():
+    """Points the tracker (and the lexical index stored in it) at a throwaway database."""
+    from modules import tracker, nlp_processor
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tracker.close()
+        original_paths = tracker.TRACKER_DB_PATH, tracker._DEFAULT_DB_PATH
+        tracker.TRACKER_DB_PATH = tracker._DEFAULT_DB_PATH = os.path.join(tmp_dir, "processed_jobs.db")
+        nlp_processor._lexical_index = None
+        try:
+            yield tracker
+        finally:
+            tracker.close()
+            tracker.TRACKER_DB_PATH, tracker._DEFAULT_DB_PATH = original_paths
+            nlp_processor._lexical_index = None
+
+
+def bench_similarity(jobs):
+    from modules.nlp_processor import filter_jobs_by_similarity
+    with _temporary_tracker():
+        return filter_jobs_by_similarity(jobs, SAMPLE_PROFILE)
+
+
+def bench_lexical_index(jobs):
+    from modules.bm25 import BM25Index
+    index = BM25Index()
+    for position, job in enumerate(jobs):
+        index.add(str(position), f"{job.get('title') or ''}\n{job.get('description') or ''}")
+    scores = index.score(SAMPLE_PROFILE, (str(position) for position in range(len(jobs))))
+    return sorted(scores, key=scores.get, reverse=True)[:150]
+
+
+def bench_job_table(jobs):
+    # apply_filters over JobViews, including building the table the scraper would return
+    from main import apply_filters
+    from modules.job_table import JobTable
+    return apply_filters(JobTable.from_records(jobs).views())
+
+
+def bench_descriptions(jobs):
+    from modules import descriptions
+    return [descriptions.description_of(job) for job in jobs]
+
+
+def bench_ranking_prompt(jobs):
+    from modules.gemini_client import build_ranking_prompt
+    return build_ranking_prompt(jobs, SAMPLE_PROFILE)
+
+
+def bench_tracker(jobs):
+    with _temporary_tracker() as tracker:
+        # Half of the corpus is already known; then a run's worth of jobs is recorded.
+        tracker.record_processed_jobs(jobs[::2])
+        new_jobs = tracker.filter_unprocessed_jobs(jobs)
+        tracker.record_processed_jobs(new_jobs[:50])
+        return new_jobs
+
+
+STAGES = {
+    'apply_filters': bench_apply_filters,
+    'experience_filter': bench_experience_filter,
+    'similarity': bench_similarity,
+    'lexical_index': bench_lexical_index,
+    'job_table': bench_job_table,
+    'descriptions': bench_descriptions,
+    'ranking_prompt': bench_ranking_prompt,
+    'tracker': bench_tracker,
+}
+
+
+def _load_baseline():
+    if not os.path.exists(BASELINE_PATH):
+        return {}
+    with open(BASELINE_PATH, 'r', encoding='utf-8') as f:
+        return json.load(f).get('results', {})
+
+
+def run(sizes, stages, repeat):
+    results = {}
+    for size in sizes:
+        print(f"\n--- Generating {size:,} synthetic jobs ---")
+        jobs = generate_jobs(size)
+        for stage in stages:
+            try:
+                seconds, peak_mib = _measure(STAGES[stage], jobs, repeat=repeat)
+            except Exception as e:
+                print(f"⚠️ Skipping '{stage}' at {size:,} jobs: {e}")
+                continue
+            key = f"{stage}@{size}"
+            results[key] = {
+                'seconds': round(seconds, 4),
+                'jobs_per_second': round(size / seconds, 1) if seconds else None,
+                'peak_memory_mib': round(peak_mib, 2),
+            }
+            print(
+                f"   ⏱️ {stage:<18} {seconds:>9.3f}s  {results[key]['jobs_per_second'] or 0:>12,.0f} jobs/s  {peak_mib:>8.1f} MiB peak")
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Prints a comparison against the baseline and returns the list of regressions."""
+    regressions = []
+    if not baseline:
+        print("\nℹ️ No baseline found. Run with --update-baseline to store one.")
+        return regressions
+
+    print("\n--- Comparison against baseline ---")
+    for key, current in results.items():
+        previous = baseline.get(key)
+        if not previous or not previous.get('seconds'):
+            print(f"   {key:<28} (no baseline)")
+            continue
+        time_ratio = current['seconds'] / previous['seconds']
+        memory_ratio = current['peak_memory_mib'] / \
+            previous['peak_memory_mib'] if previous.get('peak_memory_mib') else 1.0
+        flag = ""
+        if time_ratio > 1 + threshold or memory_ratio > 1 + threshold:
+            flag = "  ❌ REGRESSION"
+            regressions.append(key)
+        elif time_ratio < 1 - threshold:
+            flag = "  ✅ faster"
+        print(
+            f"   {key:<28} time x{time_ratio:.2f}  memory x{memory_ratio:.2f}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--stages', nargs='+', choices=sorted(STAGES), default=sorted(STAGES))
+    parser.add_argument('--repeat', type=int, default=1,
+                        help="Runs per stage; the fastest run is reported.")
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD,
+                        help="Relative slowdown that counts as a regression.")
+    parser.add_argument('--output', help="Optional path for the JSON results.")
+    parser.add_argument('--update-baseline', action='store_true',
+                        help="Store these results as the new baseline.")
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.stages, args.repeat)
+    regressions = compare(results, _load_baseline(), args.threshold)
+
+    payload = {
+        'generated_at': datetime.now().isoformat(),
+        'python': sys.version.split()[0],
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, indent=2)
+    if args.update_baseline:
+        baseline = {'generated_at': payload['generated_at'], 'python': payload['python'],
+                    'results': {**_load_baseline(), **results}}
+        with open(BASELINE_PATH, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, indent=2)
+        print(f"\n✅ Baseline updated at '{BASELINE_PATH}'.")
+
+    if regressions and not args.update_baseline:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
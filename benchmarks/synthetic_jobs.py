@@ -0,0 +1,141 @@
+"""Generates realistic synthetic job records that mirror JobSpy's output columns."""
+import random
+from datetime import datetime, timedelta
+
+SITES = ["linkedin", "indeed", "google", "naukri"]
+ROLES = [
+    "Software Development Engineer", "Backend Engineer", "AI ML Engineer", "Data Scientist",
+    "Machine Learning Engineer", "Full Stack Developer", "Python Developer", "Data Engineer",
+    "Android Developer", "DevOps Engineer", "Frontend Engineer", "NLP Engineer",
+]
+SENIORITY = ["", "", "", "Junior ", "Associate ", "Senior ", "Lead ", "Staff ", "Principal ",
+             "Sr. ", "Graduate ", "Intern - "]
+SUFFIXES = ["", "", "", " I", " II", " III", " - Remote", " (Contract)"]
+COMPANIES = [
+    "Acme Analytics", "Zeta Systems", "Nimbus Cloud", "Quanta Labs", "Helix Health",
+    "Orbit Fintech", "Vertex AI", "Kite Commerce", "Lumen Data", "Pioneer Robotics",
+    "Sapphire Software", "Cobalt Security", "Delta Logistics", "Aurora Media", "Nova Bank",
+]
+LOCATIONS = [
+    "Mumbai, Maharashtra, India", "Bangalore, Karnataka, India", "Bengaluru, Karnataka, India",
+    "Pune, Maharashtra, India", "Hyderabad, Telangana, India", "New Delhi, Delhi, India",
+    "Chennai, Tamil Nadu, India", "Remote", "Gurugram, Haryana, India", "IN", None,
+]
+JOB_TYPES = ["fulltime", "fulltime", "fulltime", "contract", "internship", "parttime", None]
+JOB_LEVELS = ["entry level", "associate", "mid-senior level", "senior", "director", "", None]
+SKILLS = [
+    "Python", "Java", "Go", "Kotlin", "TypeScript", "React", "FastAPI", "Django", "Spring Boot",
+    "AWS", "GCP", "Azure", "Docker", "Kubernetes", "PostgreSQL", "MongoDB", "Redis", "Kafka",
+    "PyTorch", "TensorFlow", "scikit-learn", "LangChain", "LLMs", "NLP", "Computer Vision",
+    "Airflow", "Spark", "CI/CD", "microservices", "REST APIs", "GraphQL",
+]
+INTRO_SENTENCES = [
+    "We are looking for a motivated engineer to join our growing platform team.",
+    "Join a fast-paced team building products used by millions of customers.",
+    "Our mission is to make data accessible and useful for every business.",
+    "You will work closely with product managers, designers and data scientists.",
+    "This role sits within our core infrastructure group.",
+]
+RESPONSIBILITY_SENTENCES = [
+    "Design, build and maintain scalable services using {skill} and {skill2}.",
+    "Own features end to end, from design documents to production monitoring.",
+    "Build data pipelines and model-serving infrastructure on {skill}.",
+    "Collaborate on code reviews and contribute to engineering best practices.",
+    "Train, evaluate and deploy machine learning models with {skill}.",
+    "Improve reliability, latency and cost of our {skill} workloads.",
+]
+REQUIREMENT_SENTENCES = [
+    "{years}+ years of experience in software development.",
+    "{low}-{high} years of experience with {skill}.",
+    "Minimum {years} years of professional experience.",
+    "At least {years} years working with {skill} in production.",
+    "Strong fundamentals in data structures and algorithms.",
+    "Freshers and recent graduates are encouraged to apply.",
+    "Hands-on experience with {skill}, {skill2} and cloud platforms.",
+]
+BOILERPLATE_SENTENCES = [
+    "We are an equal opportunity employer and value diversity at our company.",
+    "**Benefits:** health insurance, flexible working hours and a learning budget.",
+    "<p>Apply now to be part of an exciting journey!</p>",
+    "Competitive compensation and employee stock options.",
+]
+
+
+def _sentence(rng: random.Random, template: str) -> str:
+    low = rng.choice([0, 0, 1, 2, 3, 5])
+    return template.format(
+        skill=rng.choice(SKILLS), skill2=rng.choice(SKILLS),
+        years=rng.choice([0, 1, 2, 3, 4, 5, 7, 10]), low=low, high=low + rng.choice([1, 2, 3]))
+
+
+def _description(rng: random.Random) -> str:
+    parts = ["## About the role"]
+    parts += [rng.choice(INTRO_SENTENCES) for _ in range(rng.randint(2, 4))]
+    parts.append("## Responsibilities")
+    parts += [f"* {_sentence(rng, rng.choice(RESPONSIBILITY_SENTENCES))}"
+              for _ in range(rng.randint(4, 9))]
+    parts.append("## Requirements")
+    parts += [f"* {_sentence(rng, rng.choice(REQUIREMENT_SENTENCES))}"
+              for _ in range(rng.randint(3, 8))]
+    parts += [rng.choice(BOILERPLATE_SENTENCES) for _ in range(rng.randint(1, 3))]
+    return "\n".join(parts)
+
+
+def _salary(rng: random.Random):
+    roll = rng.random()
+    if roll < 0.55:
+        return None, None, None, None
+    if roll < 0.85:
+        low = rng.randrange(300_000, 3_000_000, 50_000)
+        return 'yearly', float(low), float(low + rng.randrange(0, 1_500_000, 50_000)), 'INR'
+    if roll < 0.95:
+        low = rng.randrange(15, 80)
+        return 'hourly', float(low), float(low + rng.randrange(0, 40)), 'USD'
+    low = rng.randrange(20_000, 200_000, 5_000)
+    return 'monthly', float(low), float(low * 1.2), 'INR'
+
+
+def generate_job(rng: random.Random, index: int, now: datetime) -> dict:
+    site = rng.choice(SITES)
+    company = rng.choice(COMPANIES)
+    title = f"{rng.choice(SENIORITY)}{rng.choice(ROLES)}{rng.choice(SUFFIXES)}"
+    interval, min_amount, max_amount, currency = _salary(rng)
+    location = rng.choice(LOCATIONS)
+    job_url = f"https://www.{site}.com/jobs/view/{100000000 + index}?trk=public_jobs&refId={rng.getrandbits(32):08x}"
+    return {
+        'id': f"{site}-{index}",
+        'site': site,
+        'job_url': job_url,
+        'job_url_direct': f"https://careers.{company.split()[0].lower()}.com/jobs/{index}" if rng.random() < 0.4 else None,
+        'title': title,
+        'company': company,
+        'location': location,
+        'date_posted': now - timedelta(hours=rng.randint(0, 24 * 10)),
+        'job_type': rng.choice(JOB_TYPES),
+        'salary_source': 'direct_data' if interval else None,
+        'interval': interval,
+        'min_amount': min_amount,
+        'max_amount': max_amount,
+        'currency': currency,
+        'is_remote': location == 'Remote',
+        'job_level': rng.choice(JOB_LEVELS),
+        'job_function': rng.choice(["Engineering", "Information Technology", None]),
+        'listing_type': None,
+        'emails': None,
+        'description': _description(rng),
+        'company_industry': rng.choice(["Software Development", "Financial Services", None]),
+        'company_url': f"https://www.linkedin.com/company/{company.replace(' ', '-').lower()}",
+        'company_logo': None,
+        'company_num_employees': rng.choice(["11-50", "201-500", "1001-5000", None]),
+        'skills': ", ".join(rng.sample(SKILLS, 4)) if site == 'naukri' else None,
+        'experience_range': (rng.choice([0, 1, 2, 3, 5]), rng.choice([2, 4, 6, 8])) if site == 'naukri' else None,
+        'company_rating': round(rng.uniform(2.5, 4.8), 1) if site in ('naukri', 'indeed') else None,
+        'vacancy_count': rng.choice([1, 2, 5, None]) if site == 'naukri' else None,
+    }
+
+
+def generate_jobs(count: int, seed: int = 42) -> list[dict]:
+    """Returns `count` deterministic synthetic job records."""
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    return [generate_job(rng, index, now) for index in range(count)]
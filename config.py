@@ -11,22 +11,133 @@ TARGET_LOCATIONS = [loc.lower() for loc in LOCATIONS]
 COUNTRY_INDEED = "India"  # Country for Indeed searches
 # Set to True to enable proxy usage if PROXY_LIST is set in .env
 USE_PROXIES_IN_WORKFLOW = False
+# Two-phase scraping: fetch cheap listings first, drop them on title/location/dedup, then
+# fetch full descriptions only for the survivors. False fetches every description up front.
 USE_ENHANCED_DATA_FETCHING = True
+# Concurrent job page requests when fetching descriptions in the second phase
+DESCRIPTION_FETCH_WORKERS = 4
+# Normalized descriptions (markup stripped, boilerplate split off) kept in memory, by content hash
+DESCRIPTION_CACHE_SIZE = 20000
+# Description languages kept by the filters ('unknown' = too short to tell); None keeps every language
+DESCRIPTION_LANGUAGES = ['en', 'unknown']
 
 RESULTS_WANTED = 30
+# Adaptive scrape budgets: the total results requested per run (None = RESULTS_WANTED for
+# every site/term/location query) are shifted toward queries whose jobs survive filtering,
+# ranking and delivery. Queries seen in fewer than QUERY_STATS_MIN_RUNS runs get RESULTS_WANTED.
+ADAPTIVE_SCRAPE_BUDGET = True
+SCRAPE_BUDGET_TOTAL = None
+SCRAPE_BUDGET_MIN_RESULTS = 10
+SCRAPE_BUDGET_MAX_RESULTS = 100
+# Share of the budget spread evenly over known queries, so a low-yield query can recover
+SCRAPE_BUDGET_EXPLORATION = 0.2
+QUERY_STATS_MIN_RUNS = 2
+# Weight of older runs in the yield statistics (1.0 = never forget)
+QUERY_STATS_DECAY = 0.8
 MAX_JOB_AGE_DAYS = 7
 COSINE_FILTER_TOP_N = 30
+# Jobs BM25-scored or embedded per chunk during similarity filtering. Bounds the scores and job
+# embeddings held at once; the BM25 index and the description cache still grow with the scrape.
+SIMILARITY_CHUNK_SIZE = 1024
+# Hybrid similarity filter: BM25 over job titles and descriptions keeps the best
+# LEXICAL_CANDIDATE_POOL jobs, which the embedding model reranks; the final score mixes in
+# HYBRID_LEXICAL_WEIGHT of the normalized BM25 score. The index is kept for LEXICAL_INDEX_TTL_DAYS.
+HYBRID_RETRIEVAL = True
+LEXICAL_CANDIDATE_POOL = 150
+HYBRID_LEXICAL_WEIGHT = 0.3
+LEXICAL_INDEX_TTL_DAYS = 30
 GEMINI_TOP_N = 20
+# How the similarity shortlist is ranked: "gemini" sends it all to MODEL_NAME, "hybrid" first
+# reranks it with a local cross-encoder and sends only the best RERANK_GEMINI_POOL jobs, and
+# "local" skips Gemini and ranks by the cross-encoder alone
+RANKING_MODE = "gemini"
+CROSS_ENCODER_MODEL_NAME = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+CROSS_ENCODER_BATCH_SIZE = 16
+RERANK_GEMINI_POOL = 25
+# Gemini scores each job 0-100 once per resume and user message; later runs only send the
+# jobs it hasn't scored, calibrated against RANKING_ANCHOR_COUNT previously scored jobs, and
+# rank everything on the stored scores. Jobs outside GEMINI_TOP_N stay in contention.
+INCREMENTAL_RANKING = True
+RANKING_ANCHOR_COUNT = 5
 MODEL_NAME = "gemini-2.5-pro"
 # Will be used to find the required experience level
 CLASSIFICATION_MODEL_NAME = "gemini-2.0-flash"
+# Per-run Gemini budgets (None = unlimited). Once either is reached, lower-ranked jobs are
+# left untailored (and unprocessed, so a later run picks them up) instead of failing the run.
+GEMINI_TOKEN_BUDGET = None
+GEMINI_COST_BUDGET_USD = None
+# USD per million tokens, used for the cost estimates in the run report; adjust to current pricing
+GEMINI_PRICING_USD_PER_MILLION = {
+    "gemini-2.5-pro": {"input": 1.25, "cached": 0.31, "output": 10.00},
+    "gemini-2.0-flash": {"input": 0.10, "cached": 0.025, "output": 0.40},
+}
+# Batch mode for scheduled runs: ranking and tailoring requests are written to a JSONL file,
+# submitted as a Gemini batch job (half price, no per-minute quota) and polled until done.
+# Requests the batch doesn't answer fall back to regular calls. GEMINI_BASE_URL in .env points
+# the client at another endpoint, e.g. the stub server in benchmarks/gemini_batch_stub.py.
+GEMINI_BATCH_MODE = False
+GEMINI_BATCH_POLL_SECONDS = 30
+GEMINI_BATCH_TIMEOUT_SECONDS = 6 * 3600
+GEMINI_BATCH_DIR = "gemini_batches"
+# Output tokens (thinking included) assumed per tailoring request when sizing a batch against
+# the budgets before this run has made any tailoring calls to average over
+GEMINI_BATCH_OUTPUT_TOKENS_ESTIMATE = 4000
 # Delay between Gemini 2.5 Pro API calls to avoid rate limits
 API_CALL_DELAY_SECONDS = 20
+# Tailoring/compilation pipeline: LaTeX workers and the bounded queue size between stages
+PIPELINE_COMPILE_WORKERS = 2
+PIPELINE_QUEUE_SIZE = 2
 
 SOURCE_RESUME_PATH = "source_resume.tex"
 PARSED_RESUME_PATH = "parsed_resume.json"
+# The matching text is extracted from the LaTeX source locally; set to True to have Gemini
+# rewrite it instead (falls back to the local text if the call fails)
+ENRICH_RESUME_WITH_LLM = False
 OUTPUT_DIR = "generated_resumes"
+# Optional JSON list of candidate configs served by one run (see README); per-candidate
+# state lives under CANDIDATES_STATE_DIR/<name>/ unless a candidate sets its own paths
+CANDIDATES_PATH = "candidates.json"
+CANDIDATES_STATE_DIR = "candidates"
+# Legacy JSON tracker, migrated once into the SQLite tracker database
 PROCESSED_JOBS_PATH = "processed_jobs.json"
+TRACKER_DB_PATH = "processed_jobs.db"
+# Rejected jobs are remembered for the scrape window so they aren't re-filtered, re-embedded or re-ranked
+VERDICT_TTL_DAYS = MAX_JOB_AGE_DAYS
+# Bloom filter of processed URLs consulted during scraping (~240 KB at these settings)
+SEEN_FILTER_CAPACITY = 200000
+SEEN_FILTER_ERROR_RATE = 0.01
+# Past compile results used to predict whether the tailored block fits on one page
+LAYOUT_CALIBRATION_PATH = "layout_calibration.json"
+LAYOUT_MAX_OBSERVATIONS = 200
+# Stage checkpoints so an interrupted run resumes instead of starting over
+RUN_MANIFEST_PATH = "run_manifest.json"
+CHECKPOINT_MAX_AGE_HOURS = 24
+# Precompiled resume preambles (pdflatex formats) used to speed up compiles
+LATEX_FORMAT_DIR = ".latex_formats"
+# Daemon mode (`python main.py --daemon`): run every interval +/- jitter, serve /healthz and /metrics
+DAEMON_INTERVAL_MINUTES = 60
+DAEMON_JITTER_SECONDS = 300
+DAEMON_HTTP_HOST = "127.0.0.1"
+DAEMON_HTTP_PORT = 8765
+# /healthz reports failure after this many consecutive failed runs
+DAEMON_MAX_CONSECUTIVE_FAILURES = 3
+
+# Observability: DEBUG shows per-job filter decisions; can be overridden with the LOG_LEVEL env var
+LOG_LEVEL = "INFO"
+RUN_REPORT_JSON_PATH = "run_report.json"
+RUN_REPORT_PROM_PATH = "run_report.prom"
+# Used by `python main.py --profile`
+PROFILE_OUTPUT_DIR = "profiles"
+PROFILE_SAMPLE_INTERVAL_SECONDS = 0.01
 
 DELIVERY_METHOD = "email"
+# Encoded size budget per email; results are split across messages beyond it (Gmail caps at 25 MB)
+EMAIL_MAX_MESSAGE_BYTES = 20 * 1024 * 1024
+EMAIL_RETRY_DELAY_SECONDS = 10
+EMAIL_SMTP_TIMEOUT_SECONDS = 60
+# Rendered emails wait here until delivered; leftovers are retried on the next run
+OUTBOX_DIR = "outbox"
+OUTBOX_MAX_ATTEMPTS = 8
+# How long the run waits for queued emails before exiting and leaving them in the outbox
+DELIVERY_DRAIN_TIMEOUT_SECONDS = 300
 USER_MESSAGE = "Please prioritize SDE and AI ML related roles that suit my skills. Also, if the jobs aren't remote, prefer those in Mumbai."
\ No newline at end of file
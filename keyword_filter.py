@@ -1,76 +1,129 @@
 import re
 import pandas as pd
-from config import HOURS_PER_YEAR, USD_TO_INR_RATE
+from config import HOURS_PER_YEAR, USD_TO_INR_RATE, DESCRIPTION_LANGUAGES
+from modules.telemetry import DEBUG, log, increment
+from modules.descriptions import description_of
 
 
-def filter_jobs_by_experience(jobs_list, max_experience_years=2):
-    print(
-        f"🔍 Filtering jobs for max {max_experience_years} years experience using enhanced logic...")
+SENIOR_TITLE_KEYWORDS = [
+    'senior', 'sr.', 'sr ', 'lead', 'principal', 'staff', 'architect',
+    'manager', 'head of', 'director', 'vp', 'vice president', 'chief',
+    'level 3', 'level 4', 'level 5', 'l3', 'l4', 'l5', 'iii', 'iv', 'v'
+]
+SENIOR_JOB_LEVELS = ['senior', 'lead', 'director', 'manager', 'principal']
+# Jobs without salary data are kept; a missing interval or currency means yearly INR.
+SALARY_COLUMN_DEFAULTS = {'min_amount': None, 'max_amount': None,
+                          'interval': 'yearly', 'currency': 'INR'}
+_SENIOR_TITLE_PATTERN = re.compile(
+    r'\b(?:' + '|'.join(re.escape(keyword) for keyword in SENIOR_TITLE_KEYWORDS) + r')\b')
 
-    senior_keywords = [
-        'senior', 'sr.', 'sr ', 'lead', 'principal', 'staff', 'architect',
-        'manager', 'head of', 'director', 'vp', 'vice president', 'chief',
-        'level 3', 'level 4', 'level 5', 'l3', 'l4', 'l5', 'iii', 'iv', 'v'
-    ]
 
-    def has_senior_keywords(title):
-        title = str(title) if title is not None else ""
-        text_to_check = title.lower()
-        for keyword in senior_keywords:
-            pattern = r'\b' + re.escape(keyword) + r'\b'
-            if re.search(pattern, text_to_check):
-                return True
-        return False
+def has_senior_keywords(title):
+    """Returns True if a job title contains any seniority keyword."""
+    title = str(title) if title is not None else ""
+    return _SENIOR_TITLE_PATTERN.search(title.lower()) is not None
+
+
+def is_entry_level(job):
+    """Returns True for internships and jobs whose structured level is 'entry level'."""
+    job_level = str(job.get('job_level', '')).lower()
+    job_type = str(job.get('job_type', '')).lower()
+    return job_type == 'internship' or job_level == 'entry level'
+
+
+def filter_jobs_by_experience(jobs_list, max_experience_years=2, rejections=None):
+    """
+    Keeps jobs that fit the experience limit. If a `rejections` list is given,
+    a (job, reason) tuple is appended to it for every job that is filtered out.
+    """
+    print(
+        f"🔍 Filtering jobs for max {max_experience_years} years experience using enhanced logic...")
 
     filtered_jobs = []
     skipped_count = 0
+    skip_reasons = {}
+
+    def skip(job, reason):
+        nonlocal skipped_count
+        skipped_count += 1
+        skip_reasons[reason] = skip_reasons.get(reason, 0) + 1
+        if rejections is not None:
+            rejections.append((job, reason))
 
     for job in jobs_list:
         title = job.get('title', '')
-        description = job.get('description', '')
+        # Boilerplate such as "a company with 25 years of experience" would read as a requirement,
+        # so the requirement sections are scanned when the description has any.
+        normalized = description_of(job)
+        description = normalized.requirements or normalized.core
         job_level = str(job.get('job_level', '')).lower()
         experience_range = job.get('experience_range')  # e.g., (0, 2)
-        job_type = str(job.get('job_type', '')).lower()
 
-        if job_type == 'internship' or job_level == 'entry level':
-            print(f"  ✅ Kept (Entry/Intern): '{title}'")
+        if is_entry_level(job):
+            log(DEBUG, "  ✅ Kept (Entry/Intern): '%s'", title)
             filtered_jobs.append(job)
             continue
 
-        if job_level and any(level in job_level for level in ['senior', 'lead', 'director', 'manager', 'principal']):
-            print(
-                f"  ❌ Skipped (Structured): '{title}' - Level is '{job.get('job_level')}'")
-            skipped_count += 1
+        if job_level and any(level in job_level for level in SENIOR_JOB_LEVELS):
+            log(DEBUG, "  ❌ Skipped (Structured): '%s' - Level is '%s'",
+                title, job.get('job_level'))
+            skip(job, 'structured_level')
             continue
 
         if experience_range and isinstance(experience_range, tuple) and len(experience_range) == 2:
             min_req, max_req = experience_range
             if min_req > max_experience_years:
-                print(
-                    f"  ❌ Skipped (Structured): '{title}' - Requires {min_req}-{max_req} years")
-                skipped_count += 1
+                log(DEBUG, "  ❌ Skipped (Structured): '%s' - Requires %s-%s years",
+                    title, min_req, max_req)
+                skip(job, 'structured_range')
                 continue
 
         if has_senior_keywords(title):
-            print(
-                f"  ❌ Skipped (Keyword): '{title}' - Contains senior keywords in title")
-            skipped_count += 1
+            log(DEBUG, "  ❌ Skipped (Keyword): '%s' - Contains senior keywords in title", title)
+            skip(job, 'senior_title')
             continue
 
         desc_min_exp = extract_experience_from_text(description)
         if desc_min_exp > max_experience_years:
-            print(
-                f"  ❌ Skipped (Regex): '{title}' - Requires {desc_min_exp}+ years in description")
-            skipped_count += 1
+            log(DEBUG, "  ❌ Skipped (Regex): '%s' - Requires %s+ years in description",
+                title, desc_min_exp)
+            skip(job, 'description_years')
             continue
 
         filtered_jobs.append(job)
 
+    for reason, count in skip_reasons.items():
+        increment('filter_rejected_jobs', count, stage='experience', reason=reason)
     print(
         f"🎯 Enhanced filtering complete: {skipped_count} jobs filtered out, {len(filtered_jobs)} remain.")
     return filtered_jobs
 
 
+def filter_jobs_by_language(jobs_list, languages=DESCRIPTION_LANGUAGES, rejections=None):
+    """
+    Keeps jobs whose description language is in `languages` (all jobs when None).
+    If a `rejections` list is given, a (job, reason) tuple is appended for every job dropped.
+    """
+    if languages is None:
+        return list(jobs_list)
+    filtered_jobs = []
+    for job in jobs_list:
+        language = description_of(job).language
+        if language in languages:
+            filtered_jobs.append(job)
+            continue
+        log(DEBUG, "  ❌ Skipped (Language): '%s' - Description language is '%s'",
+            job.get('title', ''), language)
+        if rejections is not None:
+            rejections.append((job, 'description_language'))
+    skipped_count = len(jobs_list) - len(filtered_jobs)
+    if skipped_count:
+        increment('filter_rejected_jobs', skipped_count, stage='language', reason='description_language')
+    print(
+        f"🌐 Language filtering complete: {skipped_count} jobs filtered out, {len(filtered_jobs)} remain.")
+    return filtered_jobs
+
+
 def should_use_gemini_classification(jobs_count, threshold=20):
     """
     Decide whether to use Gemini classification based on remaining job count.
@@ -186,6 +239,14 @@ def filter_for_entry_level_jobs(jobs_list):
     return entry_level_jobs
 
 
+_EXPERIENCE_PATTERNS = [re.compile(pattern, re.IGNORECASE) for pattern in (
+    r'\b(\d+)\+?\s*years?\s*(of\s*)?(experience|exp)\b',
+    r'\b(\d+)-(\d+)\s*years?\s*(of\s*)?(experience|exp)\b',
+    r'\bminimum\s*(\d+)\s*years?\b',
+    r'\bat least\s*(\d+)\s*years?\b',
+)]
+
+
 def extract_experience_from_text(text):
     """Helper function to extract minimum experience from text"""
     if not text:
@@ -193,18 +254,11 @@ def extract_experience_from_text(text):
 
     text = str(text) if text is not None else ""
 
-    experience_phrases = [
-        r'\b(\d+)\+?\s*years?\s*(of\s*)?(experience|exp)\b',
-        r'\b(\d+)-(\d+)\s*years?\s*(of\s*)?(experience|exp)\b',
-        r'\bminimum\s*(\d+)\s*years?\b',
-        r'\bat least\s*(\d+)\s*years?\b',
-    ]
-
     text_lower = text.lower()
     min_exp = 0
 
-    for pattern in experience_phrases:
-        matches = re.findall(pattern, text_lower, re.IGNORECASE)
+    for pattern in _EXPERIENCE_PATTERNS:
+        matches = pattern.findall(text_lower)
         for match in matches:
             if isinstance(match, tuple):
                 numbers = [int(x) for x in match if x.isdigit()]
@@ -216,6 +270,15 @@ def extract_experience_from_text(text):
     return min_exp
 
 
+def salary_fields(job):
+    """The columns is_salary_over_min reads, with the salary filter's defaults for missing values."""
+    fields = {}
+    for column, default in SALARY_COLUMN_DEFAULTS.items():
+        value = job.get(column)
+        fields[column] = default if value is None or pd.isna(value) else value
+    return fields
+
+
 def is_salary_over_min(row, min_annual_salary_inr):
     min_amount = row['min_amount']
     max_amount = row['max_amount']
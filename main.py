@@ -2,69 +2,114 @@ import os
 import time
 import json
 import hashlib
+import argparse
+from contextlib import contextmanager
 import pandas as pd
 from dotenv import load_dotenv
 from config import (
-    SOURCE_RESUME_PATH, PARSED_RESUME_PATH, GEMINI_TOP_N,
-    MIN_EXPERIENCE_YEARS, MAX_EXPERIENCE_YEARS, MIN_SALARY_INR,
-    TARGET_LOCATIONS  # Import your new config
+    GEMINI_TOP_N, HOURS_PER_YEAR, USD_TO_INR_RATE, COSINE_FILTER_TOP_N, MODEL_NAME,
+    CANDIDATES_PATH, ADAPTIVE_SCRAPE_BUDGET, HYBRID_RETRIEVAL, LEXICAL_CANDIDATE_POOL,
+    HYBRID_LEXICAL_WEIGHT, RANKING_MODE, CROSS_ENCODER_MODEL_NAME, RERANK_GEMINI_POOL,
+    ENRICH_RESUME_WITH_LLM, INCREMENTAL_RANKING, DESCRIPTION_LANGUAGES
 )
 from modules.scraper import run_scraper
-from modules.nlp_processor import filter_jobs_by_similarity
-from modules.gemini_client import (
-    parse_resume, get_job_rankings, generate_resume_content,
-    condense_latex_resume
+from modules.nlp_processor import (
+    get_model, get_cross_encoder, get_lexical_index, filter_jobs_by_similarity, filter_jobs_by_similarity_for_profiles
 )
-from modules.resume_generator import create_resume_pdf, get_pdf_page_count, prepare_resume_latex
-from modules.email_module import send_notification
-from modules.tracker import load_processed_jobs, update_processed_jobs
+from modules.gemini_client import parse_resume
+from modules.ranking import rank_jobs
+from modules.pipeline import run_tailoring_pipeline
+from modules.checkpoint import RunManifest, compute_run_inputs_hash, hash_jobs, hash_value
+from modules import telemetry
+from modules import gemini_usage
+from modules.telemetry import span, increment
+from modules import outbox
+from modules import profiler
+from modules import daemon
+from modules.latex_format import build_format
+from modules.latex_text import extract_resume_text
+from modules.descriptions import NORMALIZATION_VERSION
+from modules import tracker
 from modules.profile_builder import create_ideal_candidate_profile
-from keyword_filter import filter_jobs_by_experience, is_salary_over_min
+from modules.query_planner import QueryPlan, plan_queries
+from modules.candidates import (
+    DEFAULT_CANDIDATE_NAME, default_candidate, load_candidates, union_search_queries, checkpoint_key
+)
+from models.candidate_config import CandidateConfig
+from keyword_filter import (
+    filter_jobs_by_experience, filter_jobs_by_language, is_salary_over_min, salary_fields, has_senior_keywords, is_entry_level
+)
 
 
-def setup_resume_for_matching():
+def setup_resume_for_matching(candidate: CandidateConfig | None = None):
+    """
+    Returns the resume text used for matching, cached in the parsed resume file by
+    the source's MD5. The text is extracted locally; with ENRICH_RESUME_WITH_LLM,
+    Gemini's parse is used instead when it succeeds.
+    """
+    candidate = candidate or default_candidate()
+    source_resume_path = candidate.source_resume_path
+    parsed_resume_path = candidate.parsed_resume_path
     try:
-        with open(SOURCE_RESUME_PATH, 'rb') as f:
+        with open(source_resume_path, 'rb') as f:
             source_bytes = f.read()
         current_source_hash = hashlib.md5(source_bytes).hexdigest()
         source_latex = source_bytes.decode('utf-8')
     except FileNotFoundError:
         print(
-            f"❌ Error: Source resume file not found at '{SOURCE_RESUME_PATH}'. Please create it.")
+            f"❌ Error: Source resume file not found at '{source_resume_path}'. Please create it.")
         return None
 
     cached_data = {}
-    if os.path.exists(PARSED_RESUME_PATH):
-        with open(PARSED_RESUME_PATH, 'r', encoding='utf-8') as f:
+    if os.path.exists(parsed_resume_path):
+        with open(parsed_resume_path, 'r', encoding='utf-8') as f:
             try:
                 cached_data = json.load(f)
             except json.JSONDecodeError:
                 print("⚠️ Warning: Could not decode parsed_resume.json. Will re-parse.")
 
-    cached_hash = cached_data.get("source_hash")
-
-    if current_source_hash == cached_hash:
+    wanted_extractor = 'gemini' if ENRICH_RESUME_WITH_LLM else 'local'
+    # Files written before the local extractor existed hold Gemini's parse.
+    cached_extractor = cached_data.get("extractor", "gemini")
+    if current_source_hash == cached_data.get("source_hash") and cached_extractor == wanted_extractor:
         print("✅ Parsed resume is up-to-date (source hash matches).")
         return cached_data.get("parsed_text")
-    else:
-        print(
-            f"Source resume '{SOURCE_RESUME_PATH}' has changed. Parsing for matching...")
-        parsed_text = parse_resume(source_latex)
-        if parsed_text:
-            new_data = {
-                "source_hash": current_source_hash,
-                "parsed_text": parsed_text
-            }
-            with open(PARSED_RESUME_PATH, 'w', encoding='utf-8') as f:
-                json.dump(new_data, f, indent=2)
-            print("✅ Resume parsed and new hash saved.")
-            return parsed_text
+
+    print(
+        f"Source resume '{source_resume_path}' has changed. Extracting text for matching...")
+    with span('resume_text_extraction'):
+        parsed_text = extract_resume_text(source_latex)
+    extractor = 'local'
+    if ENRICH_RESUME_WITH_LLM:
+        enriched_text = parse_resume(source_latex)
+        if enriched_text:
+            parsed_text, extractor = enriched_text, 'gemini'
         else:
-            print("❌ Failed to parse resume. Using previous version if available.")
-            return cached_data.get("parsed_text")
+            print("⚠️ Gemini resume parse failed. Using the locally extracted text.")
+    if not parsed_text:
+        print("❌ Failed to extract any text from the resume. Using previous version if available.")
+        return cached_data.get("parsed_text")
+
+    new_data = {
+        "source_hash": current_source_hash,
+        "extractor": extractor,
+        "parsed_text": parsed_text
+    }
+    with open(parsed_resume_path, 'w', encoding='utf-8') as f:
+        json.dump(new_data, f, indent=2)
+    print(f"✅ Resume text extracted ({extractor}) and new hash saved.")
+    return parsed_text
+
+
+def location_matches(job_location, target_locations: list[str]) -> bool:
+    """Jobs without a location are kept; otherwise the location must contain a target keyword."""
+    if not job_location or pd.isna(job_location):
+        return True
+    job_location_lower = str(job_location).lower()
+    return any(target in job_location_lower for target in target_locations)
 
 
-def filter_jobs_by_location(jobs: list[dict], target_locations: list[str]) -> list[dict]:
+def filter_jobs_by_location(jobs: list[dict], target_locations: list[str], rejections=None) -> list[dict]:
     """Filters jobs based on a list of target location keywords."""
     print(
         f"\n--- Starting Location Filter (Targets: {', '.join(target_locations)}) ---")
@@ -72,201 +117,479 @@ def filter_jobs_by_location(jobs: list[dict], target_locations: list[str]) -> li
     filtered = []
 
     for job in jobs:
-        job_location = job.get('location')
-        if not job_location or pd.isna(job_location):
-            filtered.append(job)
-            continue
-
-        job_location_lower = str(job_location).lower()
-        if any(target in job_location_lower for target in target_locations):
+        if location_matches(job.get('location'), target_locations):
             filtered.append(job)
+        elif rejections is not None:
+            rejections.append((job, 'location_mismatch'))
 
+    _count_stage('location_filter', initial_count, len(filtered))
     print(
         f"--- Location filter finished. {initial_count - len(filtered)} jobs removed. {len(filtered)} remain. ---")
     return filtered
 
 
-def apply_filters(jobs_list: list[dict]) -> list[dict]:
-    """Applies location, salary, and experience filters to a list of jobs."""
+@contextmanager
+def _stage(name: str, threaded: bool = False):
+    """Times a pipeline stage and, in profiling mode, profiles it (see profiler.stage for `threaded`)."""
+    with span('pipeline_stage', stage=name), profiler.stage(name, threaded):
+        yield
+
+
+def _count_stage(stage: str, jobs_in: int, jobs_out: int):
+    increment('jobs_in', jobs_in, stage=stage)
+    increment('jobs_out', jobs_out, stage=stage)
+
+
+def apply_filters(jobs_list: list[dict], rejections: dict | None = None,
+                  candidate: CandidateConfig | None = None) -> list[dict]:
+    """
+    Applies location, salary, and experience filters to a list of jobs using the
+    candidate's preferences (config.py when no candidate is given).
+    If `rejections` is given, it is filled with a list of (job, reason) per filter stage.
+    """
     if not jobs_list:
         return []
+    if rejections is None:
+        rejections = {}
+    candidate = candidate or default_candidate()
+    min_salary_inr = candidate.min_salary_inr
 
     # --- Step 1: Location Filter ---
-    filtered_jobs = filter_jobs_by_location(jobs_list, TARGET_LOCATIONS)
+    filtered_jobs = filter_jobs_by_location(
+        jobs_list, candidate.target_locations, rejections.setdefault('location', []))
     if not filtered_jobs:
         return []
 
     # --- Step 2: Salary Filter ---
-    if MIN_SALARY_INR > 0:
-        print(f"\n--- Starting Salary Filter (Min: ₹{MIN_SALARY_INR:,}) ---")
+    if min_salary_inr > 0:
+        print(f"\n--- Starting Salary Filter (Min: ₹{min_salary_inr:,}) ---")
         initial_count = len(filtered_jobs)
-        df = pd.DataFrame(filtered_jobs)
-
-        required_cols = {'min_amount': pd.NA, 'max_amount': pd.NA,
-                         'interval': 'yearly', 'currency': 'INR'}
-        for col, default_val in required_cols.items():
-            if col not in df.columns:
-                df[col] = default_val
-            df[col] = df[col].apply(lambda x: pd.NA if pd.isnull(x) else x)
-            df[col] = df[col].fillna(default_val)
-
-        salary_mask = df.apply(is_salary_over_min, axis=1,
-                               min_annual_salary_inr=MIN_SALARY_INR)
-        filtered_jobs = df[salary_mask].to_dict('records')
+        salary_rejections = rejections.setdefault('salary', [])
+        kept_jobs = []
+        for job in filtered_jobs:
+            if is_salary_over_min(salary_fields(job), min_salary_inr):
+                kept_jobs.append(job)
+            else:
+                salary_rejections.append((job, 'salary_below_minimum'))
+        filtered_jobs = kept_jobs
+        _count_stage('salary_filter', initial_count, len(filtered_jobs))
         print(
             f"--- Salary filter finished. {initial_count - len(filtered_jobs)} jobs removed. {len(filtered_jobs)} remain. ---")
         if not filtered_jobs:
             return []
 
-    # --- Step 3: Experience Filter ---
+    # --- Step 3: Language Filter ---
+    # The experience patterns below only understand English descriptions.
+    initial_count = len(filtered_jobs)
+    filtered_jobs = filter_jobs_by_language(
+        filtered_jobs, DESCRIPTION_LANGUAGES, rejections.setdefault('language', []))
+    _count_stage('language_filter', initial_count, len(filtered_jobs))
+    if not filtered_jobs:
+        return []
+
+    # --- Step 4: Experience Filter ---
     print("\n--- Starting Keyword-based Experience Filter ---")
+    initial_count = len(filtered_jobs)
     filtered_jobs = filter_jobs_by_experience(
-        filtered_jobs, MAX_EXPERIENCE_YEARS)
+        filtered_jobs, candidate.max_experience_years, rejections.setdefault('experience', []))
+    _count_stage('experience_filter', initial_count, len(filtered_jobs))
 
     return filtered_jobs
 
 
-def main():
-    print("--- Starting AI Job Application Assistant ---")
-    load_dotenv()
-
-    processed_job_urls, existing_recent_records = load_processed_jobs()
+def get_verdict_config_hashes(resume_text: str, ideal_profile: str,
+                              candidate: CandidateConfig | None = None) -> dict:
+    """Hashes the settings each rejecting stage depends on, so cached verdicts expire when they change."""
+    candidate = candidate or default_candidate()
+    hashes = {
+        'location': hash_value(candidate.target_locations),
+        'salary': hash_value([candidate.min_salary_inr, HOURS_PER_YEAR, USD_TO_INR_RATE]),
+        'language': hash_value([DESCRIPTION_LANGUAGES, NORMALIZATION_VERSION]),
+        'experience': hash_value([candidate.min_experience_years, candidate.max_experience_years,
+                                  NORMALIZATION_VERSION]),
+        'similarity': hash_value([ideal_profile, COSINE_FILTER_TOP_N, HYBRID_RETRIEVAL,
+                                  LEXICAL_CANDIDATE_POOL, HYBRID_LEXICAL_WEIGHT, candidate.search_terms,
+                                  NORMALIZATION_VERSION]),
+    }
+    # With incremental ranking, jobs outside the top N keep their stored score and stay
+    # in contention instead of being rejected.
+    if not INCREMENTAL_RANKING:
+        hashes['ranking'] = hash_value([resume_text, candidate.user_message, GEMINI_TOP_N, MODEL_NAME,
+                                        RANKING_MODE, CROSS_ENCODER_MODEL_NAME, RERANK_GEMINI_POOL])
+    return hashes
+
+
+def _prepare_candidate(candidate: CandidateConfig) -> dict | None:
+    """Parses the candidate's resume and builds its matching profile."""
+    tracker.use_database(candidate.tracker_db_path)
     print(
-        f"🔍 Found {len(processed_job_urls)} previously processed jobs in the tracker.")
+        f"🔍 Found {tracker.count_processed_jobs()} previously processed jobs in the tracker.")
 
-    resume_text_for_matching = setup_resume_for_matching()
+    with _stage('setup_resume'):
+        resume_text_for_matching = setup_resume_for_matching(candidate)
     if not resume_text_for_matching:
-        return
+        return None
 
-    ideal_profile = create_ideal_candidate_profile(resume_text_for_matching)
+    ideal_profile = create_ideal_candidate_profile(resume_text_for_matching, candidate)
+    return {
+        'candidate': candidate,
+        'resume_text': resume_text_for_matching,
+        'ideal_profile': ideal_profile,
+        'verdict_hashes': get_verdict_config_hashes(
+            resume_text_for_matching, ideal_profile, candidate),
+    }
+
+
+def _seen_by_all(contexts: list[dict]):
+    """A scrape-time seen check: a job is dropped only if every candidate has processed it."""
+    def is_seen(urls):
+        seen = None
+        for context in contexts:
+            tracker.use_database(context['candidate'].tracker_db_path)
+            candidate_seen = tracker.find_seen_urls(urls if seen is None else list(seen))
+            seen = candidate_seen if seen is None else seen & candidate_seen
+            if not seen:
+                return set()
+        return seen
+    return is_seen
+
+
+def _listing_filter(contexts: list[dict]):
+    """
+    The first-phase scrape filter, using listing fields only. A job is dropped only
+    if every candidate would reject it, mirroring the title and location checks of
+    apply_filters.
+    """
+    target_location_sets = [context['candidate'].target_locations for context in contexts]
+
+    def rejection_reason(job):
+        if has_senior_keywords(job.get('title')) and not is_entry_level(job):
+            return 'senior_title'
+        if not any(location_matches(job.get('location'), targets) for targets in target_location_sets):
+            return 'location_mismatch'
+        return None
+    return rejection_reason
 
-    scraped_jobs = run_scraper()
-    if not scraped_jobs:
-        return
 
-    new_jobs = [job for job in scraped_jobs if job.get(
-        'job_url') not in processed_job_urls]
+def _filter_for_candidate(manifest: RunManifest, context: dict, scraped_jobs: list[dict]) -> list[dict]:
+    """Drops jobs the candidate already processed or rejected, then applies its filters."""
+    candidate = context['candidate']
+    verdict_hashes = context['verdict_hashes']
+    tracker.use_database(candidate.tracker_db_path)
+
+    new_jobs = tracker.filter_unprocessed_jobs(scraped_jobs)
+    _count_stage('dedup', len(scraped_jobs), len(new_jobs))
     print(
         f"✨ Found {len(new_jobs)} new jobs to process after filtering duplicates.")
+    new_jobs = tracker.filter_rejected_jobs(new_jobs, verdict_hashes)
     if not new_jobs:
         print("--- Pipeline finished: No new jobs found. ---")
-        return
+        return []
 
     # Apply all pre-filters (Location, Salary, Experience)
-    filtered_jobs = apply_filters(new_jobs)
+    rejections = {}
+    with _stage('filters'):
+        filtered_jobs = manifest.run_stage(
+            checkpoint_key(candidate, 'filtered'), hash_jobs(new_jobs),
+            lambda: apply_filters(new_jobs, rejections, candidate))
+    tracker.record_job_verdicts(rejections, verdict_hashes)
     if not filtered_jobs:
         print("--- Pipeline finished: No jobs remain after filtering. ---")
-        return
-
-    # Pre-filter with Cosine Similarity
-    print("\n--- Pre-filtering with Cosine Similarity ---")
-    jobs_for_ranking = filter_jobs_by_similarity(filtered_jobs, ideal_profile)
-    if not jobs_for_ranking:
-        return
-
-    # Rank the most relevant jobs with Gemini
-    print("\n--- Ranking Top Jobs with Gemini ---")
-    gemini_rankings = get_job_rankings(
-        jobs_for_ranking, resume_text_for_matching)
+    return filtered_jobs or []
+
+
+def _lexical_query(context: dict) -> str:
+    """The BM25 query: the candidate's search terms plus their ideal profile."""
+    return ' '.join(context['candidate'].search_terms + [context['ideal_profile']])
+
+
+def _similarity_for_candidates(manifest: RunManifest, contexts: list[dict]):
+    """
+    Shortlists each candidate's filtered jobs by cosine similarity. Candidates
+    without a checkpoint are scored together, so every job is embedded once.
+    """
+    missing = []
+    for context in contexts:
+        context['similarity_hash'] = hash_value(
+            [hash_jobs(context['filtered_jobs']), context['ideal_profile']])
+        cached = manifest.load_stage(
+            checkpoint_key(context['candidate'], 'similarity_top_n'), context['similarity_hash'])
+        if cached is not None:
+            print(f"⏩ Similarity shortlist for '{context['candidate'].name}' restored from checkpoint.")
+            context['jobs_for_ranking'] = cached
+        else:
+            missing.append(context)
+
+    if len(missing) == 1:
+        missing[0]['jobs_for_ranking'] = filter_jobs_by_similarity(
+            missing[0]['filtered_jobs'], missing[0]['ideal_profile'],
+            lexical_query=_lexical_query(missing[0]))
+    elif missing:
+        shortlists = filter_jobs_by_similarity_for_profiles(
+            [context['filtered_jobs'] for context in missing],
+            [context['ideal_profile'] for context in missing],
+            lexical_queries=[_lexical_query(context) for context in missing])
+        for context, shortlist in zip(missing, shortlists):
+            context['jobs_for_ranking'] = shortlist
+    for context in missing:
+        if context['jobs_for_ranking']:
+            manifest.save_stage(checkpoint_key(context['candidate'], 'similarity_top_n'),
+                                context['similarity_hash'], context['jobs_for_ranking'])
+
+    for context in contexts:
+        tracker.use_database(context['candidate'].tracker_db_path)
+        shortlisted_ids = {str(job['id']) for job in context['jobs_for_ranking']}
+        tracker.record_job_verdicts({'similarity': [
+            (job, 'below_similarity_top_n') for job in context['filtered_jobs']
+            if str(job['id']) not in shortlisted_ids]}, context['verdict_hashes'])
+
+
+def _rank_tailor_and_deliver(manifest: RunManifest, context: dict, plan: QueryPlan | None = None):
+    candidate = context['candidate']
+    jobs_for_ranking = context['jobs_for_ranking']
+    resume_text_for_matching = context['resume_text']
+    verdict_hashes = context['verdict_hashes']
+    tracker.use_database(candidate.tracker_db_path)
+
+    # Rank the most relevant jobs (Gemini, cross-encoder, or both per RANKING_MODE)
+    print(f"\n--- Ranking Top Jobs ({RANKING_MODE}) ---")
+    with _stage('ranking'):
+        gemini_rankings = manifest.run_stage(
+            checkpoint_key(candidate, 'rankings'),
+            hash_value([hash_jobs(jobs_for_ranking), resume_text_for_matching]),
+            lambda: rank_jobs(jobs_for_ranking, resume_text_for_matching, candidate.user_message),
+            meta={'ranking_mode': RANKING_MODE, 'incremental_ranking': INCREMENTAL_RANKING})
     if not gemini_rankings or 'ranked_jobs' not in gemini_rankings:
         return
 
     # Generate Resumes and Collect Results
     try:
-        with open(SOURCE_RESUME_PATH, 'r', encoding='utf-8') as f:
+        with open(candidate.source_resume_path, 'r', encoding='utf-8') as f:
             source_latex = f.read()
     except FileNotFoundError:
-        print(f"❌ Error: Source resume file '{SOURCE_RESUME_PATH}' not found.")
+        print(f"❌ Error: Source resume file '{candidate.source_resume_path}' not found.")
         return
 
     ranked_jobs = gemini_rankings['ranked_jobs']
     jobs_to_process = ranked_jobs[:GEMINI_TOP_N]
+    selected_ids = {rank_info['id'] for rank_info in jobs_to_process}
+    if plan is not None:
+        plan.count('ranked', [job for job in jobs_for_ranking if str(job['id']) in selected_ids])
+    tracker.record_job_verdicts({'ranking': [
+        (job, 'not_in_ranking_top_n') for job in jobs_for_ranking
+        if str(job['id']) not in selected_ids]}, verdict_hashes)
     original_jobs_map = {str(job['id']): job for job in jobs_for_ranking}
-    results_list = []
-
-    for i, rank_info in enumerate(jobs_to_process):
-        print(f"\n--- Processing Job {i+1} of {len(jobs_to_process)} ---")
+    jobs_for_pipeline = []
+    results_by_id = {}
+    cached_payloads = {}
+    for rank_info in jobs_to_process:
         full_job_details = original_jobs_map.get(rank_info['id'])
         if not full_job_details:
             print(
                 f"⚠️ Could not find full details for job ID {rank_info['id']}. Skipping.")
             continue
-
         full_job_details['match_reason'] = rank_info.get('match_reason', 'N/A')
 
-        tailored_payload = generate_resume_content(
-            source_latex, full_job_details)
-        final_latex, used_ai_content = prepare_resume_latex(
-            source_latex, full_job_details, tailored_payload)
-        generation_failed = tailored_payload is None or not used_ai_content
-        if generation_failed:
-            print(
-                f"⚠️ AI tailoring failed for '{str(full_job_details.get('title', 'N/A'))}'. Using default summary and keywords.")
-
-        pdf_path = create_resume_pdf(final_latex, full_job_details)
-        used_fallback_resume = False
-
-        if not pdf_path:
-            print(
-                "   ⚠️ Primary resume generation failed. Attempting fallback to base template...")
-            pdf_path = create_resume_pdf(source_latex, full_job_details)
-            if pdf_path:
-                used_fallback_resume = True
-                final_latex = source_latex
-                generation_failed = True
-                print("   ✅ Fallback resume generated using original template.")
-            else:
-                print("   ❌ Fallback resume generation also failed.")
-
-        if pdf_path:
-            page_count = get_pdf_page_count(pdf_path)
-            print(f"   📄 Compiled PDF has {page_count} page(s).")
-        else:
-            page_count = 0
+        job_key = checkpoint_key(candidate, rank_info['id'])
+        completed_result = manifest.get_completed_result(job_key)
+        if completed_result:
+            results_by_id[rank_info['id']] = completed_result
+            continue
+        tailored_payload = manifest.get_job(job_key).get('tailoring')
+        if tailored_payload:
+            cached_payloads[rank_info['id']] = tailored_payload
+        jobs_for_pipeline.append(full_job_details)
 
-        if pdf_path and not used_fallback_resume and page_count > 1:
-            print(
-                f"   ⚠️ Resume is {page_count} pages. Attempt 2: Condensing content...")
-            condensed_latex = condense_latex_resume(final_latex)
-            if condensed_latex:
-                final_latex = condensed_latex
-                condensed_pdf_path = create_resume_pdf(
-                    final_latex, full_job_details)
-                if condensed_pdf_path:
-                    pdf_path = condensed_pdf_path
-                    final_page_count = get_pdf_page_count(pdf_path)
-                    print(
-                        f"   ✅ Condensing successful. Final PDF has {final_page_count} page(s).")
-                    if final_page_count > 1:
-                        print("   ❌ Condensing failed to reduce to one page.")
-                else:
-                    print(
-                        "   ❌ Condensed LaTeX failed to compile. Reverting to pre-condensed resume.")
-                    generation_failed = True
-            else:
-                print("   ❌ AI condensing failed.")
-                generation_failed = True
-
-        if pdf_path:
-            results_list.append({
-                'job_details': full_job_details,
-                'pdf_path': pdf_path,
-                'generation_failed': generation_failed
-            })
-        else:
-            print(
-                f"❌ Critical Error: Could not generate PDF for '{str(full_job_details.get('title', 'N/A'))}'.")
+    if results_by_id:
+        print(
+            f"⏩ {len(results_by_id)} job(s) already have a compiled resume from the interrupted run.")
+
+    with _stage('tailor_and_compile', threaded=True):
+        pipeline_results, pipeline_metrics = run_tailoring_pipeline(
+            jobs_for_pipeline, source_latex, cached_payloads,
+            on_tailored=lambda job, payload: manifest.save_job(
+                checkpoint_key(candidate, job['id']), tailoring=payload),
+            on_result=lambda job, result: manifest.save_job(
+                checkpoint_key(candidate, job['id']), result=result),
+            output_dir=candidate.output_dir)
+    for queue_name, queue_stats in pipeline_metrics.get('queues', {}).items():
+        telemetry.set_gauge('pipeline_queue_max_depth',
+                            queue_stats['max_depth'], queue=queue_name)
+        telemetry.set_gauge('pipeline_queue_avg_depth',
+                            queue_stats['avg_depth'], queue=queue_name)
+    for result in pipeline_results:
+        results_by_id[str(result['job_details']['id'])] = result
+
+    results_list = [results_by_id[rank_info['id']] for rank_info in jobs_to_process
+                    if rank_info['id'] in results_by_id]
+
+    increment('resumes_generated', len(results_list))
+    increment('resumes_generation_failed', sum(
+        1 for res in results_list if res.get('generation_failed')))
+    if plan is not None:
+        plan.count('delivered', [res['job_details'] for res in results_list
+                                 if not res.get('generation_failed')])
 
     if results_list:
-        send_notification(results_list)
-        newly_processed_urls = [res['job_details']['job_url']
-                                for res in results_list]
-        update_processed_jobs(newly_processed_urls, existing_recent_records)
+        # The PDFs exist, so the jobs count as processed even if delivery is slow.
+        with _stage('tracker_update'):
+            tracker.record_processed_jobs(
+                [res['job_details'] for res in results_list])
+        with _stage('delivery'):
+            outbox.queue_notification(
+                results_list, candidate.email_to,
+                None if candidate.name == DEFAULT_CANDIDATE_NAME else candidate.name)
     else:
         print("--- No resumes were successfully generated. ---")
 
+
+def _run_pipeline(manifest: RunManifest, candidates: list[CandidateConfig]):
+    multi_candidate = len(candidates) > 1
+
+    contexts = []
+    for candidate in candidates:
+        if multi_candidate:
+            print(f"\n=== Preparing candidate '{candidate.name}' ===")
+        context = _prepare_candidate(candidate)
+        if context:
+            contexts.append(context)
+    if not contexts:
+        return
+
+    # One scrape serves every candidate: the union of their queries.
+    queries = union_search_queries([context['candidate'] for context in contexts])
+    plan = plan_queries(queries) if ADAPTIVE_SCRAPE_BUDGET else None
+    try:
+        _scrape_and_process(manifest, contexts, queries, plan)
+    finally:
+        if plan is not None:
+            plan.save()
+
+
+def _scrape_and_process(manifest: RunManifest, contexts: list[dict], queries: list[tuple],
+                        plan: QueryPlan | None):
+    multi_candidate = len(contexts) > 1
+    with _stage('scrape', threaded=True):
+        scraped_jobs = manifest.run_stage(
+            'scraped', manifest.run_id,
+            lambda: run_scraper(is_seen=_seen_by_all(contexts), queries=queries,
+                                listing_filter=_listing_filter(contexts), plan=plan))
+    if not scraped_jobs:
+        return
+
+    active = []
+    for context in contexts:
+        if multi_candidate:
+            print(f"\n=== Filtering for candidate '{context['candidate'].name}' ===")
+        context['filtered_jobs'] = _filter_for_candidate(manifest, context, scraped_jobs)
+        if context['filtered_jobs']:
+            active.append(context)
+            if plan is not None:
+                plan.count('filtered', context['filtered_jobs'])
+    if not active:
+        return
+
+    # Pre-filter with Cosine Similarity
+    print("\n--- Pre-filtering with Cosine Similarity ---")
+    with _stage('similarity'):
+        _similarity_for_candidates(manifest, active)
+
+    for context in active:
+        if not context['jobs_for_ranking']:
+            continue
+        if multi_candidate:
+            print(f"\n=== Ranking and tailoring for candidate '{context['candidate'].name}' ===")
+        _rank_tailor_and_deliver(manifest, context, plan)
+
     print("\n--- AI Job Application Assistant finished successfully! ---")
 
 
+def _load_candidate_set(candidates_arg: str | None) -> tuple[list[CandidateConfig], str | None]:
+    candidates_path = candidates_arg or (CANDIDATES_PATH if os.path.exists(CANDIDATES_PATH) else None)
+    if not candidates_path:
+        return [default_candidate()], None
+    candidates = load_candidates(candidates_path)
+    print(f"👥 Serving {len(candidates)} candidate(s) from '{candidates_path}': "
+          f"{', '.join(candidate.name for candidate in candidates)}")
+    return candidates, candidates_path
+
+
+def run_once(candidates_arg: str | None = None, drain_delivery: bool = True):
+    """Runs the whole pipeline once for the configured candidate(s)."""
+    candidates, candidates_path = _load_candidate_set(candidates_arg)
+    manifest = RunManifest.open(compute_run_inputs_hash(candidates if candidates_path else None))
+    gemini_usage.start_run()
+    outbox.start_delivery_worker()
+    with span('run'):
+        _run_pipeline(manifest, candidates)
+        if drain_delivery:
+            with _stage('delivery_drain'):
+                outbox.wait_for_delivery()
+    manifest.mark_completed()
+
+
+def _warm_up(candidates_arg: str | None):
+    """Loads everything a daemon keeps between runs: the model, lexical index, tracker connections, LaTeX formats."""
+    get_model()
+    get_lexical_index()
+    if RANKING_MODE.lower() != 'gemini':
+        get_cross_encoder()
+    candidates, _ = _load_candidate_set(candidates_arg)
+    for candidate in candidates:
+        tracker.use_database(candidate.tracker_db_path)
+        tracker.get_connection()
+        try:
+            with open(candidate.source_resume_path, 'r', encoding='utf-8') as f:
+                build_format(f.read())
+        except FileNotFoundError:
+            print(f"⚠️ Source resume '{candidate.source_resume_path}' not found; skipping LaTeX warm-up.")
+
+
+def _daemon_cycle(candidates_arg: str | None):
+    # Each cycle's run report covers that cycle only, like gemini_usage's per-run ledger.
+    telemetry.reset()
+    run_once(candidates_arg, drain_delivery=False)
+    tracker.checkpoint()
+    gemini_usage.print_summary()
+    telemetry.print_stage_summary()
+    telemetry.write_report()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AI Job Application Assistant")
+    parser.add_argument('--profile', action='store_true',
+                        help=f"Profile each stage into '{profiler.PROFILE_OUTPUT_DIR}/' (or set {profiler.PROFILE_ENV_VAR}=1).")
+    parser.add_argument('--candidates', default=None,
+                        help=f"JSON file of candidate configs to serve in one run (default: '{CANDIDATES_PATH}' if it exists).")
+    parser.add_argument('--daemon', action='store_true',
+                        help="Stay resident and run on an internal schedule with a health/metrics endpoint.")
+    args = parser.parse_args()
+
+    print("--- Starting AI Job Application Assistant ---")
+    load_dotenv()
+    if args.profile or profiler.requested_by_env():
+        profiler.enable()
+
+    if args.daemon:
+        try:
+            daemon.serve(lambda: _daemon_cycle(args.candidates),
+                         warm_up=lambda: _warm_up(args.candidates))
+        finally:
+            outbox.wait_for_delivery()
+            tracker.close()
+            telemetry.write_report()
+            profiler.write_results()
+        return
+
+    try:
+        run_once(args.candidates)
+    finally:
+        tracker.close()
+        gemini_usage.print_summary()
+        telemetry.print_stage_summary()
+        telemetry.write_report()
+        profiler.write_results()
+
+
 if __name__ == "__main__":
     main()
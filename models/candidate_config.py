@@ -0,0 +1,28 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+from config import (
+    SOURCE_RESUME_PATH, PARSED_RESUME_PATH, OUTPUT_DIR, TRACKER_DB_PATH, SEARCH_TERMS, LOCATIONS,
+    MIN_SALARY_INR, MIN_EXPERIENCE_YEARS, MAX_EXPERIENCE_YEARS, USER_MESSAGE
+)
+
+
+class CandidateConfig(BaseModel):
+    name: str = Field(pattern=r'^[A-Za-z0-9_.-]+$',
+                      description="Unique, filesystem-safe candidate name.")
+    source_resume_path: str = SOURCE_RESUME_PATH
+    parsed_resume_path: str = PARSED_RESUME_PATH
+    output_dir: str = OUTPUT_DIR
+    tracker_db_path: str = TRACKER_DB_PATH
+    search_terms: List[str] = Field(default_factory=lambda: list(SEARCH_TERMS))
+    locations: List[str] = Field(default_factory=lambda: list(LOCATIONS))
+    min_salary_inr: int = MIN_SALARY_INR
+    min_experience_years: int = MIN_EXPERIENCE_YEARS
+    max_experience_years: int = MAX_EXPERIENCE_YEARS
+    user_message: str = USER_MESSAGE
+    email_to: Optional[str] = Field(
+        default=None, description="Recipient address; falls back to EMAIL_TO.")
+
+    @property
+    def target_locations(self) -> List[str]:
+        return [loc.lower() for loc in self.locations]
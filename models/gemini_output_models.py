@@ -5,6 +5,8 @@ from typing import List
 class RankedJob(BaseModel):
     id: str = Field(description="The job ID from the input.")
     rank: int = Field(description="The numerical rank of the job.")
+    score: int = Field(
+        description="How well the job fits the candidate, from 0 (no fit) to 100 (ideal).")
     company: str = Field(description="The name of the company.")
     title: str = Field(description="The job title.")
     url: str = Field(description="The URL for the job posting.")
@@ -21,6 +23,12 @@ class ExperienceResponse(BaseModel):
     max_years: int
 
 
+class ContentVariant(BaseModel):
+    summary_bullets: List[str]
+    keywords: List[str]
+    highlight_bullets: List[str]
+
+
 class ResumeContentResponse(BaseModel):
     summary_bullets: List[str] = Field(
         description="2-3 bullet statements summarizing fit for the role.")
@@ -28,3 +36,9 @@ class ResumeContentResponse(BaseModel):
         description="6-8 keyword phrases to emphasize in the resume.")
     highlight_bullets: List[str] = Field(
         description="3 concise, achievement-oriented bullet points aligned to the job.")
+    compact: ContentVariant = Field(
+        description="A shorter rewrite of the same content: 2 summary bullets, 6 keywords and "
+                    "2-3 highlight bullets of at most 100 characters each.")
+    minimal: ContentVariant = Field(
+        description="The shortest rewrite: 2 summary bullets, 4-5 keywords and 2 highlight "
+                    "bullets of at most 80 characters each.")
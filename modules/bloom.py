@@ -0,0 +1,41 @@
+import math
+import hashlib
+
+
+class BloomFilter:
+    """
+    A fixed-size Bloom filter. Memory is bounded by `capacity` and `error_rate`
+    regardless of how many items are added over time; past capacity the false
+    positive rate grows, so callers rebuild it from the tracker when that happens.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.01, bits: bytearray = None, item_count: int = 0):
+        self.capacity = max(1, int(capacity))
+        self.error_rate = error_rate
+        self.bit_count = max(8, int(-self.capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.bit_count / self.capacity * math.log(2)))
+        expected_bytes = (self.bit_count + 7) // 8
+        if bits is not None and len(bits) != expected_bytes:
+            raise ValueError("Bloom filter bit array does not match its capacity and error rate.")
+        self.bits = bits if bits is not None else bytearray(expected_bytes)
+        self.item_count = item_count
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        for i in range(self.hash_count):
+            yield (first + i * second) % self.bit_count
+
+    def add(self, item: str):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.item_count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7))
+                   for position in self._positions(item))
+
+    @property
+    def is_saturated(self) -> bool:
+        return self.item_count > self.capacity
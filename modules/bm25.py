@@ -0,0 +1,89 @@
+import re
+import math
+from collections import Counter
+from typing import Dict, Iterable, List
+
+# Standard Okapi BM25 parameters
+K1 = 1.5
+B = 0.75
+
+# Keeps tech tokens such as c++, c#, node.js and .net intact
+_TOKEN_PATTERN = re.compile(r"[a-z0-9.+#][a-z0-9+#.]*")
+STOPWORDS = frozenset("""
+a an and are as at be by for from has have in is it its of on or our that the this to
+we will with you your their they them who what which about into over per via can may
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercases and splits text into index terms, dropping stopwords and stray punctuation."""
+    tokens = []
+    for token in _TOKEN_PATTERN.findall(str(text or '').lower()):
+        token = token.strip('.')
+        if len(token) > 1 and token not in STOPWORDS:
+            tokens.append(token)
+    return tokens
+
+
+class BM25Index:
+    """
+    An in-memory inverted index (term -> {doc_key: term frequency}) scored with
+    Okapi BM25. Documents are added incrementally and can be restored from their
+    stored term counts without re-tokenizing.
+    """
+
+    def __init__(self):
+        self.postings: Dict[str, Dict[str, int]] = {}
+        self.doc_lengths: Dict[str, int] = {}
+        self._total_length = 0
+
+    def __contains__(self, doc_key: str) -> bool:
+        return doc_key in self.doc_lengths
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+
+    def add_counts(self, doc_key: str, term_counts: Dict[str, int]):
+        if doc_key in self.doc_lengths:
+            return
+        for term, count in term_counts.items():
+            self.postings.setdefault(term, {})[doc_key] = count
+        length = sum(term_counts.values())
+        self.doc_lengths[doc_key] = length
+        self._total_length += length
+
+    def add(self, doc_key: str, text: str) -> Dict[str, int]:
+        """Indexes `text` under `doc_key` and returns its term counts (for persisting)."""
+        term_counts = dict(Counter(tokenize(text)))
+        self.add_counts(doc_key, term_counts)
+        return term_counts
+
+    def idf(self, term: str) -> float:
+        doc_freq = len(self.postings.get(term, ()))
+        return math.log(1 + (len(self.doc_lengths) - doc_freq + 0.5) / (doc_freq + 0.5))
+
+    def score(self, query: str, doc_keys: Iterable[str]) -> Dict[str, float]:
+        """
+        BM25 scores of the given documents for `query`; unknown documents score 0.
+        Each query term's postings are intersected with the candidates, walking
+        whichever of the two is smaller.
+        """
+        scores = dict.fromkeys(doc_keys, 0.0)
+        if not self.doc_lengths:
+            return scores
+        average_length = self._total_length / len(self.doc_lengths) or 1.0
+        for term in set(tokenize(query)):
+            term_postings = self.postings.get(term)
+            if not term_postings:
+                continue
+            if len(term_postings) <= len(scores):
+                matches = [(doc_key, frequency) for doc_key, frequency in term_postings.items()
+                           if doc_key in scores]
+            else:
+                matches = [(doc_key, term_postings[doc_key]) for doc_key in scores
+                           if doc_key in term_postings]
+            idf = self.idf(term)
+            for doc_key, frequency in matches:
+                norm = K1 * (1 - B + B * self.doc_lengths[doc_key] / average_length)
+                scores[doc_key] += idf * frequency * (K1 + 1) / (frequency + norm)
+        return scores
@@ -0,0 +1,67 @@
+import os
+import json
+from typing import List
+
+from pydantic import ValidationError
+
+from config import CANDIDATES_STATE_DIR
+from models.candidate_config import CandidateConfig
+from modules.scraper import build_search_queries
+
+DEFAULT_CANDIDATE_NAME = "default"
+
+
+def default_candidate() -> CandidateConfig:
+    """The single candidate described by config.py, using the top-level state files."""
+    return CandidateConfig(name=DEFAULT_CANDIDATE_NAME)
+
+
+def load_candidates(path: str) -> List[CandidateConfig]:
+    """
+    Loads a JSON list of candidate configs. Settings left out fall back to config.py;
+    per-candidate state (parsed resume, tracker database, generated resumes) defaults
+    to `candidates/<name>/` so candidates never share it.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        entries = json.load(f)
+    if not isinstance(entries, list) or not entries:
+        raise ValueError(f"'{path}' must contain a non-empty JSON list of candidates.")
+
+    candidates = []
+    for entry in entries:
+        name = entry.get('name') if isinstance(entry, dict) else None
+        if not name:
+            raise ValueError(f"Every candidate in '{path}' needs a 'name'.")
+        state_dir = os.path.join(CANDIDATES_STATE_DIR, str(name))
+        entry = {
+            'parsed_resume_path': os.path.join(state_dir, "parsed_resume.json"),
+            'tracker_db_path': os.path.join(state_dir, "processed_jobs.db"),
+            'output_dir': os.path.join(state_dir, "generated_resumes"),
+            **entry,
+        }
+        try:
+            candidates.append(CandidateConfig(**entry))
+        except ValidationError as e:
+            raise ValueError(f"Invalid candidate '{name}' in '{path}': {e}") from e
+        os.makedirs(state_dir, exist_ok=True)
+
+    names = [candidate.name for candidate in candidates]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Candidate names in '{path}' must be unique.")
+    return candidates
+
+
+def union_search_queries(candidates: List[CandidateConfig]) -> List[tuple]:
+    """All (search term, location) queries the candidates need, each listed once."""
+    queries = {}
+    for candidate in candidates:
+        for query in build_search_queries(candidate.search_terms, candidate.locations):
+            queries.setdefault((query[0].lower(), query[1].lower()), query)
+    return list(queries.values())
+
+
+def checkpoint_key(candidate: CandidateConfig, name: str) -> str:
+    """Namespaces per-candidate checkpoint entries; the default candidate keeps plain keys."""
+    if candidate.name == DEFAULT_CANDIDATE_NAME:
+        return name
+    return f"{candidate.name}/{name}"
@@ -0,0 +1,259 @@
+import os
+import json
+import shutil
+import hashlib
+import threading
+from collections.abc import Mapping
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+import config
+from config import RUN_MANIFEST_PATH, CHECKPOINT_MAX_AGE_HOURS, SOURCE_RESUME_PATH
+from modules.url_utils import job_key
+
+# Every upper-case config value is part of the run inputs, so a new setting can never be
+# forgotten. These only tune how the run executes or where it writes, never what a stage produces.
+RUN_INPUT_EXEMPT_SETTINGS = {
+    'DESCRIPTION_FETCH_WORKERS', 'CROSS_ENCODER_BATCH_SIZE', 'GEMINI_BATCH_POLL_SECONDS',
+    'GEMINI_BATCH_TIMEOUT_SECONDS', 'GEMINI_BATCH_DIR', 'API_CALL_DELAY_SECONDS',
+    'PIPELINE_COMPILE_WORKERS', 'PIPELINE_QUEUE_SIZE', 'RUN_MANIFEST_PATH', 'CHECKPOINT_MAX_AGE_HOURS',
+    'DAEMON_INTERVAL_MINUTES', 'DAEMON_JITTER_SECONDS', 'DAEMON_HTTP_HOST', 'DAEMON_HTTP_PORT',
+    'DAEMON_MAX_CONSECUTIVE_FAILURES', 'LOG_LEVEL', 'RUN_REPORT_JSON_PATH', 'RUN_REPORT_PROM_PATH',
+    'PROFILE_OUTPUT_DIR', 'PROFILE_SAMPLE_INTERVAL_SECONDS', 'EMAIL_RETRY_DELAY_SECONDS',
+    'EMAIL_SMTP_TIMEOUT_SECONDS', 'OUTBOX_DIR', 'OUTBOX_MAX_ATTEMPTS', 'DELIVERY_DRAIN_TIMEOUT_SECONDS',
+}
+
+
+def _json_default(value):
+    """Serialises JobViews and the NumPy/pandas scalars found in scraped job records."""
+    if isinstance(value, Mapping):
+        return dict(value)
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    if hasattr(value, 'item'):
+        try:
+            return value.item()
+        except (TypeError, ValueError):
+            pass
+    return str(value)
+
+
+def hash_value(value) -> str:
+    """Returns a stable MD5 hash of any JSON-serialisable value."""
+    payload = json.dumps(value, sort_keys=True, default=_json_default)
+    return hashlib.md5(payload.encode('utf-8')).hexdigest()
+
+
+def hash_jobs(jobs: List[Dict]) -> str:
+    """Hashes a job list by its posting keys so stage inputs can be compared across runs."""
+    return hash_value(sorted(job_key(job) for job in jobs))
+
+
+def _file_md5(path: str) -> Optional[str]:
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.md5(f.read()).hexdigest()
+    except FileNotFoundError:
+        return None
+
+
+def compute_run_inputs_hash(candidates: Optional[List] = None) -> str:
+    """
+    Hashes the run configuration (every config setting outside RUN_INPUT_EXEMPT_SETTINGS,
+    plus the version constants of stored normalizations) together with the source
+    resume contents, or with every candidate's settings and resume when running
+    several candidates.
+    """
+    # Imported here: ranking imports this module.
+    from modules import descriptions, ranking, url_utils
+    settings = {name: value for name, value in vars(config).items()
+                if name.isupper() and name not in RUN_INPUT_EXEMPT_SETTINGS}
+    settings['versions'] = {
+        'normalization': descriptions.NORMALIZATION_VERSION,
+        'canonicalization': url_utils.CANONICALIZATION_VERSION,
+        'ranking_score': ranking.RANKING_SCORE_VERSION,
+    }
+    if candidates:
+        settings['candidates'] = [
+            {**candidate.model_dump(), 'source_resume': _file_md5(candidate.source_resume_path)}
+            for candidate in candidates]
+    else:
+        settings['source_resume'] = _file_md5(SOURCE_RESUME_PATH)
+    return hash_value(settings)
+
+
+class RunManifest:
+    """
+    Checkpoints the output of each pipeline stage and each tailored job to disk.
+    The manifest file is a small index; stage outputs live in their own files and
+    per-job results are appended to a JSONL log, both in `<manifest>_checkpoints/`,
+    so saving a job never rewrites the scraped corpus. A manifest is resumed when
+    the previous run did not complete, was started with the same inputs hash and
+    is not older than CHECKPOINT_MAX_AGE_HOURS.
+    """
+
+    def __init__(self, path: str, data: Dict, jobs: Optional[Dict] = None):
+        self.path = path
+        self.data = data
+        self.jobs = jobs if jobs is not None else {}
+        self.checkpoint_dir = f"{os.path.splitext(path)[0]}_checkpoints"
+        self._lock = threading.Lock()
+
+    @property
+    def run_id(self) -> str:
+        return self.data['run_id']
+
+    @property
+    def _jobs_path(self) -> str:
+        return os.path.join(self.checkpoint_dir, "jobs.jsonl")
+
+    @classmethod
+    def read(cls, path: str = RUN_MANIFEST_PATH) -> Optional['RunManifest']:
+        """Loads an existing manifest and its saved jobs as-is, or None if unreadable."""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (json.JSONDecodeError, IOError) as e:
+            print(f"⚠️ Could not read run manifest: {e}.")
+            return None
+        manifest = cls(path, data)
+        manifest.jobs = manifest._load_jobs()
+        return manifest
+
+    @classmethod
+    def open(cls, inputs_hash: str, path: str = RUN_MANIFEST_PATH) -> 'RunManifest':
+        previous = cls.read(path) if os.path.exists(path) else None
+        if previous and cls._is_resumable(previous.data, inputs_hash):
+            print(
+                f"⏩ Resuming unfinished run '{previous.run_id}' from checkpoint ({len(previous.data.get('stages', {}))} stage(s), {len(previous.jobs)} job(s) saved).")
+            return previous
+
+        started_at = datetime.now()
+        run_id = f"{started_at.strftime('%Y%m%d-%H%M%S')}-{inputs_hash[:8]}"
+        manifest = cls(path, {
+            'run_id': run_id,
+            'inputs_hash': inputs_hash,
+            'started_at': started_at.isoformat(),
+            'completed': False,
+            'stages': {},
+        })
+        shutil.rmtree(manifest.checkpoint_dir, ignore_errors=True)
+        manifest._save()
+        return manifest
+
+    @staticmethod
+    def _is_resumable(previous: Dict, inputs_hash: str) -> bool:
+        if previous.get('completed') or previous.get('inputs_hash') != inputs_hash:
+            return False
+        try:
+            started_at = datetime.fromisoformat(previous['started_at'])
+        except (KeyError, TypeError, ValueError):
+            return False
+        return datetime.now() - started_at <= timedelta(hours=CHECKPOINT_MAX_AGE_HOURS)
+
+    @staticmethod
+    def _write_json(path: str, value):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(value, f, default=_json_default)
+        os.replace(tmp_path, path)
+
+    def _save(self):
+        try:
+            self._write_json(self.path, self.data)
+        except IOError as e:
+            print(f"⚠️ Could not write run manifest: {e}")
+
+    def _load_jobs(self) -> Dict:
+        """Replays the per-job log; later lines update earlier ones, a torn last line is ignored."""
+        jobs = {}
+        if not os.path.exists(self._jobs_path):
+            return jobs
+        with open(self._jobs_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                jobs.setdefault(entry['job_id'], {}).update(entry['fields'])
+        return jobs
+
+    def load_stage(self, name: str, input_hash: str):
+        with self._lock:
+            stage = self.data['stages'].get(name)
+        if not stage or stage.get('input_hash') != input_hash:
+            return None
+        return self.stage_output(name)
+
+    def stage_output(self, name: str):
+        """The saved output of a stage regardless of its input hash, or None."""
+        stage = self.data['stages'].get(name)
+        if not stage or not stage.get('file'):
+            return None
+        try:
+            with open(os.path.join(self.checkpoint_dir, stage['file']), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (json.JSONDecodeError, IOError) as e:
+            print(f"⚠️ Could not read the '{name}' checkpoint: {e}")
+            return None
+
+    def stage_meta(self, name: str) -> Dict:
+        """The metadata saved with a stage's output, e.g. which mode produced it."""
+        return dict((self.data['stages'].get(name) or {}).get('meta') or {})
+
+    def save_stage(self, name: str, input_hash: str, output, meta: Optional[Dict] = None):
+        file_name = f"stage-{hashlib.md5(name.encode('utf-8')).hexdigest()[:12]}.json"
+        with self._lock:
+            try:
+                os.makedirs(self.checkpoint_dir, exist_ok=True)
+                self._write_json(os.path.join(self.checkpoint_dir, file_name), output)
+            except IOError as e:
+                print(f"⚠️ Could not write the '{name}' checkpoint: {e}")
+                return
+            self.data['stages'][name] = {
+                'input_hash': input_hash,
+                'saved_at': datetime.now().isoformat(),
+                'file': file_name,
+                'meta': meta or {},
+            }
+            self._save()
+
+    def run_stage(self, name: str, input_hash: str, compute: Callable, meta: Optional[Dict] = None):
+        """Returns the checkpointed output of a stage, computing and saving it (with `meta`) if missing."""
+        cached = self.load_stage(name, input_hash)
+        if cached is not None:
+            print(f"⏩ Stage '{name}' restored from checkpoint.")
+            return cached
+        output = compute()
+        if output:
+            self.save_stage(name, input_hash, output, meta)
+        return output
+
+    def get_job(self, job_id: str) -> Dict:
+        with self._lock:
+            return dict(self.jobs.get(str(job_id), {}))
+
+    def save_job(self, job_id: str, **fields):
+        """Appends the job's new fields to the per-job log."""
+        line = json.dumps({'job_id': str(job_id), 'fields': fields}, default=_json_default)
+        with self._lock:
+            self.jobs.setdefault(str(job_id), {}).update(fields)
+            try:
+                os.makedirs(self.checkpoint_dir, exist_ok=True)
+                with open(self._jobs_path, 'a', encoding='utf-8') as f:
+                    f.write(line + "\n")
+            except IOError as e:
+                print(f"⚠️ Could not write job checkpoint: {e}")
+
+    def get_completed_result(self, job_id: str) -> Optional[Dict]:
+        """Returns a saved result if its PDF still exists on disk."""
+        result = self.get_job(job_id).get('result')
+        if result and result.get('pdf_path') and os.path.exists(result['pdf_path']):
+            return result
+        return None
+
+    def mark_completed(self):
+        with self._lock:
+            self.data['completed'] = True
+            self.data['completed_at'] = datetime.now().isoformat()
+            self._save()
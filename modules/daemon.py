@@ -0,0 +1,133 @@
+import json
+import time
+import random
+import signal
+import threading
+import traceback
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional
+
+from config import (
+    DAEMON_INTERVAL_MINUTES, DAEMON_JITTER_SECONDS, DAEMON_HTTP_HOST, DAEMON_HTTP_PORT,
+    DAEMON_MAX_CONSECUTIVE_FAILURES
+)
+from modules import telemetry
+from modules.telemetry import increment
+
+_state_lock = threading.Lock()
+_state: Dict = {
+    'started_at': None,
+    'running': False,
+    'runs': 0,
+    'failures': 0,
+    'consecutive_failures': 0,
+    'last_run_started_at': None,
+    'last_run_seconds': None,
+    'last_success_at': None,
+    'last_error': None,
+    'next_run_at': None,
+}
+
+
+def health() -> Dict:
+    """Snapshot of the scheduler state, as served on /healthz."""
+    with _state_lock:
+        state = dict(_state)
+    state['status'] = 'failing' if state['consecutive_failures'] >= DAEMON_MAX_CONSECUTIVE_FAILURES else 'ok'
+    return state
+
+
+def _update_state(**fields):
+    with _state_lock:
+        _state.update(fields)
+
+
+class _HealthHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path in ('/health', '/healthz'):
+            state = health()
+            body = json.dumps(state, indent=2).encode('utf-8')
+            self._respond(200 if state['status'] == 'ok' else 503, 'application/json', body)
+        elif self.path == '/metrics':
+            body = telemetry.render_prometheus().encode('utf-8')
+            self._respond(200, 'text/plain; version=0.0.4', body)
+        else:
+            self._respond(404, 'text/plain', b"Not found\n")
+
+    def _respond(self, status: int, content_type: str, body: bytes):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        telemetry.log(telemetry.DEBUG, "🌐 %s - %s", self.address_string(), format % args)
+
+
+def next_delay_seconds(interval_minutes: float = DAEMON_INTERVAL_MINUTES,
+                       jitter_seconds: float = DAEMON_JITTER_SECONDS) -> float:
+    """The interval with uniform jitter, so several daemons don't hit the job boards in lockstep."""
+    return max(0.0, interval_minutes * 60 + random.uniform(-jitter_seconds, jitter_seconds))
+
+
+def _run_cycle(run_cycle: Callable):
+    started = time.perf_counter()
+    _update_state(running=True, last_run_started_at=datetime.now().isoformat())
+    try:
+        run_cycle()
+    except Exception as e:
+        traceback.print_exc()
+        increment('daemon_runs', status='error')
+        with _state_lock:
+            _state['runs'] += 1
+            _state['failures'] += 1
+            _state['consecutive_failures'] += 1
+            _state['last_error'] = f"{e.__class__.__name__}: {e}"
+        print(f"❌ Scheduled run failed: {e}")
+    else:
+        increment('daemon_runs', status='ok')
+        with _state_lock:
+            _state['runs'] += 1
+            _state['consecutive_failures'] = 0
+            _state['last_success_at'] = datetime.now().isoformat()
+    finally:
+        _update_state(running=False, last_run_seconds=round(time.perf_counter() - started, 2))
+
+
+def serve(run_cycle: Callable, warm_up: Optional[Callable] = None,
+          host: str = DAEMON_HTTP_HOST, port: int = DAEMON_HTTP_PORT):
+    """
+    Runs `run_cycle` now and then every DAEMON_INTERVAL_MINUTES (+/- jitter) until
+    SIGINT/SIGTERM, keeping the process and everything `warm_up` loaded alive in
+    between. A failed run is logged and retried on the next tick.
+    """
+    stop_event = threading.Event()
+
+    def _request_stop(signum, frame):
+        print(f"\n🛑 Received signal {signum}; stopping after the current run.")
+        stop_event.set()
+
+    signal.signal(signal.SIGTERM, _request_stop)
+    signal.signal(signal.SIGINT, _request_stop)
+
+    server = ThreadingHTTPServer((host, port), _HealthHandler)
+    threading.Thread(target=server.serve_forever, name="health-server", daemon=True).start()
+    _update_state(started_at=datetime.now().isoformat())
+    print(f"🩺 Health and metrics endpoint on http://{host}:{port}/healthz and /metrics")
+
+    try:
+        if warm_up:
+            with telemetry.span('daemon_warm_up'):
+                warm_up()
+        while not stop_event.is_set():
+            _run_cycle(run_cycle)
+            delay = next_delay_seconds()
+            next_run_at = datetime.fromtimestamp(time.time() + delay)
+            _update_state(next_run_at=next_run_at.isoformat())
+            print(f"💤 Next run at {next_run_at:%Y-%m-%d %H:%M:%S} (in {delay / 60:.1f} min).")
+            stop_event.wait(delay)
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,157 @@
+import re
+import html
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Mapping, NamedTuple
+
+from config import DESCRIPTION_CACHE_SIZE
+from modules.telemetry import increment
+
+# Bump when the normalization changes, so verdicts cached on the old text expire
+NORMALIZATION_VERSION = 1
+
+_HTML_TAG = re.compile(r"<(?:br|/p|/li|/div|/h\d)\s*/?>|<li[^>]*>", re.IGNORECASE)
+_ANY_TAG = re.compile(r"<[^>]+>")
+_MARKDOWN_LINK = re.compile(r"!?\[([^\]]*)\]\([^)]*\)")
+_MARKDOWN_ESCAPE = re.compile(r"\\([\\`*_{}\[\]()#+\-.!|>~])")
+_MARKDOWN_EMPHASIS = re.compile(r"(?<![\w*])(\*\*|__|\*|_|`)(?=\S)(.+?)(?<=\S)\1(?![\w*])")
+_BOLD_LINE = re.compile(r"^(?:\*\*|__)([^*_]+?):?(?:\*\*|__):?$")
+_BULLET = re.compile(r"^(?:[-*+•·▪]|\d+[.)])\s+")
+_BULLET_STARTS = frozenset('-*+•·▪')
+_HEADING_MARKER = re.compile(r"^#{1,6}\s*")
+
+REQUIREMENT_HEADINGS = re.compile(
+    r"requirement|qualification|what you(?:'ll)? (?:need|bring)|must.have|nice.to.have|skills|"
+    r"who you are|about you|you have|you will need|eligibility|what we(?:'re| are)? look(?:ing)? for|"
+    r"preferred|experience|competenc", re.IGNORECASE)
+BOILERPLATE_HEADINGS = re.compile(
+    r"^about (?!(?:the )?(?:role|job|position|team|opportunity|you))|benefits|perks|what we offer|"
+    r"why (?:join|work)|equal (?:employment )?opportunit|"
+    r"\beeo\b|diversity|inclusion|our (?:values|culture|mission|story)|life at|how to apply|"
+    r"disclaimer|privacy|compensation|salary|who we are", re.IGNORECASE)
+BOILERPLATE_SENTENCES = re.compile(
+    r"equal opportunity employer|do(?:es)? not discriminate|reasonable accommodation|"
+    r"without regard to (?:race|age|gender)|privacy (?:policy|notice)", re.IGNORECASE)
+_WORD = re.compile(r"[^\W\d_]+")
+# Language detection only needs the start of a description
+LANGUAGE_SAMPLE_CHARS = 1000
+ENGLISH_STOPWORDS = frozenset(
+    "the and to of a in for with you on is are be will as our we your or an at by this that "
+    "from have has can".split())
+
+
+class NormalizedDescription(NamedTuple):
+    text: str            # markup stripped, whitespace collapsed
+    core: str            # `text` without company boilerplate (about us, benefits, EEO)
+    requirements: str    # the requirement/qualification sections, '' if none were found
+    language: str        # 'en', 'other', or 'unknown' for very short texts
+
+
+EMPTY = NormalizedDescription('', '', '', 'unknown')
+
+_cache: "OrderedDict[str, NormalizedDescription]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _strip_markup(raw: str) -> list[str]:
+    """Returns the description's non-empty lines, with HTML and Markdown removed."""
+    text = _HTML_TAG.sub("\n", raw)
+    text = html.unescape(_ANY_TAG.sub(" ", text))
+    text = _MARKDOWN_ESCAPE.sub(r"\1", _MARKDOWN_LINK.sub(r"\1", text))
+    lines = []
+    for line in text.splitlines():
+        line = " ".join(line.split())
+        if line[:1] in ('*', '_'):
+            # A line that is all bold is how JobSpy's Markdown renders most section titles.
+            line = _BOLD_LINE.sub(r"# \1", line)
+        if '*' in line or '_' in line or '`' in line:
+            line = _MARKDOWN_EMPHASIS.sub(r"\2", line)
+        if line:
+            lines.append(line)
+    return lines
+
+
+def _heading(line: str) -> str | None:
+    """The heading text if `line` looks like a section heading, else None."""
+    if _HEADING_MARKER.match(line):
+        return _HEADING_MARKER.sub("", line)
+    if _BULLET.match(line):
+        return None
+    if line.endswith(':') and len(line) <= 60:
+        return line.rstrip(':')
+    return None
+
+
+def detect_language(text: str) -> str:
+    """A cheap stopword check: English descriptions are full of 'the', 'and', 'you'..."""
+    words = _WORD.findall(text[:LANGUAGE_SAMPLE_CHARS].lower())
+    if len(words) < 20:
+        return 'unknown'
+    stopword_share = sum(1 for word in words if word in ENGLISH_STOPWORDS) / len(words)
+    return 'en' if stopword_share >= 0.08 else 'other'
+
+
+def normalize_description(raw: str) -> NormalizedDescription:
+    """
+    Strips HTML and Markdown, collapses whitespace and splits the description into
+    sections by heading: boilerplate sections are left out of `core`, requirement
+    sections are collected into `requirements`.
+    """
+    lines, core, requirements = [], [], []
+    section = None  # None, 'requirements' or 'boilerplate'
+    for line in _strip_markup(raw):
+        heading = _heading(line)
+        if heading is not None:
+            if BOILERPLATE_HEADINGS.search(heading):
+                section = 'boilerplate'
+            elif REQUIREMENT_HEADINGS.search(heading):
+                section = 'requirements'
+            else:
+                section = None
+            line = heading
+        elif line[:1] in _BULLET_STARTS or line[:1].isdigit():
+            line = _BULLET.sub("- ", line)
+        lines.append(line)
+        if section == 'boilerplate' or BOILERPLATE_SENTENCES.search(line):
+            continue
+        core.append(line)
+        if section == 'requirements':
+            requirements.append(line)
+
+    text = "\n".join(lines)
+    core_text = "\n".join(core)
+    return NormalizedDescription(
+        text=text,
+        # A description that is all "boilerplate" was probably misread; keep it whole.
+        core=core_text or text,
+        requirements="\n".join(requirements),
+        language=detect_language(core_text or text),
+    )
+
+
+def description_of(job: Mapping) -> NormalizedDescription:
+    """The job's normalized description, computed once per distinct description text."""
+    raw = job.get('description')
+    if not isinstance(raw, str) or not raw.strip():
+        return EMPTY
+    key = hashlib.md5(raw.encode('utf-8')).hexdigest()
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached is not None:
+            _cache.move_to_end(key)
+            return cached
+
+    normalized = normalize_description(raw)
+    increment('descriptions_normalized', language=normalized.language)
+    with _cache_lock:
+        _cache[key] = normalized
+        while len(_cache) > DESCRIPTION_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return normalized
+
+
+def clear_cache():
+    """Forgets every normalized description, e.g. so benchmarks start cold."""
+    with _cache_lock:
+        _cache.clear()
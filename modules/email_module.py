@@ -1,29 +1,21 @@
 import os
+import base64
 import smtplib
-from email.mime.multipart import MIMEMultipart
+from email import policy
+from email.header import Header
 from email.mime.text import MIMEText
-from email.mime.application import MIMEApplication
-from config import DELIVERY_METHOD
+from email.utils import encode_rfc2231, formatdate, make_msgid
+from config import EMAIL_MAX_MESSAGE_BYTES, EMAIL_SMTP_TIMEOUT_SECONDS
 
-def send_notification(results_list):
-    """
-    Main delivery function. Calls the appropriate method based on config.
-    Handles a list of results to send a single summary notification.
-    """
-    if not results_list:
-        print("No results to deliver.")
-        return
-
-    if DELIVERY_METHOD.lower() == 'email':
-        print(f"📦 Preparing summary email for {len(results_list)} generated resume(s)...")
-        _send_summary_email(results_list)
-    elif DELIVERY_METHOD.lower() == 'none':
-        print(" delivery method is 'none'. Skipping notification.")
-    else:
-        print(f"⚠️ Unknown delivery method specified in config: '{DELIVERY_METHOD}'")
-
-def _create_summary_html_body(results):
-    """Creates a single HTML body summarizing all generated resumes."""
+# 57 raw bytes encode to exactly one 76-character base64 line.
+BASE64_LINE_BYTES = 57
+ATTACHMENT_READ_BYTES = BASE64_LINE_BYTES * 1024
+SOCKET_WRITE_BYTES = 64 * 1024
+# Rough allowance for the MIME headers and boundaries of each attachment.
+ATTACHMENT_OVERHEAD_BYTES = 512
+
+def _create_summary_html_body(results, part_number=1, part_count=1):
+    """Creates a single HTML body summarizing the generated resumes of one email."""
     job_summaries_html = ""
     for result in results:
         job = result['job_details']
@@ -57,54 +49,250 @@ def _create_summary_html_body(results):
         <hr>
         {job_summaries_html}
         <p>The tailored resume PDFs for all positions listed above are attached to this email.</p>
+        {f"<p><small>This is email {part_number} of {part_count}; the remaining resumes arrive separately.</small></p>" if part_count > 1 else ""}
         <p><small>Generated by my very own AI Job scraper!</small></p>
       </body>
     </html>
     """
 
-def _send_summary_email(results):
-    smtp_server = os.getenv("EMAIL_SMTP_HOST")
-    smtp_port = os.getenv("EMAIL_SMTP_PORT")
-    sender_addr = os.getenv("EMAIL_SENDER_ADDRESS")
-    sender_pass = os.getenv("EMAIL_SENDER_PASSWORD")
-    recipient_addr = os.getenv("EMAIL_TO")
-
-    if not all([smtp_server, smtp_port, sender_addr, sender_pass, recipient_addr]):
-        print("❌ Email configuration is incomplete in your .env file. Cannot send email.")
-        return
-
-    assert smtp_server is not None
-    assert smtp_port is not None
-    assert sender_addr is not None
-    assert sender_pass is not None
-    assert recipient_addr is not None
-
-    msg = MIMEMultipart()
-    msg['Subject'] = f"Job Assistant Summary: {len(results)} New Resume(s) Generated"
-    msg['From'] = sender_addr
-    msg['To'] = recipient_addr
+def _encoded_attachment_size(pdf_path: str) -> int:
+    """Size of a PDF once base64-encoded into 76-character CRLF lines, plus MIME overhead."""
+    raw_size = os.path.getsize(pdf_path)
+    encoded = (raw_size + 2) // 3 * 4
+    return encoded + (encoded // 76 + 1) * 2 + ATTACHMENT_OVERHEAD_BYTES
 
-    msg.attach(MIMEText(_create_summary_html_body(results), 'html'))
 
+def plan_message_parts(results, max_bytes=EMAIL_MAX_MESSAGE_BYTES):
+    """
+    Groups results into emails whose encoded attachments stay within `max_bytes`,
+    keeping the ranking order. Results whose PDF is missing are left out; a single
+    PDF over the budget is sent on its own.
+    Returns a list of (results, attachment_paths) tuples.
+    """
+    parts = []
+    current_results, current_paths, current_size = [], [], 0
     for result in results:
-        pdf_path = result['pdf_path']
-        try:
-            with open(pdf_path, "rb") as f:
-                attach = MIMEApplication(f.read(), _subtype="pdf")
-            attach.add_header('Content-Disposition', 'attachment',
-                              filename=os.path.basename(pdf_path))
-            msg.attach(attach)
-            print(f"  -> Attaching {os.path.basename(pdf_path)}...")
-        except FileNotFoundError:
+        pdf_path = result.get('pdf_path')
+        if not pdf_path or not os.path.exists(pdf_path):
             print(
                 f"❌ Error: Could not find PDF file at '{pdf_path}' to attach. Skipping attachment.")
             continue
+        size = _encoded_attachment_size(pdf_path)
+        if size > max_bytes:
+            print(f"⚠️ '{os.path.basename(pdf_path)}' alone exceeds the email size budget; sending it separately.")
+        if current_results and current_size + size > max_bytes:
+            parts.append((current_results, current_paths))
+            current_results, current_paths, current_size = [], [], 0
+        current_results.append(result)
+        current_paths.append(pdf_path)
+        current_size += size
+    if current_results:
+        parts.append((current_results, current_paths))
+    return parts
+
+
+def _stream_base64_file(path: str):
+    """Yields a file as base64 lines without loading it into memory."""
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(ATTACHMENT_READ_BYTES)
+            if not chunk:
+                break
+            encoded = base64.b64encode(chunk)
+            for offset in range(0, len(encoded), 76):
+                yield encoded[offset:offset + 76] + b"\r\n"
+
+
+def _filename_param(filename: str) -> str:
+    """The Content-Disposition filename parameter, RFC 2231-encoded unless plain ASCII."""
+    if filename.isascii() and not any(char in filename for char in '"\\\r\n'):
+        return f'filename="{filename}"'
+    return f"filename*={encode_rfc2231(filename, 'utf-8')}"
+
+
+def _subject_value(subject: str) -> str:
+    """The Subject header value, RFC 2047-encoded when needed and folded with CRLF like the rest of the stream."""
+    return Header(subject, 'utf-8' if not subject.isascii() else 'us-ascii',
+                  header_name='Subject').encode(linesep='\r\n')
+
+
+def _message_lines(sender_addr, recipient_addr, subject, html_body, attachment_paths):
+    """Yields the raw lines of a multipart/mixed message, attachments streamed from disk."""
+    boundary = f"=={make_msgid(domain='jobassist')[1:-1]}=="
+    headers = [
+        f"From: {sender_addr}",
+        f"To: {recipient_addr}",
+        f"Subject: {_subject_value(subject)}",
+        f"Date: {formatdate(localtime=True)}",
+        f"Message-ID: {make_msgid()}",
+        "MIME-Version: 1.0",
+        f'Content-Type: multipart/mixed; boundary="{boundary}"',
+        "",
+    ]
+    for header in headers:
+        yield header.encode('utf-8') + b"\r\n"
+
+    html_part = MIMEText(html_body, 'html', 'utf-8')
+    yield f"--{boundary}\r\n".encode()
+    yield html_part.as_bytes(policy=policy.SMTP)
+    yield b"\r\n"
+
+    for pdf_path in attachment_paths:
+        filename = os.path.basename(pdf_path)
+        print(f"  -> Attaching {filename}...")
+        yield f"--{boundary}\r\n".encode()
+        yield b"Content-Type: application/pdf\r\n"
+        yield b"Content-Transfer-Encoding: base64\r\n"
+        yield f"Content-Disposition: attachment; {_filename_param(filename)}\r\n\r\n".encode('ascii')
+        yield from _stream_base64_file(pdf_path)
+    yield f"--{boundary}--\r\n".encode()
+
+
+def _dot_stuffed(chunks):
+    """Applies SMTP dot-stuffing to a stream of CRLF-terminated byte lines."""
+    for chunk in chunks:
+        lines = chunk.split(b"\r\n")
+        for i, line in enumerate(lines):
+            if line.startswith(b"."):
+                lines[i] = b"." + line
+        yield b"\r\n".join(lines)
+
+
+def _stream_message(server, sender_addr, recipient_addr, lines):
+    """
+    Sends one message through the DATA command, writing the body in buffered
+    chunks instead of handing smtplib a fully rendered message.
+    """
+    server.ehlo_or_helo_if_needed()
+    code, response = server.mail(sender_addr)
+    if code != 250:
+        raise smtplib.SMTPSenderRefused(code, response, sender_addr)
+    code, response = server.rcpt(recipient_addr)
+    if code not in (250, 251):
+        raise smtplib.SMTPRecipientsRefused({recipient_addr: (code, response)})
+    server.putcmd("data")
+    code, response = server.getreply()
+    if code != 354:
+        raise smtplib.SMTPDataError(code, response)
+
+    buffer = bytearray()
+    for chunk in _dot_stuffed(lines):
+        buffer += chunk
+        if len(buffer) >= SOCKET_WRITE_BYTES:
+            server.send(bytes(buffer))
+            buffer.clear()
+    if not buffer.endswith(b"\r\n"):
+        buffer += b"\r\n"
+    buffer += b".\r\n"
+    server.send(bytes(buffer))
+
+    code, response = server.getreply()
+    if code != 250:
+        raise smtplib.SMTPDataError(code, response)
+
+
+def is_transient_error(error: Exception) -> bool:
+    """4xx replies, dropped connections and socket errors are worth retrying."""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(400 <= code < 500 for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    return isinstance(error, (smtplib.SMTPServerDisconnected, OSError))
+
+
+def get_smtp_settings(require_recipient: bool = True):
+    """
+    Reads the SMTP settings from the environment; returns None when incomplete.
+    The recipient may be left out when every message names its own.
+    """
+    settings = {
+        'host': os.getenv("EMAIL_SMTP_HOST"),
+        'port': os.getenv("EMAIL_SMTP_PORT"),
+        'sender_addr': os.getenv("EMAIL_SENDER_ADDRESS"),
+        'sender_pass': os.getenv("EMAIL_SENDER_PASSWORD"),
+        'recipient_addr': os.getenv("EMAIL_TO"),
+        'use_ssl': os.getenv("EMAIL_SMTP_USE_SSL", "true").lower() != "false",
+    }
+    required = ['host', 'port', 'sender_addr']
+    if require_recipient:
+        required.append('recipient_addr')
+    if settings['use_ssl']:
+        required.append('sender_pass')
+    if not all(settings[key] for key in required):
+        return None
+    settings['port'] = int(settings['port'])
+    return settings
+
+
+def render_summary_messages(results, recipient_addr=None, candidate_name=None):
+    """
+    Splits results into size-budgeted emails and renders everything but the
+    attachments. Returns a list of dicts with subject, html_body, attachment_paths
+    and recipient_addr (None means the EMAIL_TO default).
+    """
+    parts = plan_message_parts(results)
+    messages = []
+    for part_number, (part_results, attachment_paths) in enumerate(parts, start=1):
+        subject = f"Job Assistant Summary: {len(results)} New Resume(s) Generated"
+        if candidate_name:
+            subject += f" for {candidate_name}"
+        if len(parts) > 1:
+            subject += f" (part {part_number}/{len(parts)})"
+        messages.append({
+            'subject': subject,
+            'html_body': _create_summary_html_body(part_results, part_number, len(parts)),
+            'attachment_paths': attachment_paths,
+            'recipient_addr': recipient_addr,
+        })
+    return messages
+
+
+class SmtpSession:
+    """Lazily (re)connects and logs in once; reused for every message of a delivery."""
+
+    def __init__(self, settings, timeout=EMAIL_SMTP_TIMEOUT_SECONDS):
+        self.settings = settings
+        self.timeout = timeout
+        self.server = None
+
+    def get(self):
+        if self.server is None:
+            host, port = self.settings['host'], self.settings['port']
+            print(f"  -> Connecting to SMTP server at {host}:{port}...")
+            smtp_class = smtplib.SMTP_SSL if self.settings['use_ssl'] else smtplib.SMTP
+            server = smtp_class(host, port, timeout=self.timeout)
+            if self.settings['sender_pass']:
+                server.login(self.settings['sender_addr'], self.settings['sender_pass'])
+            self.server = server
+        return self.server
+
+    def send(self, message):
+        """Streams one rendered message; drops the connection if anything goes wrong."""
+        sender_addr = self.settings['sender_addr']
+        recipient_addr = message.get('recipient_addr') or self.settings['recipient_addr']
+        try:
+            if not recipient_addr:
+                raise ValueError("No recipient address for this email (set EMAIL_TO).")
+            lines = _message_lines(sender_addr, recipient_addr, message['subject'],
+                                   message['html_body'], message['attachment_paths'])
+            _stream_message(self.get(), sender_addr, recipient_addr, lines)
+        except Exception:
+            self.reset()
+            raise
+
+    def reset(self):
+        """Drops the connection after a failure so the next attempt starts clean."""
+        if self.server is not None:
+            try:
+                self.server.close()
+            except Exception:
+                pass
+            self.server = None
 
-    try:
-        print(f"  -> Connecting to SMTP server at {smtp_server}:{smtp_port}...")
-        with smtplib.SMTP_SSL(smtp_server, int(smtp_port)) as server:
-            server.login(sender_addr, sender_pass)
-            server.send_message(msg)
-            print("✅ Summary email sent successfully!")
-    except Exception as e:
-        print(f"❌ Failed to send summary email: {e}")
+    def close(self):
+        if self.server is not None:
+            try:
+                self.server.quit()
+            except Exception:
+                pass
+            self.server = None
@@ -1,30 +1,156 @@
 import os
 import json
 import time
+from datetime import datetime
 from google import genai
 from google.genai import types
 from prompts import get_resume_parsing_prompt, get_ranking_prompt, get_resume_content_prompt, get_experience_classification_prompt, get_condensing_prompt
 from models.gemini_output_models import RankingResponse, ExperienceResponse, ResumeContentResponse
 from dotenv import load_dotenv
-from config import MODEL_NAME, CLASSIFICATION_MODEL_NAME
+from config import (
+    MODEL_NAME, CLASSIFICATION_MODEL_NAME, USER_MESSAGE, GEMINI_BATCH_MODE, GEMINI_BATCH_POLL_SECONDS,
+    GEMINI_BATCH_TIMEOUT_SECONDS, GEMINI_BATCH_DIR
+)
+from modules.telemetry import span, increment
+from modules import gemini_usage
+from modules.descriptions import description_of
 
 load_dotenv()
 
+CHARS_PER_TOKEN = 4
+BATCH_DONE_STATES = ('JOB_STATE_SUCCEEDED', 'JOB_STATE_FAILED', 'JOB_STATE_CANCELLED', 'JOB_STATE_EXPIRED')
+
+
+def create_client(base_url=None):
+    """A Gemini client; `base_url` (default: GEMINI_BASE_URL from .env) redirects it, e.g. to a stub server."""
+    base_url = base_url or os.getenv('GEMINI_BASE_URL')
+    http_options = types.HttpOptions(base_url=base_url) if base_url else None
+    return genai.Client(api_key=os.getenv('GEMINI_API_KEY'), http_options=http_options)
+
+
 try:
-    client = genai.Client(api_key=os.getenv('GEMINI_API_KEY'))
+    client = create_client()
 except Exception as e:
     print(
         f"❌ Failed to initialize Gemini client. Ensure GEMINI_API_KEY is set. Error: {e}")
     client = None
 
 
-def _call_gemini(prompt, response_schema=None, model_override=None):
-    """Helper function to call the Gemini API, now with schema support."""
+def _record_usage(response, model, stage, seconds, retries, batch=False):
+    usage = getattr(response, 'usage_metadata', None)
+    counts = {}
+    for field, token_type in (('prompt_token_count', 'prompt'),
+                              ('cached_content_token_count', 'cached'),
+                              ('candidates_token_count', 'output'),
+                              ('thoughts_token_count', 'thoughts')):
+        count = getattr(usage, field, None) or 0
+        counts[token_type] = count
+        if count:
+            increment('gemini_tokens', count, model=model,
+                      stage=stage, type=token_type)
+    # Thinking tokens are billed as output.
+    gemini_usage.record_call(model, stage, counts['prompt'], counts['cached'],
+                             counts['output'] + counts['thoughts'], seconds, retries, batch)
+
+
+def _batch_entry(key, prompt, response_schema=None):
+    """One line of a batch input file: a GenerateContentRequest in REST (camelCase) form."""
+    request = {"contents": [{"role": "user", "parts": [{"text": prompt}]}]}
+    if response_schema:
+        request["generationConfig"] = {
+            "responseMimeType": "application/json",
+            "responseJsonSchema": response_schema.model_json_schema(),
+        }
+    return {"key": key, "request": request}
+
+
+def _wait_for_batch(name):
+    deadline = time.monotonic() + GEMINI_BATCH_TIMEOUT_SECONDS
+    while True:
+        batch_job = client.batches.get(name=name)
+        if batch_job.state and batch_job.state.name in BATCH_DONE_STATES:
+            return batch_job
+        if time.monotonic() >= deadline:
+            print(f"⚠️ Gemini batch '{name}' is still {batch_job.state.name} after "
+                  f"{GEMINI_BATCH_TIMEOUT_SECONDS}s. Cancelling it.")
+            client.batches.cancel(name=name)
+            return batch_job
+        time.sleep(GEMINI_BATCH_POLL_SECONDS)
+
+
+def run_batch(requests, stage, model_override=None):
+    """
+    Submits (key, prompt, response_schema) requests as one Gemini batch job via a JSONL
+    file, waits for it, and returns {key: response text}. Keys whose request failed
+    are missing, as is everything if the batch itself fails, so callers can fall back
+    to regular calls.
+    """
+    if not client or not requests:
+        return {}
+    model = model_override if model_override else MODEL_NAME
+    os.makedirs(GEMINI_BATCH_DIR, exist_ok=True)
+    display_name = f"{stage}-{datetime.now():%Y%m%d-%H%M%S}"
+    input_path = os.path.join(GEMINI_BATCH_DIR, f"{display_name}.jsonl")
+    with open(input_path, 'w', encoding='utf-8') as f:
+        for key, prompt, response_schema in requests:
+            f.write(json.dumps(_batch_entry(key, prompt, response_schema)) + "\n")
+
+    increment('gemini_batches', model=model, stage=stage)
+    try:
+        with span('gemini_batch', model=model, stage=stage):
+            uploaded = client.files.upload(file=input_path, config=types.UploadFileConfig(
+                display_name=display_name, mime_type='jsonl'))
+            batch_job = client.batches.create(model=model, src=uploaded.name,
+                                              config={'display_name': display_name})
+            print(f"📦 Submitted {len(requests)} {stage} request(s) as Gemini batch '{batch_job.name}'. "
+                  f"Polling every {GEMINI_BATCH_POLL_SECONDS}s...")
+            batch_job = _wait_for_batch(batch_job.name)
+            if batch_job.state.name != 'JOB_STATE_SUCCEEDED':
+                raise RuntimeError(f"batch ended as {batch_job.state.name}")
+            output = client.files.download(file=batch_job.dest.file_name)
+    except Exception as e:
+        increment('gemini_errors', model=model, stage=stage)
+        print(f"❌ Gemini batch for {stage} failed: {e}")
+        return {}
+
+    results = {}
+    for line in output.decode('utf-8').splitlines():
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+            if not record.get('response'):
+                increment('gemini_errors', model=model, stage=stage)
+                print(f"⚠️ Batch request '{record.get('key')}' failed: {record.get('error')}")
+                continue
+            response = types.GenerateContentResponse.model_validate(record['response'])
+        except (ValueError, AttributeError) as e:
+            # One unreadable line only loses its own request; it falls back to a regular call.
+            increment('gemini_errors', model=model, stage=stage)
+            print(f"⚠️ Skipping an unreadable line in the {stage} batch output: {e}")
+            continue
+        increment('gemini_calls', model=model, stage=stage)
+        _record_usage(response, model, stage, 0.0, 0, batch=True)
+        if response.text:
+            results[record['key']] = response.text
+    print(f"✅ Gemini batch answered {len(results)} of {len(requests)} {stage} request(s).")
+    return results
+
+
+def _call_gemini(prompt, response_schema=None, model_override=None, stage="other", batch=False):
+    """Helper function to call the Gemini API, now with schema support. `batch` submits it as a batch job."""
     if not client:
         print("❌ Gemini client not initialized.")
         return None
 
+    model = model_override if model_override else MODEL_NAME
+    if batch:
+        text = run_batch([(stage, prompt, response_schema)], stage, model_override).get(stage)
+        if text:
+            return text
+        print(f"↩️ Falling back to a regular Gemini call for {stage}.")
     max_retries = 2
+    started = time.perf_counter()
     for attempt in range(max_retries + 1):
         try:
             config = types.GenerateContentConfig()
@@ -32,19 +158,25 @@ def _call_gemini(prompt, response_schema=None, model_override=None):
                 config.response_mime_type = 'application/json'
                 config.response_schema = response_schema
 
-            response = client.models.generate_content(
-                model=model_override if model_override else MODEL_NAME,
-                contents=prompt,
-                config=config
-            )
+            increment('gemini_calls', model=model, stage=stage)
+            with span('gemini_call', model=model, stage=stage):
+                response = client.models.generate_content(
+                    model=model,
+                    contents=prompt,
+                    config=config
+                )
+            _record_usage(response, model, stage, time.perf_counter() - started, attempt)
             return response.text
         except Exception as e:
             error_str = str(e)
             if "503" in error_str and "UNAVAILABLE" in error_str and "overloaded" in error_str:
                 if attempt < max_retries:
+                    increment('gemini_retries', model=model, stage=stage)
                     print(f"Retrying in 10 seconds due to overload...")
                     time.sleep(10)
                     continue
+            increment('gemini_errors', model=model, stage=stage)
+            gemini_usage.record_call(model, stage, seconds=time.perf_counter() - started, retries=attempt)
             print(f"❌ Error communicating with Gemini: {e}")
             return None
 
@@ -52,26 +184,41 @@ def _call_gemini(prompt, response_schema=None, model_override=None):
 def parse_resume(latex_source):
     print("🧠 Calling Gemini to parse resume for better matching...")
     prompt = get_resume_parsing_prompt(latex_source)
-    parsed_text = _call_gemini(prompt)
+    parsed_text = _call_gemini(prompt, stage='parse_resume')
     if parsed_text:
         print("✅ Resume parsed successfully.")
         return parsed_text.strip()
     return None
 
 
-def get_job_rankings(jobs_list, resume_summary):
-    print("✨ Calling Gemini for job ranking...")
-
+def build_ranking_prompt(jobs_list, resume_summary, user_message=USER_MESSAGE, anchors=None,
+                         score_every_job=False):
     jobs_for_prompt = [
         {"id": job['id'], "title": job['title'], "company": job.get(
-            'company', 'N/A'), "url": job.get('job_url', ''), "description": job.get('description', '')[:2000]}
+            'company', 'N/A'), "url": job.get('job_url', ''), "description": description_of(job).core[:2000]}
         for job in jobs_list
     ]
     job_postings_json = json.dumps({"jobs": jobs_for_prompt}, indent=2)
+    anchors_json = json.dumps([
+        {"title": anchor.get('title'), "company": anchor.get('company'), "score": anchor.get('score'),
+         "match_reason": anchor.get('match_reason')}
+        for anchor in anchors], indent=2) if anchors else None
+    return get_ranking_prompt(resume_summary, job_postings_json, user_message,
+                              anchors_json, score_every_job)
 
-    prompt = get_ranking_prompt(resume_summary, job_postings_json)
 
-    response_text = _call_gemini(prompt, response_schema=RankingResponse)
+def get_job_rankings(jobs_list, resume_summary, user_message=USER_MESSAGE, anchors=None,
+                     score_every_job=False):
+    """
+    Asks Gemini to rank `jobs_list`. `anchors` are previously scored ranked-job dicts
+    shown as reference points, so scores from separate calls share one scale.
+    """
+    print("✨ Calling Gemini for job ranking...")
+
+    prompt = build_ranking_prompt(jobs_list, resume_summary, user_message, anchors, score_every_job)
+
+    response_text = _call_gemini(
+        prompt, response_schema=RankingResponse, stage='ranking', batch=GEMINI_BATCH_MODE)
 
     if not response_text:
         return None
@@ -87,17 +234,41 @@ def get_job_rankings(jobs_list, resume_summary):
         return None
 
 
-def generate_resume_content(latex_source, job):
-    print(
-        f"📝 Calling Gemini to tailor content for '{job.get('title')}' at '{job.get('company')}'...")
-    prompt = get_resume_content_prompt(
+def estimate_tokens(text):
+    """A rough prompt size before sending it; English text averages about four characters a token."""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def build_tailoring_prompt(latex_source, job):
+    return get_resume_content_prompt(
         latex_source,
         job.get('title', 'N/A'),
         job.get('company', 'N/A'),
-        job.get('description', '')[:5000]
+        description_of(job).core[:5000]
     )
 
-    response_text = _call_gemini(prompt, response_schema=ResumeContentResponse)
+
+def generate_resume_contents(latex_source, jobs):
+    """Tailors content for many jobs in one batch job; returns {job id: content} for those that succeeded."""
+    print(f"📝 Batching tailoring requests for {len(jobs)} job(s)...")
+    responses = run_batch([(str(job['id']), build_tailoring_prompt(latex_source, job), ResumeContentResponse)
+                           for job in jobs], 'tailoring')
+    contents = {}
+    for job_id, response_text in responses.items():
+        try:
+            contents[job_id] = json.loads(response_text)
+        except json.JSONDecodeError as exc:
+            print(f"❌ Failed to parse batched tailoring JSON for job {job_id}: {exc}")
+    return contents
+
+
+def generate_resume_content(latex_source, job):
+    print(
+        f"📝 Calling Gemini to tailor content for '{job.get('title')}' at '{job.get('company')}'...")
+    prompt = build_tailoring_prompt(latex_source, job)
+
+    response_text = _call_gemini(
+        prompt, response_schema=ResumeContentResponse, stage='tailoring')
     if not response_text:
         return None
 
@@ -113,7 +284,7 @@ def generate_resume_content(latex_source, job):
 
 def condense_latex_resume(latex_source):
     prompt = get_condensing_prompt(latex_source)
-    condensed_latex = _call_gemini(prompt)
+    condensed_latex = _call_gemini(prompt, stage='condense')
     if condensed_latex:
         print("✅ Received condensed LaTeX source from Gemini.")
         return condensed_latex.strip().replace('```latex', '').replace('```', '')
@@ -123,12 +294,13 @@ def condense_latex_resume(latex_source):
 def classify_experience_level(job):
     print(f"🧠 Classifying experience for '{job.get('title', 'N/A')}'...")
 
-    description_snippet = job.get('description', '')
+    description_snippet = description_of(job).core
     prompt = get_experience_classification_prompt(
         job.get('title', ''), description_snippet)
 
     response_text = _call_gemini(
-        prompt, response_schema=ExperienceResponse, model_override=CLASSIFICATION_MODEL_NAME)
+        prompt, response_schema=ExperienceResponse, model_override=CLASSIFICATION_MODEL_NAME,
+        stage='classification')
 
     if not response_text:
         return None
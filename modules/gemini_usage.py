@@ -0,0 +1,111 @@
+import threading
+from typing import Dict, Optional
+
+from config import GEMINI_TOKEN_BUDGET, GEMINI_COST_BUDGET_USD, GEMINI_PRICING_USD_PER_MILLION
+from modules.telemetry import DEBUG, log, increment
+
+# Batch jobs are billed at half the interactive price
+BATCH_PRICE_FACTOR = 0.5
+USAGE_FIELDS = ('calls', 'prompt_tokens', 'cached_tokens', 'output_tokens', 'retries', 'seconds', 'cost_usd')
+
+_lock = threading.Lock()
+_stages: Dict[str, Dict[str, float]] = {}
+
+
+def cost_usd(model: str, prompt_tokens: int, cached_tokens: int, output_tokens: int,
+             batch: bool = False) -> float:
+    """Estimated cost of one call; cached prompt tokens are billed at the cached rate."""
+    prices = GEMINI_PRICING_USD_PER_MILLION.get(model)
+    if not prices:
+        return 0.0
+    uncached = max(0, prompt_tokens - cached_tokens)
+    cost = (uncached * prices['input'] + cached_tokens * prices['cached']
+            + output_tokens * prices['output']) / 1_000_000
+    return cost * BATCH_PRICE_FACTOR if batch else cost
+
+
+def start_run():
+    """Clears the per-run ledger; budgets apply to each run on its own."""
+    with _lock:
+        _stages.clear()
+
+
+def record_call(model: str, stage: str, prompt_tokens: int = 0, cached_tokens: int = 0,
+                output_tokens: int = 0, seconds: float = 0.0, retries: int = 0, batch: bool = False):
+    cost = cost_usd(model, prompt_tokens, cached_tokens, output_tokens, batch)
+    with _lock:
+        entry = _stages.setdefault(stage, dict.fromkeys(USAGE_FIELDS, 0))
+        entry['calls'] += 1
+        entry['prompt_tokens'] += prompt_tokens
+        entry['cached_tokens'] += cached_tokens
+        entry['output_tokens'] += output_tokens
+        entry['retries'] += retries
+        entry['seconds'] += seconds
+        entry['cost_usd'] += cost
+    if cost:
+        increment('gemini_cost_usd', cost, model=model, stage=stage)
+    log(DEBUG, "   🔢 %s/%s: %s prompt (%s cached) + %s output tokens, %.1fs, %s retries, $%.4f",
+        model, stage, prompt_tokens, cached_tokens, output_tokens, seconds, retries, cost)
+
+
+def run_totals() -> Dict[str, float]:
+    with _lock:
+        totals = dict.fromkeys(USAGE_FIELDS, 0)
+        for entry in _stages.values():
+            for field in USAGE_FIELDS:
+                totals[field] += entry[field]
+    return totals
+
+
+def stage_totals() -> Dict[str, Dict[str, float]]:
+    with _lock:
+        return {stage: dict(entry) for stage, entry in _stages.items()}
+
+
+def budget_exceeded() -> Optional[str]:
+    """Why this run's Gemini budget is spent (GEMINI_TOKEN_BUDGET / GEMINI_COST_BUDGET_USD), or None."""
+    totals = run_totals()
+    tokens = totals['prompt_tokens'] + totals['output_tokens']
+    if GEMINI_TOKEN_BUDGET is not None and tokens >= GEMINI_TOKEN_BUDGET:
+        return f"{tokens:,} of {GEMINI_TOKEN_BUDGET:,} tokens used"
+    if GEMINI_COST_BUDGET_USD is not None and totals['cost_usd'] >= GEMINI_COST_BUDGET_USD:
+        return f"${totals['cost_usd']:.2f} of ${GEMINI_COST_BUDGET_USD:.2f} spent"
+    return None
+
+
+def affordable_calls(model: str, stage: str, prompt_tokens: int, output_tokens: int,
+                     batch: bool = False) -> Optional[int]:
+    """
+    How many more calls of about this size fit in what's left of the run's budgets
+    (None = unlimited). The stage's average call this run, if it has one, replaces
+    the given estimate.
+    """
+    if GEMINI_TOKEN_BUDGET is None and GEMINI_COST_BUDGET_USD is None:
+        return None
+    entry = stage_totals().get(stage)
+    if entry and entry['calls']:
+        prompt_tokens = entry['prompt_tokens'] / entry['calls']
+        output_tokens = entry['output_tokens'] / entry['calls']
+    totals = run_totals()
+    limits = []
+    if GEMINI_TOKEN_BUDGET is not None:
+        remaining = GEMINI_TOKEN_BUDGET - totals['prompt_tokens'] - totals['output_tokens']
+        limits.append(remaining / max(1, prompt_tokens + output_tokens))
+    if GEMINI_COST_BUDGET_USD is not None:
+        per_call = cost_usd(model, int(prompt_tokens), 0, int(output_tokens), batch)
+        if per_call > 0:
+            limits.append((GEMINI_COST_BUDGET_USD - totals['cost_usd']) / per_call)
+    return max(0, int(min(limits))) if limits else None
+
+
+def print_summary():
+    stages = stage_totals()
+    if not stages:
+        return
+    print("\n--- Gemini Usage ---")
+    for stage, entry in sorted(stages.items(), key=lambda item: item[1]['cost_usd'], reverse=True):
+        print(f"   🔢 {stage}: {entry['calls']} call(s), {entry['prompt_tokens']:,} prompt "
+              f"({entry['cached_tokens']:,} cached) + {entry['output_tokens']:,} output tokens, "
+              f"{entry['seconds']:.1f}s, {entry['retries']} retries, ~${entry['cost_usd']:.4f}")
+    totals = run_totals()
+    print(f"   Σ {totals['prompt_tokens'] + totals['output_tokens']:,} tokens, ~${totals['cost_usd']:.4f} this run.")
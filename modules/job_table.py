@@ -0,0 +1,130 @@
+from collections.abc import Mapping, MutableMapping
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import pandas as pd
+
+# Marks a field deleted from a view without touching the shared table
+_DELETED = object()
+
+
+def _shared_values(values: list) -> list:
+    """Replaces missing values with None and lets equal strings share one object."""
+    strings = {}
+    shared = []
+    for value in values:
+        if isinstance(value, str):
+            value = strings.setdefault(value, value)
+        elif value is not None and not isinstance(value, (list, tuple, dict)) and pd.isna(value):
+            value = None
+        shared.append(value)
+    return shared
+
+
+class JobTable:
+    """
+    Column-oriented storage for a scrape: one list per JobSpy field, indexed by row.
+    Descriptions and repeated strings (companies, locations, sites) are held once,
+    and stages pass around JobViews, which cost a few dozen bytes each, instead of
+    one dict of every field per job.
+    """
+
+    def __init__(self, columns: Dict[str, list]):
+        self.columns = columns
+        self._length = len(next(iter(columns.values()))) if columns else 0
+
+    def __len__(self) -> int:
+        return self._length
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame) -> 'JobTable':
+        return cls({str(column): _shared_values(frame[column].astype(object).tolist())
+                    for column in frame.columns})
+
+    @classmethod
+    def from_records(cls, records: Iterable[Mapping]) -> 'JobTable':
+        records = list(records)
+        names = {}
+        for record in records:
+            names.update(dict.fromkeys(record))
+        return cls({name: _shared_values([record.get(name) for record in records]) for name in names})
+
+    def view(self, row: int) -> 'JobView':
+        return JobView(self, row)
+
+    def views(self, rows: Optional[Iterable[int]] = None) -> List['JobView']:
+        return [JobView(self, row) for row in (range(self._length) if rows is None else rows)]
+
+
+class JobView(MutableMapping):
+    """
+    One job of a JobTable, read like the dict it replaces. Assigned fields
+    (descriptions fetched later, match reasons, scores) live on the view, so
+    several candidates can annotate the same scraped job independently.
+    """
+    __slots__ = ('table', 'row', '_fields')
+
+    def __init__(self, table: JobTable, row: int, fields: Optional[dict] = None):
+        self.table = table
+        self.row = row
+        self._fields = fields
+
+    def __getitem__(self, key: str):
+        if self._fields is not None and key in self._fields:
+            value = self._fields[key]
+            if value is _DELETED:
+                raise KeyError(key)
+            return value
+        return self.table.columns[key][self.row]
+
+    def get(self, key: str, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __setitem__(self, key: str, value):
+        if self._fields is None:
+            self._fields = {}
+        self._fields[key] = value
+
+    def __delitem__(self, key: str):
+        self[key]  # raises KeyError for unknown fields, like dict
+        self[key] = _DELETED
+
+    def __iter__(self) -> Iterator[str]:
+        fields = self._fields or {}
+        for key in self.table.columns:
+            if fields.get(key) is not _DELETED:
+                yield key
+        for key, value in fields.items():
+            if key not in self.table.columns and value is not _DELETED:
+                yield key
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __contains__(self, key) -> bool:
+        if self._fields is not None and key in self._fields:
+            return self._fields[key] is not _DELETED
+        return key in self.table.columns
+
+    def __repr__(self) -> str:
+        return f"JobView({self.to_dict()!r})"
+
+    def __reduce__(self):
+        # Pickle (and copy.copy) as a plain dict rather than dragging the whole table along.
+        return dict, (self.to_dict(),)
+
+    def to_dict(self) -> dict:
+        return {key: self[key] for key in self}
+
+    def with_fields(self, **fields) -> 'JobView':
+        """A new view of the same row with its own copy of the assigned fields, plus `fields`."""
+        return JobView(self.table, self.row, {**(self._fields or {}), **fields})
+
+
+def with_fields(job: Mapping, **fields) -> Mapping:
+    """Copies a job (a JobView or a dict restored from a checkpoint) with extra fields."""
+    if isinstance(job, JobView):
+        return job.with_fields(**fields)
+    return {**job, **fields}
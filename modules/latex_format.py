@@ -0,0 +1,78 @@
+import os
+import hashlib
+import subprocess
+import threading
+from typing import Optional, Tuple
+
+from config import LATEX_FORMAT_DIR
+from modules.telemetry import span, increment
+
+DOCUMENT_START = r"\begin{document}"
+
+_build_lock = threading.Lock()
+
+
+def split_preamble(latex_source: str) -> Optional[Tuple[str, str]]:
+    """Splits a document into (preamble, body); the body starts at \\begin{document}."""
+    index = latex_source.find(DOCUMENT_START)
+    if index == -1:
+        return None
+    return latex_source[:index], latex_source[index:]
+
+
+def _format_name(preamble: str) -> str:
+    return f"preamble_{hashlib.md5(preamble.encode('utf-8')).hexdigest()[:12]}"
+
+
+def _format_base_path(preamble: str) -> str:
+    return os.path.abspath(os.path.join(LATEX_FORMAT_DIR, _format_name(preamble)))
+
+
+def build_format(latex_source: str) -> Optional[str]:
+    """
+    Dumps the document's preamble into a pdflatex format file, so later compiles of
+    documents sharing that preamble skip loading the class and packages. Returns
+    the format path (without the .fmt suffix), or None if it could not be built.
+    """
+    parts = split_preamble(latex_source)
+    if parts is None:
+        return None
+    preamble = parts[0]
+    base_path = _format_base_path(preamble)
+
+    with _build_lock:
+        if os.path.exists(f"{base_path}.fmt"):
+            return base_path
+        os.makedirs(LATEX_FORMAT_DIR, exist_ok=True)
+        name = os.path.basename(base_path)
+        preamble_path = os.path.join(LATEX_FORMAT_DIR, f"{name}.tex")
+        with open(preamble_path, 'w', encoding='utf-8') as f:
+            f.write(preamble)
+            f.write("\n\\dump\n")
+        try:
+            with span('latex_format_build'):
+                subprocess.run(
+                    ['pdflatex', '-ini', '-interaction=nonstopmode', '-halt-on-error',
+                     f'-jobname={name}', '-output-directory', LATEX_FORMAT_DIR,
+                     '&pdflatex', preamble_path],
+                    check=True, capture_output=True, text=True, timeout=120)
+        except (FileNotFoundError, subprocess.CalledProcessError, subprocess.TimeoutExpired) as e:
+            increment('latex_format_build_failures')
+            print(f"⚠️ Could not precompile the LaTeX preamble ({e.__class__.__name__}); compiling normally.")
+            return None
+        print(f"✅ Precompiled LaTeX preamble into '{base_path}.fmt'.")
+        return base_path
+
+
+def find_format(latex_source: str) -> Tuple[Optional[str], str]:
+    """
+    Returns (format path, body) when a precompiled format matches the document's
+    preamble, otherwise (None, latex_source).
+    """
+    parts = split_preamble(latex_source)
+    if parts is None:
+        return None, latex_source
+    base_path = _format_base_path(parts[0])
+    if not os.path.exists(f"{base_path}.fmt"):
+        return None, latex_source
+    return base_path, parts[1]
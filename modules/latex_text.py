@@ -0,0 +1,202 @@
+import re
+from typing import Dict, List, Tuple
+
+DOCUMENT_START = r"\begin{document}"
+DOCUMENT_END = r"\end{document}"
+# Marks section titles until _tidy puts a blank line before them
+HEADING_MARK = "\x00"
+
+# Resume template macros with a readable layout; other \newcommand macros with
+# arguments fall back to joining their arguments with " | ".
+RESUME_MACROS = {
+    'resumeSubheading': (4, lambda a: _join_parts(a[0], a[1]) + "\n" + _join_parts(a[2], a[3])),
+    'resumeSubSubheading': (2, lambda a: _join_parts(*a)),
+    'resumeProjectHeading': (2, lambda a: _join_parts(*a)),
+    'resumeItem': (1, lambda a: f"\n- {a[0]}"),
+    'resumeSubItem': (1, lambda a: f"\n- {a[0]}"),
+    'section': (1, lambda a: f"\n{HEADING_MARK}{a[0]}\n"),
+    'subsection': (1, lambda a: f"\n{HEADING_MARK}{a[0]}\n"),
+    'href': (2, lambda a: a[1]),
+    'parbox': (2, lambda a: a[1]),
+}
+# Commands whose arguments are layout, not content
+DROPPED_ARGUMENTS = {
+    'vspace': 1, 'hspace': 1, 'setlength': 2, 'addtolength': 2, 'end': 1, 'label': 1,
+    'color': 1, 'titlerule': 0, 'includegraphics': 1, 'url': 1,
+}
+TABLE_ENVIRONMENTS = {'tabular': 1, 'tabular*': 2, 'tabularx': 2}
+SYMBOLS = {
+    'mid': ' | ', 'textbar': ' | ', 'bullet': '•', 'cdot': '·', 'textbullet': '•',
+    'item': '\n- ', '\\': '\n', 'newline': '\n', 'LaTeX': 'LaTeX', 'TeX': 'TeX',
+    '&': '&', '%': '%', '_': '_', '#': '#', '$': '$', '{': '{', '}': '}', ',': ' ', ' ': ' ',
+}
+_NEWCOMMAND_PATTERN = re.compile(r"\\(?:re)?newcommand\*?\s*\{?\\([A-Za-z]+)\}?\s*(?:\[(\d)\])?")
+
+
+def _join_parts(*parts: str) -> str:
+    return " | ".join(part for part in (p.strip() for p in parts) if part)
+
+
+def _strip_comments(latex: str) -> str:
+    return re.sub(r"(?<!\\)%.*", "", latex)
+
+
+def _custom_macro_arities(preamble: str) -> Dict[str, int]:
+    """Argument counts of the macros the document defines with \\newcommand."""
+    return {name: int(count or 0) for name, count in _NEWCOMMAND_PATTERN.findall(preamble)}
+
+
+class _Converter:
+    """A small recursive-descent reader that keeps text and drops markup."""
+
+    def __init__(self, custom_arities: Dict[str, int]):
+        self.custom_arities = custom_arities
+
+    @staticmethod
+    def _skip_spaces(source: str, pos: int) -> int:
+        while pos < len(source) and source[pos].isspace():
+            pos += 1
+        return pos
+
+    @staticmethod
+    def _read_delimited(source: str, pos: int, opening: str, closing: str) -> Tuple[str, int]:
+        r"""
+        Reads a balanced {...} or [...] group starting at `pos`; returns (content, end).
+        A backslash escapes the character after it, so `\\` is a line break, not an
+        escaped brace:
+
+        >>> _Converter._read_delimited(r"{a\\{b}}", 0, '{', '}')
+        ('a\\\\{b}', 8)
+        >>> _Converter._read_delimited(r"{a\{b}", 0, '{', '}')
+        ('a\\{b', 6)
+        """
+        depth = 0
+        index = pos
+        while index < len(source):
+            char = source[index]
+            if char == '\\':
+                index += 2
+                continue
+            if char == opening:
+                depth += 1
+            elif char == closing:
+                depth -= 1
+                if depth == 0:
+                    return source[pos + 1:index], index + 1
+            index += 1
+        return source[pos + 1:], len(source)
+
+    def _skip_options(self, source: str, pos: int) -> int:
+        while True:
+            next_pos = self._skip_spaces(source, pos)
+            if next_pos < len(source) and source[next_pos] == '[':
+                _, pos = self._read_delimited(source, next_pos, '[', ']')
+            else:
+                return pos
+
+    def _read_arguments(self, source: str, pos: int, count: int) -> Tuple[List[str], int]:
+        arguments = []
+        pos = self._skip_options(source, pos)
+        for _ in range(count):
+            next_pos = self._skip_spaces(source, pos)
+            if next_pos < len(source) and source[next_pos] == '{':
+                content, pos = self._read_delimited(source, next_pos, '{', '}')
+            elif next_pos < len(source) and source[next_pos] == '\\':
+                match = re.match(r"\\([A-Za-z]+|.)", source[next_pos:])
+                content, pos = match.group(0), next_pos + len(match.group(0))
+            elif next_pos < len(source):
+                content, pos = source[next_pos], next_pos + 1
+            else:
+                content = ''
+            arguments.append(content)
+        return arguments, pos
+
+    def convert(self, source: str) -> str:
+        output = []
+        pos = 0
+        while pos < len(source):
+            char = source[pos]
+            if char == '\\':
+                match = re.match(r"\\([A-Za-z]+\*?|.)", source[pos:])
+                name = match.group(1)
+                pos += len(match.group(0))
+                text, pos = self._command(name.rstrip('*'), source, pos)
+                output.append(text)
+            elif char in '{}$':
+                pos += 1
+            elif char == '~':
+                output.append(' ')
+                pos += 1
+            elif char == '&':
+                output.append(' | ')
+                pos += 1
+            else:
+                output.append(char)
+                pos += 1
+        return ''.join(output)
+
+    def _command(self, name: str, source: str, pos: int) -> Tuple[str, int]:
+        if name in SYMBOLS:
+            if name in ('\\', 'item'):
+                pos = self._skip_options(source, pos)
+            return SYMBOLS[name], pos
+        if name in RESUME_MACROS:
+            count, render = RESUME_MACROS[name]
+            arguments, pos = self._read_arguments(source, pos, count)
+            return render([" ".join(self.convert(argument).split()) for argument in arguments]), pos
+        if name == 'begin':
+            (environment,), pos = self._read_arguments(source, pos, 1)
+            # Table column specs (and widths) are layout, not content.
+            _, pos = self._read_arguments(source, pos, TABLE_ENVIRONMENTS.get(environment.strip(), 0))
+            return '\n', self._skip_options(source, pos)
+        if name in DROPPED_ARGUMENTS:
+            _, pos = self._read_arguments(source, pos, DROPPED_ARGUMENTS[name])
+            return '', pos
+        if name in self.custom_arities:
+            arguments, pos = self._read_arguments(source, pos, self.custom_arities[name])
+            return "\n" + _join_parts(*(self.convert(argument) for argument in arguments)), pos
+        # Formatting commands (\textbf, \small, \scshape, ...): keep what they wrap.
+        return '', self._skip_options(source, pos)
+
+
+def _tidy(text: str) -> str:
+    text = text.replace('---', '—').replace('--', '–').replace('``', '"').replace("''", '"')
+    lines = []
+    dangling_bullet = False
+    for line in text.splitlines():
+        line = re.sub(r"[ \t]+", " ", line).strip()
+        line = re.sub(r"(?:\s*\|\s*)+$", "", re.sub(r"^(?:\|\s*)+", "", line))
+        line = re.sub(r"(\s*\|\s*){2,}", " | ", line)
+        if not line:
+            continue
+        if line == '-':
+            dangling_bullet = True
+            continue
+        if dangling_bullet and not line.startswith(('-', HEADING_MARK)):
+            line = f"- {line}"
+        dangling_bullet = False
+        if line.startswith(HEADING_MARK):
+            if lines:
+                lines.append('')
+            line = line.lstrip(HEADING_MARK).strip()
+        lines.append(line)
+    return "\n".join(lines).strip()
+
+
+def extract_resume_text(latex_source: str) -> str:
+    """
+    Converts a LaTeX resume into plain text for matching: sections become headings,
+    list items and the resume template's macros become lines, and layout commands,
+    comments and math delimiters are dropped. Deterministic and dependency-free.
+    """
+    latex_source = _strip_comments(latex_source)
+    start = latex_source.find(DOCUMENT_START)
+    preamble, body = ('', latex_source) if start == -1 else (
+        latex_source[:start], latex_source[start + len(DOCUMENT_START):])
+    end = body.find(DOCUMENT_END)
+    if end != -1:
+        body = body[:end]
+
+    custom_arities = {name: count for name, count in _custom_macro_arities(preamble).items()
+                      if name not in RESUME_MACROS}
+    return _tidy(_Converter(custom_arities).convert(body))
@@ -0,0 +1,141 @@
+import os
+import re
+import json
+import math
+import threading
+from typing import Dict, List, Optional
+
+from config import LAYOUT_CALIBRATION_PATH, LAYOUT_MAX_OBSERVATIONS
+
+# Physical paper widths in inches for the paper sizes we expect in templates.
+PAPER_WIDTHS_IN = {
+    'a4paper': 8.27,
+    'letterpaper': 8.5,
+    'legalpaper': 8.5,
+}
+# Average glyph width of a sans-serif font, as a fraction of the font size.
+AVG_CHAR_EM = 0.5
+# Horizontal space taken by the itemize bullet and its indent.
+ITEMIZE_INDENT_IN = 0.35
+# Lines consumed by a \section heading (title, rule and spacing).
+SECTION_HEADING_LINES = 2
+# Extra lines of headroom granted when we have no calibration data yet.
+DEFAULT_BUDGET_SLACK_LINES = 2
+
+# Compile workers may record results concurrently.
+_calibration_lock = threading.Lock()
+
+_UNIT_TO_IN = {'in': 1.0, 'cm': 1 / 2.54, 'mm': 1 / 25.4, 'pt': 1 / 72.27}
+_LATEX_SYMBOL_PATTERN = re.compile(r'\\text[a-z]+\{\}|\$\\mid\$')
+_LATEX_COMMAND_PATTERN = re.compile(r'\\[a-zA-Z]+\*?')
+
+
+def _to_inches(value: str, unit: str) -> float:
+    return float(value) * _UNIT_TO_IN.get(unit, 1.0)
+
+
+def estimate_chars_per_line(latex_source: str) -> int:
+    """Estimates how many characters fit on one itemize line of the template."""
+    paper_width = PAPER_WIDTHS_IN['a4paper']
+    for paper, width in PAPER_WIDTHS_IN.items():
+        if paper in latex_source:
+            paper_width = width
+            break
+
+    margin_in = 1.0
+    margin_match = re.search(
+        r'\\usepackage\[[^\]]*\bmargin\s*=\s*([\d.]+)\s*(in|cm|mm|pt)', latex_source)
+    if margin_match:
+        margin_in = _to_inches(*margin_match.groups())
+
+    font_pt = 10.0
+    font_match = re.search(
+        r'\\documentclass\[[^\]]*?(\d+)pt[^\]]*\]', latex_source)
+    if font_match:
+        font_pt = float(font_match.group(1))
+
+    text_width_pt = (paper_width - 2 * margin_in - ITEMIZE_INDENT_IN) * 72.27
+    return max(20, int(text_width_pt / (font_pt * AVG_CHAR_EM)))
+
+
+def visible_length(latex_text: str) -> int:
+    """Approximates the number of printed characters in an escaped LaTeX string."""
+    text = _LATEX_SYMBOL_PATTERN.sub('x', latex_text)
+    text = _LATEX_COMMAND_PATTERN.sub('', text)
+    return len(text.replace('\\', '').replace('{', '').replace('}', ''))
+
+
+def estimate_item_lines(items: List[str], chars_per_line: int) -> int:
+    return sum(max(1, math.ceil(visible_length(item) / chars_per_line)) for item in items)
+
+
+def estimate_block_lines(sections: List[List[str]], chars_per_line: int) -> int:
+    """Predicts the rendered line count of a tailored block made of itemize sections."""
+    return sum(SECTION_HEADING_LINES + estimate_item_lines(items, chars_per_line) for items in sections)
+
+
+def extract_block_sections(block_latex: str) -> List[List[str]]:
+    """Splits a tailored LaTeX block into the item texts of each itemize section."""
+    sections: List[List[str]] = []
+    for body in re.findall(r'\\begin\{itemize\}(.*?)\\end\{itemize\}', block_latex, re.DOTALL):
+        items = [item.strip() for item in re.split(r'\\item\b', body)[1:]]
+        sections.append([item for item in items if item])
+    return sections
+
+
+def _load_observations() -> List[Dict]:
+    if not os.path.exists(LAYOUT_CALIBRATION_PATH):
+        return []
+    try:
+        with open(LAYOUT_CALIBRATION_PATH, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (json.JSONDecodeError, IOError):
+        return []
+    observations = data.get('observations') if isinstance(data, dict) else None
+    return observations if isinstance(observations, list) else []
+
+
+def record_compile_result(template_key: str, block_lines: int, chars_per_line: int, page_count: int):
+    """
+    Stores the predicted block size and the resulting page count of a compile,
+    under the key of the template it was compiled into.
+    """
+    if block_lines <= 0 or page_count <= 0:
+        return
+
+    with _calibration_lock:
+        observations = _load_observations()
+        observations.append({'template': template_key, 'lines': block_lines,
+                             'chars_per_line': chars_per_line, 'pages': page_count})
+        observations = observations[-LAYOUT_MAX_OBSERVATIONS:]
+        try:
+            with open(LAYOUT_CALIBRATION_PATH, 'w', encoding='utf-8') as f:
+                json.dump({'observations': observations}, f, indent=2)
+        except IOError as e:
+            print(f"⚠️ Could not save layout calibration data: {e}")
+
+
+def get_line_budget(template_key: str, chars_per_line: int, default_lines: int) -> int:
+    """
+    Returns the maximum number of tailored-block lines expected to fit on one page.
+    Learned from past compiles of the same template (everything outside the tailored
+    block) and line width: the budget always sits below the smallest block that
+    overflowed. Falls back to the default block size plus some slack, or the largest
+    block that fit, when nothing has overflowed yet.
+    """
+    relevant = [obs for obs in _load_observations()
+                if obs.get('template') == template_key and obs.get('chars_per_line') == chars_per_line]
+    fitting = [obs['lines'] for obs in relevant if obs.get('pages') == 1]
+    overflowing = [obs['lines'] for obs in relevant if obs.get('pages', 0) > 1]
+
+    largest_fit: Optional[int] = max(fitting) if fitting else None
+    smallest_overflow: Optional[int] = min(
+        overflowing) if overflowing else None
+
+    budget = default_lines + DEFAULT_BUDGET_SLACK_LINES
+    if largest_fit is not None:
+        budget = max(budget, largest_fit)
+    if smallest_overflow is not None:
+        # A block this size already spilled onto a second page with this template.
+        budget = min(budget, smallest_overflow - 1)
+    return max(1, budget)
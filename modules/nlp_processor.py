@@ -1,34 +1,247 @@
-import pandas as pd
-from sentence_transformers import SentenceTransformer, util
-from config import COSINE_FILTER_TOP_N
+import heapq
+from sentence_transformers import CrossEncoder, SentenceTransformer, util
+from config import (
+    COSINE_FILTER_TOP_N, HYBRID_RETRIEVAL, LEXICAL_CANDIDATE_POOL, HYBRID_LEXICAL_WEIGHT,
+    CROSS_ENCODER_MODEL_NAME, CROSS_ENCODER_BATCH_SIZE, SIMILARITY_CHUNK_SIZE
+)
+from modules import tracker
+from modules.bm25 import BM25Index
+from modules.descriptions import description_of
+from modules.job_table import with_fields
+from modules.telemetry import span, increment
+from modules.url_utils import canonicalize_url
 
-print("Loading semantic search model (all-MiniLM-L6-v2)...")
-model = SentenceTransformer('all-MiniLM-L6-v2')
-print("Semantic search model loaded.")
+EMBEDDING_MODEL_NAME = 'all-MiniLM-L6-v2'
+# Matches the description cut-off of the Gemini ranking prompt
+RERANK_DESCRIPTION_CHARS = 2000
+_model = None
+_cross_encoder = None
+_lexical_index = None
 
-def filter_jobs_by_similarity(jobs: list[dict], ideal_candidate_profile: str) -> list[dict]:
+
+def get_model() -> SentenceTransformer:
+    """Loads the embedding model on first use so importing this module stays cheap."""
+    global _model
+    if _model is None:
+        print(f"Loading semantic search model ({EMBEDDING_MODEL_NAME})...")
+        _model = SentenceTransformer(EMBEDDING_MODEL_NAME)
+        print("Semantic search model loaded.")
+    return _model
+
+
+def get_cross_encoder() -> CrossEncoder:
+    """Loads the reranking cross-encoder on first use; it runs on CPU."""
+    global _cross_encoder
+    if _cross_encoder is None:
+        print(f"Loading reranking model ({CROSS_ENCODER_MODEL_NAME})...")
+        _cross_encoder = CrossEncoder(CROSS_ENCODER_MODEL_NAME, device='cpu')
+        print("Reranking model loaded.")
+    return _cross_encoder
+
+
+def rerank_jobs(jobs: list[dict], resume_summary: str,
+                batch_size: int = CROSS_ENCODER_BATCH_SIZE) -> list[tuple[dict, float]]:
+    """
+    Scores (resume summary, job) pairs with the cross-encoder in batches and returns
+    (job, score) pairs, best first.
+    """
     if not jobs:
-        print("⚠️ No jobs to perform similarity filtering on.")
         return []
-    
-    print(f"Performing semantic similarity filtering on {len(jobs)} jobs...")
-
-    df = pd.DataFrame(jobs)
-    df['description'] = df['description'].fillna('').astype(str)
-    
-    profile_embedding = model.encode(ideal_candidate_profile, convert_to_tensor=True)
-    job_embeddings = model.encode(df['description'].tolist(), convert_to_tensor=True, show_progress_bar=True)
-    
-    cosine_scores = util.cos_sim(profile_embedding, job_embeddings)
-    
-    df['similarity_score'] = cosine_scores[0].cpu().tolist()
-    df_sorted = df.sort_values(by='similarity_score', ascending=False)
-    
+    pairs = [(resume_summary, _job_text(job)[:RERANK_DESCRIPTION_CHARS]) for job in jobs]
+    with span('cross_encoder_rerank'):
+        scores = get_cross_encoder().predict(pairs, batch_size=batch_size, show_progress_bar=False)
+    increment('cross_encoder_pairs', len(pairs))
+    return sorted(zip(jobs, (float(score) for score in scores)), key=lambda item: item[1], reverse=True)
+
+
+def get_lexical_index() -> BM25Index:
+    """Loads the BM25 index persisted in the tracker on first use."""
+    global _lexical_index
+    if _lexical_index is None:
+        _lexical_index = BM25Index()
+        for doc_key, term_counts in tracker.load_lexical_documents():
+            _lexical_index.add_counts(doc_key, term_counts)
+    return _lexical_index
+
+
+def _job_text(job: dict) -> str:
+    return f"{job.get('title') or ''}\n{description_of(job).core}"
+
+
+def _doc_key(job: dict) -> str:
+    return canonicalize_url(job.get('job_url')) or str(job['id'])
+
+
+def index_jobs(jobs: list[dict]) -> BM25Index:
+    """Adds jobs missing from the lexical index and persists just those."""
+    index = get_lexical_index()
+    new_documents = []
+    for job in jobs:
+        doc_key = _doc_key(job)
+        if doc_key not in index:
+            new_documents.append((doc_key, index.add(doc_key, _job_text(job))))
+    tracker.save_lexical_documents(new_documents)
+    return index
+
+
+def _normalized(scores: list[float]) -> list[float]:
+    low, high = min(scores), max(scores)
+    if high - low <= 1e-12:
+        return [0.0 for _ in scores]
+    return [(score - low) / (high - low) for score in scores]
+
+
+def iter_similarity_chunks(jobs: list[dict], profiles: list[str], chunk_size: int = SIMILARITY_CHUNK_SIZE):
+    """
+    Embeds the profiles once and the job descriptions `chunk_size` at a time, yielding
+    (start, profiles x chunk cosine scores as lists) so only one chunk of job
+    embeddings is held at once.
+    """
+    model = get_model()
+    profile_embeddings = model.encode(profiles, convert_to_tensor=True)
+    for start in range(0, len(jobs), chunk_size):
+        # The model truncates long inputs, so company intros no longer crowd out the role.
+        descriptions = [description_of(job).core for job in jobs[start:start + chunk_size]]
+        job_embeddings = model.encode(descriptions, convert_to_tensor=True, show_progress_bar=False)
+        yield start, util.cos_sim(profile_embeddings, job_embeddings).cpu().tolist()
+
+
+def _push_top(heap: list, top_n: int, score: float, position: int):
+    """Keeps the `top_n` best (score, -position) entries; ties favour the earlier job, like a stable sort."""
+    entry = (score, -position)
+    if len(heap) < top_n:
+        heapq.heappush(heap, entry)
+    elif entry > heap[0]:
+        heapq.heapreplace(heap, entry)
+
+
+def _heap_order(heap: list) -> list[tuple[int, float]]:
+    return [(-negative_position, score) for score, negative_position in sorted(heap, reverse=True)]
+
+
+def _top_positions(scores: list[float], top_n: int) -> list[tuple[int, float]]:
+    return [(position, scores[position])
+            for position in heapq.nlargest(top_n, range(len(scores)), key=scores.__getitem__)]
+
+
+def _select_top_jobs(jobs: list[dict], top: list[tuple[int, float]],
+                     extra_columns: dict | None = None) -> list[dict]:
+    """Copies of the jobs at `top`'s (position, score) pairs, best first, each carrying its scores."""
     print(f"✅ Semantic search complete. Top 5 matches:")
-    for _, row in df_sorted.head(5).iterrows():
-        print(f"   - Score: {row['similarity_score']:.4f}, Title: {row['title']}")
+    for position, score in top[:5]:
+        print(f"   - Score: {score:.4f}, Title: {jobs[position].get('title')}")
 
-    top_jobs = df_sorted.head(COSINE_FILTER_TOP_N).to_dict('records')
-    
+    top_jobs = []
+    for position, score in top:
+        job = jobs[position]
+        description = job.get('description')
+        fields = {column: values[position] for column, values in (extra_columns or {}).items()}
+        top_jobs.append(with_fields(
+            job, description=description if isinstance(description, str) else '',
+            similarity_score=score, **fields))
     print(f"Filtered down to the top {len(top_jobs)} most relevant jobs.")
-    return top_jobs
\ No newline at end of file
+    return top_jobs
+
+
+def filter_jobs_by_similarity(jobs: list[dict], ideal_candidate_profile: str, top_n: int = COSINE_FILTER_TOP_N,
+                              lexical_query: str | None = None) -> list[dict]:
+    if not jobs:
+        print("⚠️ No jobs to perform similarity filtering on.")
+        return []
+    return filter_jobs_by_similarity_for_profiles(
+        [jobs], [ideal_candidate_profile], top_n, [lexical_query])[0]
+
+
+def _lexical_pools(jobs_per_profile: list[list[dict]], queries: list[str], pool_size: int,
+                   chunk_size: int = SIMILARITY_CHUNK_SIZE):
+    """
+    BM25 first stage: for each profile, scores its eligible jobs against its query
+    `chunk_size` at a time and keeps a running top `pool_size`. Returns (pools, the
+    BM25 score of each pooled job, aligned with its pool).
+    """
+    union_jobs = [job for jobs in jobs_per_profile for job in jobs]
+    with span('lexical_retrieval'):
+        index = index_jobs(union_jobs)
+        pools, lexical_scores = [], []
+        for jobs, query in zip(jobs_per_profile, queries):
+            heap = []
+            for start in range(0, len(jobs), chunk_size):
+                doc_keys = [_doc_key(job) for job in jobs[start:start + chunk_size]]
+                scores = index.score(query, doc_keys)
+                for offset, doc_key in enumerate(doc_keys):
+                    _push_top(heap, pool_size, scores[doc_key], start + offset)
+            top = _heap_order(heap)
+            increment('lexical_pruned_jobs', len(jobs) - len(top))
+            pools.append([jobs[position] for position, _ in top])
+            lexical_scores.append([score for _, score in top])
+    return pools, lexical_scores
+
+
+def filter_jobs_by_similarity_for_profiles(jobs_per_profile: list[list[dict]], profiles: list[str],
+                                           top_n: int = COSINE_FILTER_TOP_N,
+                                           lexical_queries: list[str | None] | None = None) -> list[list[dict]]:
+    """
+    Similarity filtering for several candidate profiles at once. Each profile has
+    its own eligible jobs. With HYBRID_RETRIEVAL, a BM25 stage first cuts each
+    profile's jobs to LEXICAL_CANDIDATE_POOL (queried with `lexical_queries`, or
+    the profile itself) and every profile keeps its own top `top_n` by fused score.
+    Both stages work SIMILARITY_CHUNK_SIZE jobs at a time and keep only a running top
+    per profile, which bounds the scores and embeddings held at once. Peak memory
+    still grows with the scrape: the BM25 index holds every job indexed within
+    LEXICAL_INDEX_TTL_DAYS and the description cache every normalized description.
+    """
+    lexical_queries = [query or profile for query, profile in
+                       zip(lexical_queries or [None] * len(profiles), profiles)]
+    lexical_scores = None
+    if HYBRID_RETRIEVAL and any(jobs_per_profile):
+        pool_size = max(LEXICAL_CANDIDATE_POOL, top_n)
+        total = sum(len(jobs) for jobs in jobs_per_profile)
+        jobs_per_profile, lexical_scores = _lexical_pools(jobs_per_profile, lexical_queries, pool_size)
+        kept = sum(len(jobs) for jobs in jobs_per_profile)
+        if kept < total:
+            print(f"🔎 BM25 first stage kept {kept} of {total} job(s) for semantic reranking.")
+
+    union_jobs = {}
+    for jobs in jobs_per_profile:
+        for job in jobs:
+            union_jobs.setdefault(str(job['id']), job)
+    if not union_jobs:
+        print("⚠️ No jobs to perform similarity filtering on.")
+        return [[] for _ in profiles]
+
+    print(
+        f"Performing semantic similarity filtering on {len(union_jobs)} unique jobs for {len(profiles)} profile(s)...")
+    job_ids = list(union_jobs)
+    positions = [{str(job['id']): position for position, job in enumerate(jobs)} for jobs in jobs_per_profile]
+    # The BM25 pools are already bounded, and fusing needs every pooled job's dense score.
+    dense_scores = [[0.0] * len(jobs) for jobs in jobs_per_profile] if lexical_scores is not None else None
+    heaps = [[] for _ in profiles]
+    with span('similarity_scoring'):
+        for start, chunk_scores in iter_similarity_chunks(list(union_jobs.values()), profiles):
+            for row, row_scores in enumerate(chunk_scores):
+                position_of = positions[row]
+                for offset, score in enumerate(row_scores):
+                    position = position_of.get(job_ids[start + offset])
+                    if position is None:
+                        continue
+                    if dense_scores is not None:
+                        dense_scores[row][position] = score
+                    else:
+                        _push_top(heaps[row], top_n, score, position)
+    increment('similarity_jobs_embedded', len(job_ids))
+
+    results = []
+    for row, jobs in enumerate(jobs_per_profile):
+        if not jobs:
+            results.append([])
+            continue
+        if lexical_scores is None:
+            results.append(_select_top_jobs(jobs, _heap_order(heaps[row])))
+            continue
+        scores = dense_scores[row]
+        bm25_scores = lexical_scores[row]
+        fused = [(1 - HYBRID_LEXICAL_WEIGHT) * dense + HYBRID_LEXICAL_WEIGHT * lexical
+                 for dense, lexical in zip(_normalized(scores), _normalized(bm25_scores))]
+        results.append(_select_top_jobs(jobs, _top_positions(fused, top_n), {
+            'dense_score': scores, 'bm25_score': bm25_scores}))
+    return results
@@ -0,0 +1,236 @@
+import os
+import json
+import time
+import uuid
+import shutil
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from config import (
+    DELIVERY_METHOD, OUTBOX_DIR, OUTBOX_MAX_ATTEMPTS, EMAIL_RETRY_DELAY_SECONDS,
+    DELIVERY_DRAIN_TIMEOUT_SECONDS
+)
+from modules import email_module, profiler
+from modules.telemetry import ERROR, increment, log
+
+MESSAGE_FILE = "message.json"
+
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def _write_entry(entry_dir: str, entry: Dict):
+    tmp_path = os.path.join(entry_dir, f"{MESSAGE_FILE}.tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(entry, f)
+    os.replace(tmp_path, os.path.join(entry_dir, MESSAGE_FILE))
+
+
+def enqueue_messages(messages: List[Dict]) -> List[str]:
+    """
+    Stores rendered messages in the outbox, each in its own directory with copies
+    of its attachments. Entries appear atomically via a directory rename, so the
+    sender never sees a half-written message.
+    """
+    os.makedirs(OUTBOX_DIR, exist_ok=True)
+    entry_ids = []
+    for message in messages:
+        entry_id = f"{datetime.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:8]}"
+        staging_dir = os.path.join(OUTBOX_DIR, f".{entry_id}.tmp")
+        os.makedirs(staging_dir)
+        attachments = []
+        for pdf_path in message['attachment_paths']:
+            filename = os.path.basename(pdf_path)
+            shutil.copy2(pdf_path, os.path.join(staging_dir, filename))
+            attachments.append(filename)
+        _write_entry(staging_dir, {
+            'subject': message['subject'],
+            'html_body': message['html_body'],
+            'attachments': attachments,
+            'recipient_addr': message.get('recipient_addr'),
+            'created_at': datetime.now().isoformat(),
+            'status': 'pending',
+            'attempts': 0,
+            'next_attempt_at': 0,
+            'last_error': None,
+        })
+        os.replace(staging_dir, os.path.join(OUTBOX_DIR, entry_id))
+        entry_ids.append(entry_id)
+    increment('outbox_enqueued', len(entry_ids))
+    return entry_ids
+
+
+def list_pending() -> List[Tuple[str, Dict]]:
+    """Returns (entry_dir, entry) pairs still waiting for delivery, oldest first."""
+    if not os.path.isdir(OUTBOX_DIR):
+        return []
+    pending = []
+    for entry_id in sorted(os.listdir(OUTBOX_DIR)):
+        entry_dir = os.path.join(OUTBOX_DIR, entry_id)
+        if entry_id.startswith('.') or not os.path.isdir(entry_dir):
+            continue
+        try:
+            with open(os.path.join(entry_dir, MESSAGE_FILE), 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (IOError, json.JSONDecodeError):
+            continue
+        if entry.get('status') == 'pending':
+            pending.append((entry_dir, entry))
+    return pending
+
+
+class DeliveryWorker(threading.Thread):
+    """
+    Background sender that drains the outbox over one SMTP session. Failed sends
+    are rescheduled with exponential backoff and persisted, so a later run picks
+    them up; permanent failures are kept on disk with status 'failed'.
+    """
+
+    def __init__(self, settings: Dict):
+        super().__init__(name="delivery-worker", daemon=True)
+        self.session = email_module.SmtpSession(settings)
+        self._wake = threading.Event()
+        self._draining = False
+        # Entries whose processing raised (e.g. a full disk) wait this long before another try.
+        self._held_until: Dict[str, float] = {}
+
+    def wake(self):
+        self._wake.set()
+
+    def drain(self):
+        """Asks the worker to exit once the outbox is empty."""
+        self._draining = True
+        self._wake.set()
+
+    def run(self):
+        try:
+            while True:
+                self._wake.clear()
+                pending = list_pending()
+                if not pending:
+                    if self._draining:
+                        return
+                    self._wake.wait()
+                    continue
+
+                now = time.time()
+                due = [(entry_dir, entry) for entry_dir, entry in pending
+                       if self._next_attempt_at(entry_dir, entry) <= now]
+                for entry_dir, entry in due:
+                    try:
+                        self._deliver(entry_dir, entry)
+                    except Exception as e:
+                        # Keep the thread alive; the entry stays in the outbox for a later try.
+                        increment('outbox_errors')
+                        log(ERROR, "❌ Could not process outbox entry '%s': %s", entry_dir, e)
+                        self._held_until[entry_dir] = time.time() + EMAIL_RETRY_DELAY_SECONDS
+                if not due:
+                    if self._draining and all(entry_dir in self._held_until for entry_dir, _ in pending):
+                        # Only entries that keep failing locally are left; leave them for the next run.
+                        return
+                    next_attempt_at = min(self._next_attempt_at(entry_dir, entry) for entry_dir, entry in pending)
+                    self._wake.wait(max(0.0, next_attempt_at - now))
+        finally:
+            self.session.close()
+
+    def _next_attempt_at(self, entry_dir: str, entry: Dict) -> float:
+        return max(entry['next_attempt_at'], self._held_until.get(entry_dir, 0))
+
+    def _deliver(self, entry_dir: str, entry: Dict):
+        message = {
+            'subject': entry['subject'],
+            'html_body': entry['html_body'],
+            'attachment_paths': [os.path.join(entry_dir, name) for name in entry['attachments']],
+            'recipient_addr': entry.get('recipient_addr'),
+        }
+        try:
+            with profiler.stage('send_email'):
+                self.session.send(message)
+        except Exception as e:
+            increment('email_send_errors')
+            entry['attempts'] += 1
+            entry['last_error'] = str(e)
+            if not email_module.is_transient_error(e) or entry['attempts'] >= OUTBOX_MAX_ATTEMPTS:
+                entry['status'] = 'failed'
+                print(
+                    f"❌ Giving up on email '{entry['subject']}' after {entry['attempts']} attempt(s): {e}. It is kept in '{entry_dir}'.")
+            else:
+                delay = EMAIL_RETRY_DELAY_SECONDS * 2 ** (entry['attempts'] - 1)
+                entry['next_attempt_at'] = time.time() + delay
+                print(
+                    f"⚠️ Email '{entry['subject']}' failed ({e}). Retrying in {delay}s... ({entry['attempts']}/{OUTBOX_MAX_ATTEMPTS})")
+            _write_entry(entry_dir, entry)
+            return
+
+        shutil.rmtree(entry_dir, ignore_errors=True)
+        increment('emails_sent')
+        print(f"✅ Email '{entry['subject']}' sent successfully!")
+
+
+def start_delivery_worker() -> Optional[DeliveryWorker]:
+    """Starts the background sender; it immediately resumes leftovers from earlier runs."""
+    global _worker
+    with _worker_lock:
+        if _worker is not None and _worker.is_alive():
+            return _worker
+        if DELIVERY_METHOD.lower() != 'email':
+            return None
+        settings = email_module.get_smtp_settings(require_recipient=False)
+        if settings is None:
+            print("❌ Email configuration is incomplete in your .env file. Emails stay in the outbox.")
+            return None
+        leftovers = len(list_pending())
+        if leftovers:
+            print(f"📬 Resuming delivery of {leftovers} email(s) left in the outbox.")
+        _worker = DeliveryWorker(settings)
+        _worker.start()
+        return _worker
+
+
+def queue_notification(results_list, recipient_addr=None, candidate_name=None):
+    """
+    Renders the summary emails for `results_list` into the outbox and hands them
+    to the background sender. Returns without waiting for SMTP. The recipient
+    defaults to EMAIL_TO.
+    """
+    if not results_list:
+        print("No results to deliver.")
+        return
+
+    if DELIVERY_METHOD.lower() == 'email':
+        print(f"📦 Queueing summary email for {len(results_list)} generated resume(s)...")
+        recipient_addr = recipient_addr or os.getenv("EMAIL_TO")
+        if not recipient_addr:
+            print("❌ No recipient configured (EMAIL_TO or the candidate's email_to). Cannot queue email.")
+            return
+        messages = email_module.render_summary_messages(
+            results_list, recipient_addr, candidate_name)
+        if not messages:
+            print("❌ None of the generated PDFs could be found. Nothing to send.")
+            return
+        enqueue_messages(messages)
+        worker = start_delivery_worker()
+        if worker is not None:
+            worker.wake()
+    elif DELIVERY_METHOD.lower() == 'none':
+        print(" delivery method is 'none'. Skipping notification.")
+    else:
+        print(f"⚠️ Unknown delivery method specified in config: '{DELIVERY_METHOD}'")
+
+
+def wait_for_delivery(timeout: float = DELIVERY_DRAIN_TIMEOUT_SECONDS) -> int:
+    """
+    Waits up to `timeout` seconds for the outbox to empty and returns the number of
+    emails still pending. Those stay on disk and are retried on the next run.
+    """
+    with _worker_lock:
+        worker = _worker
+    if worker is not None and worker.is_alive():
+        worker.drain()
+        worker.join(timeout)
+
+    remaining = len(list_pending())
+    if remaining:
+        print(f"⏳ {remaining} email(s) still pending; they will be retried on the next run.")
+    return remaining
@@ -0,0 +1,337 @@
+import queue
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from config import (
+    PIPELINE_COMPILE_WORKERS, PIPELINE_QUEUE_SIZE, OUTPUT_DIR, GEMINI_BATCH_MODE, MODEL_NAME,
+    GEMINI_BATCH_OUTPUT_TOKENS_ESTIMATE
+)
+from modules import profiler, gemini_usage
+from modules.gemini_client import (
+    generate_resume_content, generate_resume_contents, condense_latex_resume, build_tailoring_prompt,
+    estimate_tokens
+)
+from modules.telemetry import increment
+from modules.resume_generator import (
+    content_variants, create_resume_pdf, get_pdf_page_count, prepare_resume_latex, record_layout_result
+)
+
+_STOP = object()
+# Queued in place of a payload for jobs left untailored because the Gemini budget ran out
+_SKIPPED = object()
+
+
+class MonitoredQueue:
+    """A bounded queue that records depth and blocking statistics for each stage."""
+
+    def __init__(self, name: str, maxsize: int):
+        self.name = name
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._lock = threading.Lock()
+        self.maxsize = maxsize
+        self.puts = 0
+        self.max_depth = 0
+        self._depth_samples = 0
+        self._depth_total = 0
+        self.put_wait_seconds = 0.0
+        self.get_wait_seconds = 0.0
+
+    def _sample(self):
+        depth = self._queue.qsize()
+        self.max_depth = max(self.max_depth, depth)
+        self._depth_samples += 1
+        self._depth_total += depth
+
+    def put(self, item, count: bool = True):
+        started = time.perf_counter()
+        self._queue.put(item)
+        with self._lock:
+            self.put_wait_seconds += time.perf_counter() - started
+            if count:
+                self.puts += 1
+            self._sample()
+
+    def get(self):
+        started = time.perf_counter()
+        item = self._queue.get()
+        with self._lock:
+            self.get_wait_seconds += time.perf_counter() - started
+            self._sample()
+        return item
+
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def metrics(self) -> Dict:
+        with self._lock:
+            return {
+                'capacity': self.maxsize,
+                'items': self.puts,
+                'max_depth': self.max_depth,
+                'avg_depth': round(self._depth_total / self._depth_samples, 2) if self._depth_samples else 0.0,
+                'producer_blocked_seconds': round(self.put_wait_seconds, 2),
+                'consumer_idle_seconds': round(self.get_wait_seconds, 2),
+            }
+
+
+def _compile_tailored_resume(source_latex: str, job: Dict, tailored_payload: Optional[Dict],
+                             output_dir: str = OUTPUT_DIR) -> Optional[Dict]:
+    """
+    Builds and compiles a single tailored resume. If it overflows, the shorter
+    content variants from the same tailoring call are tried before asking Gemini
+    to condense it, unless the run's Gemini budget is already spent.
+    """
+    final_latex, used_ai_content, variant = prepare_resume_latex(
+        source_latex, job, tailored_payload)
+    generation_failed = tailored_payload is None or not used_ai_content
+    if generation_failed:
+        print(
+            f"⚠️ AI tailoring failed for '{str(job.get('title', 'N/A'))}'. Using default summary and keywords.")
+
+    pdf_path = create_resume_pdf(final_latex, job, output_dir)
+    used_fallback_resume = False
+
+    if not pdf_path:
+        print(
+            "   ⚠️ Primary resume generation failed. Attempting fallback to base template...")
+        pdf_path = create_resume_pdf(source_latex, job, output_dir)
+        if pdf_path:
+            used_fallback_resume = True
+            final_latex = source_latex
+            generation_failed = True
+            print("   ✅ Fallback resume generated using original template.")
+        else:
+            print("   ❌ Fallback resume generation also failed.")
+
+    if pdf_path:
+        page_count = get_pdf_page_count(pdf_path)
+        print(f"   📄 Compiled PDF has {page_count} page(s).")
+        if not used_fallback_resume:
+            record_layout_result(final_latex, page_count)
+    else:
+        page_count = 0
+
+    variants = content_variants(tailored_payload)
+    while pdf_path and not used_fallback_resume and page_count > 1 and variant + 1 < len(variants):
+        print(f"   ⚠️ Resume is {page_count} pages. Retrying with the '{variants[variant + 1][0]}' content variant...")
+        shorter_latex, _, variant = prepare_resume_latex(source_latex, job, tailored_payload, variant + 1)
+        shorter_pdf_path = create_resume_pdf(shorter_latex, job, output_dir)
+        if not shorter_pdf_path:
+            print("   ❌ The shorter variant failed to compile.")
+            break
+        final_latex, pdf_path = shorter_latex, shorter_pdf_path
+        page_count = get_pdf_page_count(pdf_path)
+        record_layout_result(final_latex, page_count)
+        print(f"   📄 Compiled PDF has {page_count} page(s).")
+        if page_count <= 1:
+            increment('overflow_resolved_locally')
+
+    budget_reason = None
+    if pdf_path and not used_fallback_resume and page_count > 1:
+        budget_reason = gemini_usage.budget_exceeded()
+        if budget_reason:
+            # Condensing is a paid call; keep the shortest variant's PDF instead.
+            print(f"   💸 Gemini budget reached ({budget_reason}). Keeping the {page_count}-page resume.")
+            increment('condense_skipped_for_budget')
+
+    if pdf_path and not used_fallback_resume and page_count > 1 and not budget_reason:
+        print(
+            f"   ⚠️ Resume is {page_count} pages. Attempt 2: Condensing content...")
+        condensed_latex = condense_latex_resume(final_latex)
+        if condensed_latex:
+            final_latex = condensed_latex
+            condensed_pdf_path = create_resume_pdf(final_latex, job, output_dir)
+            if condensed_pdf_path:
+                pdf_path = condensed_pdf_path
+                final_page_count = get_pdf_page_count(pdf_path)
+                print(
+                    f"   ✅ Condensing successful. Final PDF has {final_page_count} page(s).")
+                if final_page_count > 1:
+                    print("   ❌ Condensing failed to reduce to one page.")
+            else:
+                print(
+                    "   ❌ Condensed LaTeX failed to compile. Reverting to pre-condensed resume.")
+                generation_failed = True
+        else:
+            print("   ❌ AI condensing failed.")
+            generation_failed = True
+
+    if not pdf_path:
+        print(
+            f"❌ Critical Error: Could not generate PDF for '{str(job.get('title', 'N/A'))}'.")
+        return None
+
+    return {
+        'job_details': job,
+        'pdf_path': pdf_path,
+        'generation_failed': generation_failed
+    }
+
+
+def _tailoring_stage(jobs: List[Dict], source_latex: str, compile_queue: MonitoredQueue, worker_count: int,
+                     cached_payloads: Dict[str, Dict], on_tailored: Optional[Callable], skipped: List[Dict]):
+    try:
+        for index, job in enumerate(jobs):
+            tailored_payload = cached_payloads.get(str(job.get('id')))
+            budget_reason = None if tailored_payload else gemini_usage.budget_exceeded()
+            if budget_reason:
+                # Jobs arrive in rank order, so the budget goes to the best matches.
+                if not skipped:
+                    print(f"\n💸 Gemini budget reached ({budget_reason}). "
+                          f"Lower-ranked jobs are left for a later run.")
+                skipped.append(job)
+                compile_queue.put((index, job, _SKIPPED))
+                continue
+            print(
+                f"\n--- Tailoring Job {index + 1} of {len(jobs)}: '{job.get('title', 'N/A')}' ---")
+            if tailored_payload:
+                print("⏩ Using tailoring content from the checkpoint or batch.")
+            else:
+                try:
+                    with profiler.stage('tailoring'):
+                        tailored_payload = generate_resume_content(source_latex, job)
+                except Exception as e:
+                    print(f"❌ Unexpected error while tailoring job {index + 1}: {e}")
+                    tailored_payload = None
+                if tailored_payload and on_tailored:
+                    on_tailored(job, tailored_payload)
+            compile_queue.put((index, job, tailored_payload))
+    finally:
+        for _ in range(worker_count):
+            compile_queue.put(_STOP, count=False)
+
+
+def _compile_stage(source_latex: str, compile_queue: MonitoredQueue, results_queue: MonitoredQueue,
+                   on_result: Optional[Callable], output_dir: str):
+    try:
+        while True:
+            item = compile_queue.get()
+            if item is _STOP:
+                return
+            index, job, tailored_payload = item
+            if tailored_payload is _SKIPPED:
+                results_queue.put((index, None))
+                continue
+            print(f"\n--- Compiling Job {index + 1}: '{job.get('title', 'N/A')}' ---")
+            result = None
+            try:
+                with profiler.stage('compile'):
+                    result = _compile_tailored_resume(source_latex, job, tailored_payload, output_dir)
+                if result and on_result:
+                    on_result(job, result)
+            except Exception as e:
+                # A failed on_result (checkpoint write) keeps the compiled result.
+                print(f"❌ Unexpected error while compiling or recording job {index + 1}: {e}")
+            results_queue.put((index, result))
+    finally:
+        # The collector waits for one _STOP per worker, so it must arrive even if this thread dies.
+        results_queue.put(_STOP, count=False)
+
+
+def _tailor_in_batch(jobs: List[Dict], source_latex: str, cached_payloads: Dict[str, Dict],
+                     on_tailored: Optional[Callable]) -> Dict[str, Dict]:
+    """
+    Batch mode: tailors the jobs without a cached payload in Gemini batch jobs up
+    front, in rank order. With a run budget set, each batch holds only as many
+    requests as the remaining budget is estimated to cover, and the estimate is
+    redone from the recorded usage before the next one. Jobs left over are tailored
+    (or skipped for budget) by the regular tailoring stage.
+    """
+    pending = [job for job in jobs if str(job.get('id')) not in cached_payloads]
+    payloads = dict(cached_payloads)
+    while pending and not gemini_usage.budget_exceeded():
+        prompt_tokens = max(estimate_tokens(build_tailoring_prompt(source_latex, job)) for job in pending)
+        affordable = gemini_usage.affordable_calls(
+            MODEL_NAME, 'tailoring', prompt_tokens, GEMINI_BATCH_OUTPUT_TOKENS_ESTIMATE, batch=True)
+        if affordable == 0:
+            break
+        chunk, pending = (pending, []) if affordable is None else (pending[:affordable], pending[affordable:])
+        if pending:
+            print(f"💰 Batching the top {len(chunk)} job(s) the remaining Gemini budget covers.")
+        contents = generate_resume_contents(source_latex, chunk)
+        for job in chunk:
+            content = contents.get(str(job.get('id')))
+            if content:
+                payloads[str(job.get('id'))] = content
+                if on_tailored:
+                    on_tailored(job, content)
+        if not contents:
+            break
+    return payloads
+
+
+def run_tailoring_pipeline(jobs: List[Dict], source_latex: str, cached_payloads: Optional[Dict[str, Dict]] = None,
+                           on_tailored: Optional[Callable] = None, on_result: Optional[Callable] = None,
+                           output_dir: str = OUTPUT_DIR) -> Tuple[List[Dict], Dict]:
+    """
+    Tailors, compiles and collects resumes for the ranked jobs as a staged pipeline.
+    A single tailoring thread feeds Gemini output into a bounded queue drained by
+    compile workers, so job i compiles while job i+1 is being tailored. Results
+    are returned in rank order together with per-stage queue metrics.
+    Tailoring content found in `cached_payloads` (keyed by job id) is reused, and the
+    optional callbacks are invoked as each job is tailored and compiled. Once the
+    run's Gemini budget is spent, the remaining uncached jobs are skipped; they are
+    listed in the metrics under 'skipped_for_budget'. In GEMINI_BATCH_MODE the
+    tailoring requests are first submitted as batch jobs,
+    sized to the remaining budget.
+    """
+    if not jobs:
+        return [], {}
+    cached_payloads = cached_payloads or {}
+    if GEMINI_BATCH_MODE:
+        with profiler.stage('tailoring'):
+            cached_payloads = _tailor_in_batch(jobs, source_latex, cached_payloads, on_tailored)
+
+    worker_count = max(1, min(PIPELINE_COMPILE_WORKERS, len(jobs)))
+    compile_queue = MonitoredQueue('tailor_to_compile', PIPELINE_QUEUE_SIZE)
+    results_queue = MonitoredQueue('compile_to_collect', PIPELINE_QUEUE_SIZE)
+    skipped: List[Dict] = []
+
+    threads = [threading.Thread(target=_tailoring_stage, name='tailor',
+                                args=(jobs, source_latex, compile_queue, worker_count,
+                                      cached_payloads, on_tailored, skipped), daemon=True)]
+    threads += [threading.Thread(target=_compile_stage, name=f'compile-{n}',
+                                 args=(source_latex, compile_queue, results_queue, on_result, output_dir), daemon=True)
+                for n in range(worker_count)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+
+    # Collect results, releasing them strictly in rank order.
+    pending: Dict[int, Optional[Dict]] = {}
+    ordered_results: List[Dict] = []
+    next_index = 0
+    finished_workers = 0
+    while finished_workers < worker_count:
+        item = results_queue.get()
+        if item is _STOP:
+            finished_workers += 1
+            continue
+        index, result = item
+        pending[index] = result
+        while next_index in pending:
+            result = pending.pop(next_index)
+            if result:
+                ordered_results.append(result)
+            next_index += 1
+
+    for thread in threads:
+        thread.join()
+
+    metrics = {
+        'jobs': len(jobs),
+        'compile_workers': worker_count,
+        'elapsed_seconds': round(time.perf_counter() - started, 2),
+        'queues': {q.name: q.metrics() for q in (compile_queue, results_queue)},
+        'skipped_for_budget': skipped,
+    }
+    if skipped:
+        increment('jobs_skipped_for_budget', len(skipped))
+        print(f"💸 Skipped {len(skipped)} job(s) after the Gemini budget was reached.")
+    print(
+        f"📊 Pipeline finished in {metrics['elapsed_seconds']}s with {worker_count} compile worker(s).")
+    for name, stats in metrics['queues'].items():
+        print(
+            f"   - {name}: max depth {stats['max_depth']}/{stats['capacity']}, avg depth {stats['avg_depth']}, producer blocked {stats['producer_blocked_seconds']}s")
+    return ordered_results, metrics
@@ -1,18 +1,23 @@
-from config import TARGET_LOCATIONS, MIN_SALARY_INR, MIN_EXPERIENCE_YEARS, MAX_EXPERIENCE_YEARS, SEARCH_TERMS
+from typing import Optional
 
-def create_ideal_candidate_profile(resume_text: str) -> str:
+from models.candidate_config import CandidateConfig
+
+def create_ideal_candidate_profile(resume_text: str, candidate: Optional[CandidateConfig] = None) -> str:
     """
-    Generates a detailed text profile combining resume skills and config preferences.
+    Generates a detailed text profile combining resume skills and the candidate's
+    preferences (config.py when no candidate is given).
     """
-    
+    candidate = candidate or CandidateConfig(name="default")
+    target_locations = candidate.target_locations
+
     # Format locations for readability
-    if len(TARGET_LOCATIONS) > 1:
-        locations_str = f"{', '.join(TARGET_LOCATIONS[:-1])}, or {TARGET_LOCATIONS[-1]}"
+    if len(target_locations) > 1:
+        locations_str = f"{', '.join(target_locations[:-1])}, or {target_locations[-1]}"
     else:
-        locations_str = TARGET_LOCATIONS[0]
+        locations_str = target_locations[0]
 
     # Format job titles
-    job_titles = SEARCH_TERMS
+    job_titles = candidate.search_terms
     if len(job_titles) > 1:
         titles_str = f"{', '.join(job_titles[:-1])}, or {job_titles[-1]}"
     else:
@@ -21,9 +26,9 @@ def create_ideal_candidate_profile(resume_text: str) -> str:
     profile = f"""
 An ideal candidate profile for a job search.
 The candidate is seeking a position as a {titles_str}.
-They are looking for roles with an experience requirement between {MIN_EXPERIENCE_YEARS} and {MAX_EXPERIENCE_YEARS} years.
+They are looking for roles with an experience requirement between {candidate.min_experience_years} and {candidate.max_experience_years} years.
 The preferred locations are {locations_str}.
-The target minimum annual salary is {MIN_SALARY_INR:,} INR.
+The target minimum annual salary is {candidate.min_salary_inr:,} INR.
 
 The candidate's skills and background are summarized below:
 ---
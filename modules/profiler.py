@@ -0,0 +1,192 @@
+"""
+Opt-in profiling of the pipeline stages, enabled with `python main.py --profile`
+or JOBASSIST_PROFILE=1. For every stage it writes:
+
+* `<stage>.pstats`    - deterministic cProfile stats (stages run on the main thread; see
+                        `stage` for the Python 3.12+ caveat)
+* `<stage>.collapsed` - sampled stacks of every thread working for the stage, in the
+                        collapsed format read by flamegraph.pl and speedscope
+* `memory_summary.json` - tracemalloc peak and net allocation per stage
+"""
+import os
+import sys
+import json
+import pstats
+import cProfile
+import threading
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, List
+
+from config import PROFILE_OUTPUT_DIR, PROFILE_SAMPLE_INTERVAL_SECONDS
+
+PROFILE_ENV_VAR = "JOBASSIST_PROFILE"
+TOP_ALLOCATION_SITES = 5
+# From 3.12 cProfile hooks sys.monitoring, which sees calls from every thread, not just its own.
+CPROFILE_IS_PROCESS_WIDE = sys.version_info >= (3, 12)
+
+_enabled = False
+_output_dir = PROFILE_OUTPUT_DIR
+_lock = threading.Lock()
+_thread_stages: Dict[int, str] = {}
+_stacks: Dict[str, Counter] = {}
+_profiles: Dict[str, List[cProfile.Profile]] = {}
+_memory: Dict[str, Dict] = {}
+# Whether an outermost main-thread stage is running, and whether another thread entered a
+# stage meanwhile (on 3.12+ its calls then end up in that stage's pstats).
+_main_stage_active = False
+_main_stage_shared = False
+_sampler = None
+
+
+def requested_by_env() -> bool:
+    return os.getenv(PROFILE_ENV_VAR, '').lower() in ('1', 'true', 'yes')
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def _collapse(frame) -> str:
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+class _StackSampler(threading.Thread):
+    """Periodically records the stack of every thread that is inside a profiled stage."""
+
+    def __init__(self, interval: float):
+        super().__init__(name="profile-sampler", daemon=True)
+        self.interval = interval
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frames = sys._current_frames()
+            with _lock:
+                for ident, stage_name in _thread_stages.items():
+                    frame = frames.get(ident)
+                    if frame is not None:
+                        _stacks.setdefault(stage_name, Counter())[_collapse(frame)] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+def enable(output_dir: str = PROFILE_OUTPUT_DIR, interval: float = PROFILE_SAMPLE_INTERVAL_SECONDS):
+    """Starts tracemalloc and the stack sampler. Stages are no-ops until this is called."""
+    global _enabled, _output_dir, _sampler
+    if _enabled:
+        return
+    _output_dir = output_dir
+    tracemalloc.start()
+    _sampler = _StackSampler(interval)
+    _sampler.start()
+    _enabled = True
+    print(f"🔬 Profiling enabled. Results will be written to '{output_dir}/'.")
+
+
+@contextmanager
+def stage(name: str, threaded: bool = False):
+    """
+    Profiles a block of work under `name`. The outermost stage on the main thread
+    also gets a cProfile run and a tracemalloc peak; stages entered on worker
+    threads (or nested ones) are captured by the stack sampler only.
+    On Python 3.12+ cProfile records every thread, so a stage that hands work to
+    worker threads (`threaded=True`) is left to the sampler, and a pstats file that
+    still picked up another thread's stage is flagged in the memory summary.
+    """
+    global _main_stage_active, _main_stage_shared
+    if not _enabled:
+        yield
+        return
+
+    ident = threading.get_ident()
+    outermost = False
+    profile = None
+    with _lock:
+        previous_stage = _thread_stages.get(ident)
+        _thread_stages[ident] = name
+        on_main_thread = threading.current_thread() is threading.main_thread()
+        if _main_stage_active and not on_main_thread:
+            _main_stage_shared = True
+        if not _main_stage_active and on_main_thread:
+            outermost = _main_stage_active = True
+            _main_stage_shared = any(other != ident for other in _thread_stages)
+            if not (threaded and CPROFILE_IS_PROCESS_WIDE):
+                profile = cProfile.Profile()
+
+    if outermost:
+        tracemalloc.reset_peak()
+        memory_before = tracemalloc.get_traced_memory()[0]
+    if profile is not None:
+        profile.enable()
+    try:
+        yield
+    finally:
+        if profile is not None:
+            profile.disable()
+        if outermost:
+            memory_after, memory_peak = tracemalloc.get_traced_memory()
+            top_sites = tracemalloc.take_snapshot().statistics('lineno')[:TOP_ALLOCATION_SITES]
+            with _lock:
+                _main_stage_active = False
+                if profile is not None:
+                    _profiles.setdefault(name, []).append(profile)
+                summary = _memory.setdefault(name, {'calls': 0, 'peak_mib': 0.0, 'net_mib': 0.0})
+                if profile is not None and CPROFILE_IS_PROCESS_WIDE and _main_stage_shared:
+                    summary['pstats_include_other_threads'] = True
+                summary['calls'] += 1
+                summary['peak_mib'] = max(summary['peak_mib'],
+                                          round((memory_peak - memory_before) / (1024 * 1024), 2))
+                summary['net_mib'] = round(
+                    summary['net_mib'] + (memory_after - memory_before) / (1024 * 1024), 2)
+                summary['top_allocation_sites'] = [
+                    {'site': str(stat.traceback), 'mib': round(stat.size / (1024 * 1024), 2)}
+                    for stat in top_sites]
+        with _lock:
+            if previous_stage is None:
+                _thread_stages.pop(ident, None)
+            else:
+                _thread_stages[ident] = previous_stage
+
+
+def write_results():
+    """Stops profiling and writes the per-stage stats, collapsed stacks and memory summary."""
+    global _enabled
+    if not _enabled:
+        return
+    _sampler.stop()
+    tracemalloc.stop()
+    _enabled = False
+
+    os.makedirs(_output_dir, exist_ok=True)
+    for name, profiles in _profiles.items():
+        stats = pstats.Stats(profiles[0])
+        for profile in profiles[1:]:
+            stats.add(profile)
+        stats.dump_stats(os.path.join(_output_dir, f"{name}.pstats"))
+    for name, stacks in _stacks.items():
+        with open(os.path.join(_output_dir, f"{name}.collapsed"), 'w', encoding='utf-8') as f:
+            for stack, count in stacks.most_common():
+                f.write(f"{stack} {count}\n")
+    with open(os.path.join(_output_dir, "memory_summary.json"), 'w', encoding='utf-8') as f:
+        json.dump(_memory, f, indent=2)
+
+    print("\n--- Profile summary ---")
+    for name, summary in _memory.items():
+        samples = sum(_stacks.get(name, Counter()).values())
+        print(f"   🔬 {name:<20} peak {summary['peak_mib']:>8.1f} MiB  net {summary['net_mib']:>+8.1f} MiB  {samples:>6} samples")
+    for name in sorted(set(_stacks) - set(_memory)):
+        print(f"   🔬 {name:<20} {'':>34}{sum(_stacks[name].values()):>6} samples")
+    mixed = [name for name, summary in _memory.items() if summary.get('pstats_include_other_threads')]
+    if mixed:
+        print(f"   ⚠️ On Python 3.12+ cProfile sees every thread; the pstats of {', '.join(mixed)} "
+              f"include calls from worker threads. Use the .collapsed stacks for those stages.")
+    print(f"✅ Profiles written to '{_output_dir}/'. Inspect with `python -m pstats` or a flame graph tool.")
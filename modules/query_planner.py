@@ -0,0 +1,147 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from config import (
+    JOB_SITES, RESULTS_WANTED, SCRAPE_BUDGET_TOTAL, SCRAPE_BUDGET_MIN_RESULTS,
+    SCRAPE_BUDGET_MAX_RESULTS, SCRAPE_BUDGET_EXPLORATION, QUERY_STATS_MIN_RUNS, QUERY_STATS_DECAY
+)
+from modules import tracker
+from modules.telemetry import DEBUG, log, set_gauge
+from modules.url_utils import canonicalize_url
+
+# How much a job reaching each stage is worth when scoring a query's yield
+STAGE_WEIGHTS = {'filtered': 1.0, 'ranked': 4.0, 'delivered': 8.0}
+# Pseudo-requests at the average yield rate, so a few lucky jobs don't swing a budget
+PRIOR_REQUESTS = 30
+# A query that returned fewer results than requested is capped at this multiple of them
+EXHAUSTED_HEADROOM = 1.5
+# Budgets are rounded to this step so sites with similar budgets share a JobSpy call
+BUDGET_STEP = 5
+
+
+def query_key(site: str, term: str, location: str) -> str:
+    return f"{site.lower()}|{term.lower()}|{location.lower()}"
+
+
+def _round_to_step(value: float) -> int:
+    return max(BUDGET_STEP, int(round(value / BUDGET_STEP)) * BUDGET_STEP)
+
+
+def _yield_rate(stats: Dict, mean_rate: float) -> float:
+    utility = sum(weight * stats.get(stage, 0) for stage, weight in STAGE_WEIGHTS.items())
+    return (utility + PRIOR_REQUESTS * mean_rate) / (stats.get('requested', 0) + PRIOR_REQUESTS)
+
+
+def _budget_cap(stats: Dict) -> float:
+    """Queries that ran dry last time can't use much more than they returned."""
+    last_requested, last_scraped = stats.get('last_requested'), stats.get('last_scraped')
+    if last_requested and last_scraped is not None and last_scraped < last_requested:
+        return max(SCRAPE_BUDGET_MIN_RESULTS, min(SCRAPE_BUDGET_MAX_RESULTS, last_scraped * EXHAUSTED_HEADROOM))
+    return SCRAPE_BUDGET_MAX_RESULTS
+
+
+def allocate_budgets(keys: List[str], stats: Dict[str, Dict], total: int) -> Dict[str, int]:
+    """
+    Splits `total` requested results over the query keys. New queries are explored
+    with RESULTS_WANTED; known ones share the rest, SCRAPE_BUDGET_EXPLORATION of it
+    evenly and the remainder in proportion to their smoothed yield rate, water-filling
+    past queries that hit their cap.
+    """
+    budgets = {}
+    known = []
+    for key in keys:
+        if stats.get(key, {}).get('runs', 0) >= QUERY_STATS_MIN_RUNS:
+            known.append(key)
+        else:
+            budgets[key] = RESULTS_WANTED
+    if not known:
+        return budgets
+
+    remaining = max(len(known) * SCRAPE_BUDGET_MIN_RESULTS, total - sum(budgets.values()))
+    total_requested = sum(stats[key].get('requested', 0) for key in known)
+    total_utility = sum(weight * stats[key].get(stage, 0)
+                        for key in known for stage, weight in STAGE_WEIGHTS.items())
+    mean_rate = total_utility / total_requested if total_requested else 0.0
+    # The epsilon keeps the split even when nothing has yielded yet.
+    weights = {key: _yield_rate(stats[key], mean_rate) + 1e-9 for key in known}
+    caps = {key: _budget_cap(stats[key]) for key in known}
+
+    floor_share = remaining * SCRAPE_BUDGET_EXPLORATION / len(known)
+    allocated = {key: min(caps[key], max(SCRAPE_BUDGET_MIN_RESULTS, floor_share)) for key in known}
+    pool = remaining - sum(allocated.values())
+    active = {key for key in known if allocated[key] < caps[key]}
+    while pool > 1 and active:
+        active_weight = sum(weights[key] for key in active)
+        overflow = 0.0
+        for key in list(active):
+            share = allocated[key] + pool * weights[key] / active_weight
+            if share >= caps[key]:
+                overflow += share - caps[key]
+                allocated[key] = caps[key]
+                active.discard(key)
+            else:
+                allocated[key] = share
+        pool = overflow
+
+    for key in known:
+        budgets[key] = min(SCRAPE_BUDGET_MAX_RESULTS, _round_to_step(allocated[key]))
+    return budgets
+
+
+class QueryPlan:
+    """
+    Results wanted per (site, term, location) query for one run, plus the per-query
+    counts of jobs reaching each stage. Jobs carry their originating `query_key`;
+    a job is counted once per stage even if it passes for several candidates.
+    """
+
+    def __init__(self, budgets: Dict[str, int]):
+        self.budgets = budgets
+        self._scraped: Dict[str, Dict[str, int]] = {}
+        self._stage_urls: Dict[str, Dict[str, str]] = {stage: {} for stage in STAGE_WEIGHTS}
+
+    def budget_for(self, site: str, term: str, location: str) -> int:
+        return self.budgets.get(query_key(site, term, location), RESULTS_WANTED)
+
+    def record_scraped(self, key: str, requested: int, scraped: int):
+        self._scraped[key] = {'requested': requested, 'scraped': scraped}
+
+    def count(self, stage: str, jobs: Iterable[Dict]):
+        stage_urls = self._stage_urls[stage]
+        for job in jobs:
+            key = job.get('query_key')
+            if key:
+                stage_urls.setdefault(canonicalize_url(job.get('job_url')) or str(job['id']), key)
+
+    def run_counts(self) -> Dict[str, Dict[str, int]]:
+        counts = {key: dict(values) for key, values in self._scraped.items()}
+        for stage, stage_urls in self._stage_urls.items():
+            for key in stage_urls.values():
+                entry = counts.setdefault(key, {})
+                entry[stage] = entry.get(stage, 0) + 1
+        return counts
+
+    def save(self):
+        """Folds this run's counts into the yield statistics stored in the tracker."""
+        tracker.record_query_yields(self.run_counts(), QUERY_STATS_DECAY)
+
+
+def plan_queries(queries: List[Tuple[str, str]], sites: Optional[List[str]] = None,
+                 total: Optional[int] = SCRAPE_BUDGET_TOTAL) -> QueryPlan:
+    """Builds this run's per-query budgets from the stored yield statistics."""
+    sites = sites or JOB_SITES
+    keys = [query_key(site, term, location) for term, location in queries for site in sites]
+    if total is None:
+        total = RESULTS_WANTED * len(keys)
+
+    stats = tracker.get_query_stats()
+    budgets = allocate_budgets(keys, stats, total)
+    explored = sum(1 for key in keys if stats.get(key, {}).get('runs', 0) < QUERY_STATS_MIN_RUNS)
+    set_gauge('scrape_budget_total', sum(budgets.values()))
+    exploring = f" ({explored} new, at {RESULTS_WANTED} each)" if explored else ""
+    print(f"🎯 Scrape budget: {sum(budgets.values())} results over {len(keys)} site queries{exploring}.")
+    adjusted = sorted((key for key in keys if budgets[key] != RESULTS_WANTED),
+                      key=lambda key: budgets[key], reverse=True)
+    for key in adjusted:
+        arrow = "⬆️" if budgets[key] > RESULTS_WANTED else "⬇️"
+        log(DEBUG, "   %s %s: %s", arrow, key, budgets[key])
+    return QueryPlan(budgets)
@@ -0,0 +1,144 @@
+import math
+from typing import Dict, List, Optional, Tuple
+
+from config import (
+    RANKING_MODE, RERANK_GEMINI_POOL, USER_MESSAGE, INCREMENTAL_RANKING, RANKING_ANCHOR_COUNT, MODEL_NAME
+)
+from models.gemini_output_models import RankedJob, RankingResponse
+from modules import tracker
+from modules.checkpoint import hash_value
+from modules.gemini_client import get_job_rankings
+from modules.nlp_processor import rerank_jobs
+from modules.telemetry import increment
+from modules.url_utils import canonicalize_url
+
+RANKING_MODES = ('gemini', 'hybrid', 'local')
+# Bump when the scoring prompt changes, so stored scores are not mixed with new ones
+RANKING_SCORE_VERSION = 1
+
+
+def local_rankings(reranked: List[Tuple[Dict, float]]) -> Dict:
+    """Builds a RankingResponse-shaped dict from cross-encoder (job, score) pairs."""
+    response = RankingResponse(ranked_jobs=[
+        RankedJob(
+            id=str(job['id']),
+            rank=rank,
+            # ms-marco cross-encoders emit relevance logits; squash them onto the 0-100 scale.
+            score=round(100 / (1 + math.exp(-score))),
+            company=str(job.get('company') or 'N/A'),
+            title=str(job.get('title') or 'N/A'),
+            url=str(job.get('job_url') or ''),
+            match_reason=f"Ranked locally by resume relevance (cross-encoder score {score:.2f}).",
+        )
+        for rank, (job, score) in enumerate(reranked, start=1)
+    ])
+    return response.model_dump()
+
+
+def ranking_scores_hash(resume_summary: str, user_message: str) -> str:
+    """Stored ranking scores are valid for one resume, user message and ranking model."""
+    return hash_value([resume_summary, user_message, MODEL_NAME, RANKING_SCORE_VERSION])
+
+
+def pick_anchors(scored: List[Dict], count: int = RANKING_ANCHOR_COUNT) -> List[Dict]:
+    """Up to `count` scored jobs spread evenly from the best to the worst score."""
+    by_score = sorted(scored, key=lambda ranked_job: ranked_job['score'], reverse=True)
+    if len(by_score) <= count:
+        return by_score
+    step = (len(by_score) - 1) / (count - 1) if count > 1 else 0
+    return [by_score[round(index * step)] for index in range(count)]
+
+
+def _score_key(job: Dict) -> str:
+    """Stored scores are keyed by canonical URL; a URL-less job only matches itself."""
+    return canonicalize_url(job.get('job_url')) or str(job['id'])
+
+
+def leaderboard(jobs: List[Dict], scored: Dict[str, Dict]) -> Dict:
+    """Ranks `jobs` by their stored scores into a RankingResponse dict; unscored jobs are left out."""
+    entries = []
+    for job in jobs:
+        ranked_job = scored.get(_score_key(job))
+        if ranked_job is not None:
+            # Scores outlive a run, but the job id and URL are this scrape's.
+            entries.append({**ranked_job, 'id': str(job['id']), 'url': str(job.get('job_url') or '')})
+    entries.sort(key=lambda entry: (-entry['score'], entry['rank']))
+    return RankingResponse(ranked_jobs=[
+        RankedJob(**{**entry, 'rank': rank}) for rank, entry in enumerate(entries, start=1)
+    ]).model_dump()
+
+
+def incremental_rankings(jobs: List[Dict], resume_summary: str,
+                         user_message: str = USER_MESSAGE) -> Optional[Dict]:
+    """
+    Ranks `jobs` on scores stored by earlier runs, asking Gemini to score only the
+    jobs it hasn't seen for this resume and user message. Previously scored jobs go
+    into the prompt as anchors so new scores land on the same scale.
+    """
+    scores_hash = ranking_scores_hash(resume_summary, user_message)
+    scored = tracker.load_ranking_scores(jobs, scores_hash)
+    new_jobs = [job for job in jobs if _score_key(job) not in scored]
+    increment('ranking_scores_reused', len(jobs) - len(new_jobs))
+    if not new_jobs:
+        print(f"♻️ All {len(jobs)} job(s) were scored in earlier runs; skipping Gemini.")
+        return leaderboard(jobs, scored)
+
+    if scored:
+        print(f"♻️ Reusing scores for {len(jobs) - len(new_jobs)} job(s); "
+              f"scoring {len(new_jobs)} new job(s) with Gemini.")
+    rankings = get_job_rankings(new_jobs, resume_summary, user_message,
+                                anchors=pick_anchors(list(scored.values())), score_every_job=True)
+    if not rankings or not rankings.get('ranked_jobs'):
+        return None
+
+    returned = {ranked_job['id']: ranked_job for ranked_job in rankings['ranked_jobs']}
+    new_scores = []
+    for job in new_jobs:
+        # Jobs Gemini leaves out count as scored 0, so they aren't sent again every run.
+        ranked_job = returned.get(str(job['id'])) or {
+            'id': str(job['id']), 'rank': len(returned) + 1, 'score': 0,
+            'company': str(job.get('company') or 'N/A'), 'title': str(job.get('title') or 'N/A'),
+            'url': str(job.get('job_url') or ''), 'match_reason': "Not among Gemini's matches."}
+        new_scores.append((job, ranked_job))
+        scored[_score_key(job)] = ranked_job
+    tracker.record_ranking_scores(new_scores, scores_hash)
+    increment('ranking_scores_new', len(new_scores))
+    return leaderboard(jobs, scored)
+
+
+def gemini_rankings(jobs: List[Dict], resume_summary: str, user_message: str = USER_MESSAGE) -> Optional[Dict]:
+    if INCREMENTAL_RANKING:
+        return incremental_rankings(jobs, resume_summary, user_message)
+    return get_job_rankings(jobs, resume_summary, user_message)
+
+
+def rank_jobs(jobs: List[Dict], resume_summary: str, user_message: str = USER_MESSAGE,
+              mode: str = RANKING_MODE) -> Optional[Dict]:
+    """
+    Ranks the similarity shortlist according to RANKING_MODE and returns a
+    RankingResponse dict. In hybrid mode a failed Gemini call falls back to the
+    local ranking instead of dropping the run.
+    """
+    mode = mode.lower()
+    if mode not in RANKING_MODES:
+        print(f"⚠️ Unknown ranking mode '{mode}'; using 'gemini'.")
+        mode = 'gemini'
+    if mode == 'gemini':
+        return gemini_rankings(jobs, resume_summary, user_message)
+
+    print(f"🔁 Reranking {len(jobs)} job(s) locally with the cross-encoder...")
+    reranked = rerank_jobs(jobs, resume_summary)
+    if mode == 'local':
+        increment('rankings', mode='local')
+        print("✅ Ranked jobs locally; skipping Gemini.")
+        return local_rankings(reranked)
+
+    shortlist = [job for job, _ in reranked[:RERANK_GEMINI_POOL]]
+    print(f"✨ Sending the top {len(shortlist)} of {len(jobs)} job(s) to Gemini for the final ranking.")
+    rankings = gemini_rankings(shortlist, resume_summary, user_message)
+    if rankings and rankings.get('ranked_jobs'):
+        increment('rankings', mode='hybrid')
+        return rankings
+    increment('rankings', mode='hybrid_fallback')
+    print("⚠️ Gemini ranking failed; using the local cross-encoder ranking instead.")
+    return local_rankings(reranked)
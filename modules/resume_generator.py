@@ -1,9 +1,17 @@
 import os
+import hashlib
 import subprocess
+import threading
 from typing import Dict, List, Optional, Tuple
 
 from config import OUTPUT_DIR
 from PyPDF2 import PdfReader
+from modules.layout_model import (
+    estimate_chars_per_line, estimate_block_lines, estimate_item_lines,
+    extract_block_sections, get_line_budget, record_compile_result
+)
+from modules.telemetry import span, increment
+from modules.latex_format import find_format
 
 
 TAILORED_SECTION_START = "% === TAILORED_CONTENT_START ==="
@@ -27,6 +35,19 @@ DEFAULT_HIGHLIGHT_BULLETS = [
     "Comfortable adapting project deliverables to stakeholder needs under tight deadlines."
 ]
 
+# Minimum number of items kept per section when trimming to fit the line budget.
+MIN_SUMMARY_BULLETS = 2
+MIN_KEYWORD_LINES = 2
+MIN_HIGHLIGHT_BULLETS = 2
+KEYWORD_SEPARATOR = " | "
+# Content variants Gemini writes per job, largest first; the top-level fields are 'full'.
+CONTENT_VARIANTS = ('full', 'compact', 'minimal')
+
+# Compile workers run concurrently; jobs that map to the same file name must not
+# write and compile the same .tex file at the same time.
+_compile_locks: Dict[str, threading.Lock] = {}
+_compile_locks_guard = threading.Lock()
+
 
 def _escape_latex(text: str) -> str:
     if not text:
@@ -82,15 +103,87 @@ def _build_itemize_block(items: List[str]) -> str:
     return "\n".join(f"    \\item {item}" for item in items)
 
 
-def _build_tailored_block(content: Dict[str, List[str]], job: Dict) -> Tuple[str, bool]:
+def _pack_keywords(keywords: List[str], chars_per_line: int) -> List[str]:
+    """Joins keyword phrases into as few lines as fit the template width."""
+    packed: List[str] = []
+    for keyword in keywords:
+        if packed and estimate_item_lines([packed[-1] + KEYWORD_SEPARATOR + keyword], chars_per_line) == 1:
+            packed[-1] = packed[-1] + KEYWORD_SEPARATOR + keyword
+        else:
+            packed.append(keyword)
+    return packed
+
+
+def _fit_to_line_budget(sections: List[List[str]], chars_per_line: int, line_budget: int) -> List[List[str]]:
+    """
+    Trims the tailored sections until the predicted block fits the line budget.
+    Keywords are packed onto shared lines first, then trailing items are dropped
+    from whichever section currently takes up the most lines.
+    """
+    summary_bullets, keywords, highlight_bullets = (list(items) for items in sections)
+    if estimate_block_lines([summary_bullets, keywords, highlight_bullets], chars_per_line) <= line_budget:
+        return [summary_bullets, keywords, highlight_bullets]
+
+    keywords = _pack_keywords(keywords, chars_per_line)
+    minimums = [MIN_SUMMARY_BULLETS, MIN_KEYWORD_LINES, MIN_HIGHLIGHT_BULLETS]
+    trimmed = [summary_bullets, keywords, highlight_bullets]
+
+    while estimate_block_lines(trimmed, chars_per_line) > line_budget:
+        candidates = [idx for idx, items in enumerate(trimmed)
+                      if len(items) > minimums[idx]]
+        if not candidates:
+            break
+        largest = max(candidates, key=lambda idx: estimate_item_lines(
+            trimmed[idx], chars_per_line))
+        trimmed[largest] = trimmed[largest][:-1]
+
+    return trimmed
+
+
+def _normalised_sections(content: Dict[str, List[str]]) -> Tuple[List[List[str]], bool]:
+    """The escaped summary, keyword and highlight items, and whether any came from `content`."""
     summary_bullets, summary_used = _normalise_items(content.get(
         'summary_bullets') if content else None, DEFAULT_SUMMARY_BULLETS, 3)
     keywords, keywords_used = _normalise_items(content.get(
         'keywords') if content else None, DEFAULT_KEYWORDS, 8)
     highlight_bullets, highlights_used = _normalise_items(content.get(
         'highlight_bullets') if content else None, DEFAULT_HIGHLIGHT_BULLETS, 3)
+    return [summary_bullets, keywords, highlight_bullets], summary_used or keywords_used or highlights_used
 
-    ai_content_used = summary_used or keywords_used or highlights_used
+
+def content_variants(content: Optional[Dict]) -> List[Tuple[str, Dict[str, List[str]]]]:
+    """
+    The (name, content) variants of a tailoring payload, largest first. Payloads
+    from before variants existed (or a failed call) have just the 'full' one.
+    """
+    content = content or {}
+    variants = [('full', content)]
+    for name in CONTENT_VARIANTS[1:]:
+        if isinstance(content.get(name), dict):
+            variants.append((name, content[name]))
+    return variants
+
+
+def _choose_variant(variants: List[Tuple[str, Dict]], chars_per_line: int, line_budget: int) -> int:
+    """The index of the largest variant predicted to fit the line budget, else the smallest one."""
+    for index, (_, variant) in enumerate(variants):
+        sections, _ = _normalised_sections(variant)
+        if estimate_block_lines(sections, chars_per_line) <= line_budget:
+            return index
+    return len(variants) - 1
+
+
+def _build_tailored_block(content: Dict[str, List[str]], chars_per_line: Optional[int] = None, line_budget: Optional[int] = None) -> Tuple[str, bool]:
+    (summary_bullets, keywords, highlight_bullets), ai_content_used = _normalised_sections(content)
+
+    if chars_per_line and line_budget:
+        sections = [summary_bullets, keywords, highlight_bullets]
+        predicted_lines = estimate_block_lines(sections, chars_per_line)
+        if predicted_lines > line_budget:
+            summary_bullets, keywords, highlight_bullets = _fit_to_line_budget(
+                sections, chars_per_line, line_budget)
+            print(
+                f"   ✂️ Tailored block predicted at {predicted_lines} lines (budget {line_budget}). Trimmed to {estimate_block_lines([summary_bullets, keywords, highlight_bullets], chars_per_line)} lines before compiling.")
 
     block = f"""\\section{{Role Alignment Summary}}
 \\begin{{itemize}}
@@ -125,13 +218,62 @@ def _replace_tailored_block(latex_source: str, new_block: str) -> str:
     return f"{before}\n{new_block.strip()}\n{after}"
 
 
-def prepare_resume_latex(base_latex: str, job: Dict, tailored_content: Optional[Dict[str, List[str]]] = None) -> Tuple[str, bool]:
-    """Injects tailored content into the resume template and returns the updated LaTeX along with a flag indicating whether AI content was used."""
+def _default_block_lines(chars_per_line: int) -> int:
+    defaults = [[_escape_latex(item) for item in items] for items in (
+        DEFAULT_SUMMARY_BULLETS, DEFAULT_KEYWORDS, DEFAULT_HIGHLIGHT_BULLETS)]
+    return estimate_block_lines(defaults, chars_per_line)
+
+
+def _extract_tailored_block(latex_source: str) -> Optional[str]:
+    start_idx = latex_source.find(TAILORED_SECTION_START)
+    end_idx = latex_source.find(TAILORED_SECTION_END)
+    if start_idx == -1 or end_idx == -1 or end_idx <= start_idx:
+        return None
+    return latex_source[start_idx + len(TAILORED_SECTION_START):end_idx]
+
+
+def _layout_template_key(latex_source: str) -> str:
+    """Hashes the template with the tailored block left out, so every tailoring of it shares a key."""
+    start_idx = latex_source.find(TAILORED_SECTION_START)
+    end_idx = latex_source.find(TAILORED_SECTION_END)
+    if start_idx != -1 and end_idx > start_idx:
+        latex_source = latex_source[:start_idx + len(TAILORED_SECTION_START)] + latex_source[end_idx:]
+    return hashlib.md5(latex_source.encode('utf-8')).hexdigest()
+
 
+def prepare_resume_latex(base_latex: str, job: Dict, tailored_content: Optional[Dict[str, List[str]]] = None,
+                         first_variant: int = 0) -> Tuple[str, bool, int]:
+    """
+    Injects tailored content into the resume template. Uses the largest content
+    variant, from index `first_variant` on, that fits the line budget learned from
+    past compiles. Returns the updated LaTeX, whether AI content was used, and
+    the index of the variant used, so an overflowing compile can retry smaller ones.
+    """
+
+    chars_per_line = estimate_chars_per_line(base_latex)
+    line_budget = get_line_budget(
+        _layout_template_key(base_latex), chars_per_line, _default_block_lines(chars_per_line))
+    variants = content_variants(tailored_content)
+    start = min(first_variant, len(variants) - 1)
+    index = start + _choose_variant(variants[start:], chars_per_line, line_budget)
+    if index > 0:
+        print(f"   📐 Using the '{variants[index][0]}' content variant to fit the page.")
+    increment('tailoring_variant_used', variant=variants[index][0])
     new_block, used_ai_content = _build_tailored_block(
-        tailored_content or {}, job)
+        variants[index][1], chars_per_line, line_budget)
     updated_latex = _replace_tailored_block(base_latex, new_block)
-    return updated_latex, used_ai_content
+    return updated_latex, used_ai_content, index
+
+
+def record_layout_result(latex_source: str, page_count: int):
+    """Feeds the page count of a compiled resume back into the layout length model."""
+    block = _extract_tailored_block(latex_source)
+    if block is None:
+        return
+    chars_per_line = estimate_chars_per_line(latex_source)
+    block_lines = estimate_block_lines(
+        extract_block_sections(block), chars_per_line)
+    record_compile_result(_layout_template_key(latex_source), block_lines, chars_per_line, page_count)
 
 
 def get_pdf_page_count(pdf_path):
@@ -147,51 +289,79 @@ def get_pdf_page_count(pdf_path):
         return 0
 
 
-def create_resume_pdf(modified_latex_content, job):
+def create_resume_pdf(modified_latex_content, job, output_dir=OUTPUT_DIR):
     """
-    Saves the modified LaTeX content and compiles it into a PDF.
+    Saves the modified LaTeX content and compiles it into a PDF in `output_dir`.
     Returns the path to the generated PDF on success, otherwise None.
     """
-    if not os.path.exists(OUTPUT_DIR):
-        os.makedirs(OUTPUT_DIR)
+    os.makedirs(output_dir, exist_ok=True)
 
     company_name = str(job.get('company', 'UnknownCompany')
                        ).replace(' ', '_').replace('/', '_')
     job_title = str(job.get('title', 'UnknownTitle')
                     ).replace(' ', '_').replace('/', '_')
     base_filename = f"Resume_{company_name}_{job_title[:30]}"
-    tex_filepath = os.path.join(OUTPUT_DIR, f"{base_filename}.tex")
-    pdf_filepath = os.path.join(OUTPUT_DIR, f"{base_filename}.pdf")
+    tex_filepath = os.path.join(output_dir, f"{base_filename}.tex")
+    pdf_filepath = os.path.join(output_dir, f"{base_filename}.pdf")
 
-    print(f"📄 Compiling PDF: {base_filename}.pdf")
+    with _get_compile_lock(tex_filepath):
+        return _compile_latex(modified_latex_content, base_filename, tex_filepath, pdf_filepath, output_dir)
+
+
+def _get_compile_lock(tex_filepath: str) -> threading.Lock:
+    with _compile_locks_guard:
+        return _compile_locks.setdefault(tex_filepath, threading.Lock())
+
+
+def _run_pdflatex(tex_filepath, output_dir, format_path=None):
+    command = ['pdflatex', '-interaction=nonstopmode', '-halt-on-error']
+    if format_path:
+        command.append(f'-fmt={format_path}')
+    command += ['-output-directory', output_dir, tex_filepath]
+    with span('pdflatex', precompiled=bool(format_path)):
+        return subprocess.run(command, check=True, capture_output=True, text=True, timeout=30)
+
+
+def _compile_with_format(modified_latex_content, tex_filepath, output_dir) -> bool:
+    """Compiles against a precompiled preamble when one matches; False means compile normally."""
+    format_path, body = find_format(modified_latex_content)
+    if not format_path:
+        return False
+    with open(tex_filepath, 'w', encoding='utf-8') as f:
+        f.write(body)
+    try:
+        _run_pdflatex(tex_filepath, output_dir, format_path)
+    except (subprocess.CalledProcessError, subprocess.TimeoutExpired):
+        increment('latex_format_fallbacks')
+        print("   ⚠️ Precompiled preamble failed for this document; compiling normally.")
+        return False
+    # Keep the saved .tex self-contained for anyone recompiling it by hand.
     with open(tex_filepath, 'w', encoding='utf-8') as f:
         f.write(modified_latex_content)
+    return True
 
+
+def _compile_latex(modified_latex_content, base_filename, tex_filepath, pdf_filepath, output_dir=OUTPUT_DIR):
+    print(f"📄 Compiling PDF: {base_filename}.pdf")
+    increment('latex_compile_attempts')
     try:
-        result = subprocess.run(
-            [
-                'pdflatex',
-                '-interaction=nonstopmode',
-                '-halt-on-error',
-                '-output-directory', OUTPUT_DIR,
-                tex_filepath
-            ],
-            check=True,
-            capture_output=True,
-            text=True,
-            timeout=30
-        )
+        if not _compile_with_format(modified_latex_content, tex_filepath, output_dir):
+            with open(tex_filepath, 'w', encoding='utf-8') as f:
+                f.write(modified_latex_content)
+            _run_pdflatex(tex_filepath, output_dir)
         print(f"✅ Successfully created: {base_filename}.pdf")
 
         for ext in ['.aux', '.log', '.out']:
-            aux_file = os.path.join(OUTPUT_DIR, f"{base_filename}{ext}")
+            aux_file = os.path.join(output_dir, f"{base_filename}{ext}")
             if os.path.exists(aux_file):
                 os.remove(aux_file)
         return pdf_filepath
     except FileNotFoundError:
+        increment('latex_compile_failures', reason='missing_pdflatex')
         print("❌ 'pdflatex' not found. Ensure a LaTeX distribution is installed and in your PATH.")
         return None
     except subprocess.CalledProcessError as e:
+        increment('latex_compile_failures', reason='error')
         if e.stdout:
             print(f"❌ LaTeX stdout for {tex_filepath}:\n{e.stdout}")
         if e.stderr:
@@ -201,6 +371,7 @@ def create_resume_pdf(modified_latex_content, job):
                 f"❌ Failed to compile {tex_filepath}. No stderr output was produced.")
         return None
     except subprocess.TimeoutExpired:
+        increment('latex_compile_failures', reason='timeout')
         print(f"❌ Compilation timed out for {tex_filepath}.")
         return None
 
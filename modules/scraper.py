@@ -1,16 +1,228 @@
 import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import jobspy
 import pandas as pd
+from jobspy.linkedin import LinkedIn
+from jobspy.model import ScraperInput, Site
 from datetime import datetime, timedelta
 from config import (
     SEARCH_TERMS, LOCATIONS, JOB_SITES, RESULTS_WANTED, COUNTRY_INDEED, USE_PROXIES_IN_WORKFLOW,
-    MAX_JOB_AGE_DAYS
+    MAX_JOB_AGE_DAYS, USE_ENHANCED_DATA_FETCHING, DESCRIPTION_FETCH_WORKERS
 )
+from modules import profiler
+from modules.telemetry import span, increment
+from modules.job_table import JobTable
+from modules.url_utils import canonicalize_url, job_id_for_job, job_key
+from modules.query_planner import query_key
 
 ZYTE_CERT_PATH = "zyte-proxy-ca.crt"
+REMOTE_QUERY = "remote"
+# Job page fields filled in by the second scrape phase when the listing lacks them
+DETAIL_FIELDS = ['description', 'job_level', 'company_industry', 'job_url_direct',
+                 'job_function', 'company_logo']
+_LINKEDIN_JOB_ID = re.compile(r'/jobs/view/(\d+)')
 
 
-def run_scraper():
+def _count_scraped(jobs_df):
+    if jobs_df is None or jobs_df.empty:
+        return
+    if 'site' in jobs_df.columns:
+        for site, count in jobs_df['site'].value_counts().items():
+            increment('scraped_rows', int(count), site=site)
+    else:
+        increment('scraped_rows', len(jobs_df))
+
+
+def _drop_duplicate_postings(jobs_df):
+    """Drops repeated postings by `job_key`: the canonical URL, or site/company/title/location without one."""
+    keys = jobs_df['canonical_url'].copy()
+    missing = keys.isna()
+    if missing.any():
+        keys[missing] = jobs_df[missing].apply(lambda row: job_key(row), axis=1)
+    return jobs_df[~keys.duplicated()]
+
+
+def _drop_seen_jobs(jobs_df, is_seen):
+    """
+    Canonicalizes a freshly scraped batch and drops postings already processed in
+    earlier runs, so they never reach the (growing) concatenated frame.
+    """
+    if jobs_df is None or jobs_df.empty or 'job_url' not in jobs_df.columns:
+        return jobs_df, 0
+    jobs_df = jobs_df.copy()
+    jobs_df['canonical_url'] = jobs_df['job_url'].map(canonicalize_url)
+    jobs_df = _drop_duplicate_postings(jobs_df)
+    if is_seen is None:
+        return jobs_df, 0
+
+    seen_urls = is_seen(jobs_df['job_url'].tolist())
+    if seen_urls:
+        seen_canonical = {canonicalize_url(url) for url in seen_urls}
+        seen_mask = jobs_df['canonical_url'].isin(seen_canonical)
+        increment('scrape_seen_dropped', int(seen_mask.sum()))
+        return jobs_df[~seen_mask], int(seen_mask.sum())
+    return jobs_df, 0
+
+
+def _collect_batch(jobs_df, scraped_frames, is_seen) -> int:
+    """Appends the unseen part of a batch and returns how many rows were dropped as seen."""
+    if jobs_df is None or jobs_df.empty:
+        return 0
+    unseen_df, dropped = _drop_seen_jobs(jobs_df, is_seen)
+    if not unseen_df.empty:
+        scraped_frames.append(unseen_df)
+    return dropped
+
+
+def _site_groups(term: str, location: str, plan) -> dict[int, list[str]]:
+    """Groups JOB_SITES by their results budget, so sites sharing one are scraped in one call."""
+    if plan is None:
+        return {RESULTS_WANTED: list(JOB_SITES)}
+    groups = {}
+    for site in JOB_SITES:
+        groups.setdefault(plan.budget_for(site, term, location), []).append(site)
+    return groups
+
+
+def _record_query_batch(jobs_df, term: str, location: str, sites: list[str], results_wanted: int, plan):
+    """Tags each scraped row with the query it came from and records the per-site counts."""
+    if jobs_df is not None and not jobs_df.empty and 'site' in jobs_df.columns:
+        jobs_df['query_key'] = jobs_df['site'].map(lambda site: query_key(str(site), term, location))
+        site_counts = jobs_df['site'].astype(str).str.lower().value_counts().to_dict()
+    else:
+        site_counts = {}
+    if plan is not None:
+        for site in sites:
+            plan.record_scraped(query_key(site, term, location), results_wanted,
+                                int(site_counts.get(site.lower(), 0)))
+
+
+def build_search_queries(search_terms=None, locations=None) -> list[tuple[str, str]]:
+    """
+    Expands search terms and locations into (term, location) queries. A 'remote'
+    location becomes a single REMOTE_QUERY per term instead of a place name.
+    """
+    search_terms = SEARCH_TERMS if search_terms is None else search_terms
+    locations = LOCATIONS if locations is None else locations
+    physical_locations = [loc for loc in locations if loc.lower() != REMOTE_QUERY]
+    scrape_for_remote = any(loc.lower() == REMOTE_QUERY for loc in locations)
+
+    queries = []
+    for term in search_terms:
+        queries += [(term, location) for location in physical_locations]
+        if scrape_for_remote:
+            queries.append((term, REMOTE_QUERY))
+    return queries
+
+
+def _is_missing(value) -> bool:
+    return value is None or (not isinstance(value, (list, tuple)) and pd.isna(value)) or value == ''
+
+
+def drop_rejected_listings(jobs: list[dict], listing_filter) -> list[dict]:
+    """
+    First-phase filter: `listing_filter` takes a job built from its listing alone and
+    returns a rejection reason (or None to keep it), so rejected jobs never cost a
+    job page request.
+    """
+    kept = []
+    rejected = {}
+    for job in jobs:
+        reason = listing_filter(job)
+        if reason is None:
+            kept.append(job)
+        else:
+            rejected[reason] = rejected.get(reason, 0) + 1
+    for reason, count in rejected.items():
+        increment('scrape_listing_dropped', count, reason=reason)
+    if rejected:
+        details = ', '.join(f"{count} {reason}" for reason, count in rejected.items())
+        print(f"🧹 Dropped {len(jobs) - len(kept)} listing(s) before fetching descriptions ({details}).")
+    return kept
+
+
+def _linkedin_details_fetcher(proxies, ca_cert):
+    """
+    Returns fetch(job_id) -> dict of job page details, parsed by JobSpy's LinkedIn
+    scraper. Each worker thread gets its own scraper and HTTP session.
+    """
+    local = threading.local()
+
+    def fetch(job_id: str) -> dict:
+        scraper = getattr(local, 'scraper', None)
+        if scraper is None:
+            scraper = local.scraper = LinkedIn(proxies=proxies or None, ca_cert=ca_cert)
+            scraper.scraper_input = ScraperInput(site_type=[Site.LINKEDIN])
+        return scraper._get_job_details(job_id)
+    return fetch
+
+
+def _apply_details(job: dict, details: dict):
+    for field in DETAIL_FIELDS:
+        if details.get(field) and _is_missing(job.get(field)):
+            job[field] = details[field]
+    job_types = details.get('job_type')
+    if job_types and _is_missing(job.get('job_type')):
+        job['job_type'] = ", ".join(job_type.value[0] for job_type in job_types)
+
+
+def fetch_missing_descriptions(jobs: list[dict], proxies=None, ca_cert=None,
+                               workers: int = DESCRIPTION_FETCH_WORKERS) -> int:
+    """
+    Second phase: fetches the job pages of LinkedIn listings that came without a
+    description, concurrently, and fills in the description and structured fields
+    in place. Indeed, Google and Naukri listings already carry their descriptions.
+    Returns the number of jobs that received a description.
+    """
+    pending = []
+    for job in jobs:
+        if not _is_missing(job.get('description')):
+            continue
+        match = _LINKEDIN_JOB_ID.search(str(job.get('job_url', '')))
+        if str(job.get('site', '')).lower() == 'linkedin' and match:
+            pending.append((job, match.group(1)))
+    if not pending:
+        return 0
+
+    print(f"📄 Fetching descriptions for {len(pending)} listing(s) with {workers} worker(s)...")
+    fetch = _linkedin_details_fetcher(proxies, ca_cert)
+
+    def fetch_in_stage(item):
+        with profiler.stage('fetch_descriptions'):
+            return fetch(item[1])
+
+    with span('fetch_descriptions'):
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="describe") as executor:
+            all_details = list(executor.map(fetch_in_stage, pending))
+
+    fetched = 0
+    for (job, _), details in zip(pending, all_details):
+        _apply_details(job, details or {})
+        if not _is_missing(job.get('description')):
+            fetched += 1
+    increment('descriptions_fetched', fetched)
+    if fetched < len(pending):
+        increment('description_fetch_failures', len(pending) - fetched)
+        print(f"⚠️ Could not fetch {len(pending) - fetched} description(s); those jobs keep their listing data.")
+    return fetched
+
+
+def run_scraper(is_seen=None, queries=None, listing_filter=None, plan=None):
+    """
+    Scrapes every (term, location) query, by default those built from config.py.
+    `is_seen` takes a list of job URLs and returns the ones already processed;
+    those are dropped from each batch as it arrives. A QueryPlan sets the results
+    wanted per site and query (RESULTS_WANTED otherwise) and collects their counts.
+
+    With USE_ENHANCED_DATA_FETCHING the scrape runs in two phases: listings are
+    fetched without descriptions, `listing_filter` (see drop_rejected_listings)
+    drops what it can from the listing alone, and only the survivors get their job
+    pages fetched. Otherwise every description is fetched up front.
+
+    Returns JobViews over a single JobTable; they read like the job dicts of old.
+    """
     print("Starting job scrape...")
 
     proxies_to_use = []
@@ -33,49 +245,42 @@ def run_scraper():
     print(
         f"⏱️ Restricting scrape to jobs from the last {MAX_JOB_AGE_DAYS} day(s) (~{hours_old_window} hours).")
 
-    all_jobs_df = pd.DataFrame()
-    physical_locations = [loc for loc in LOCATIONS if loc.lower() != 'remote']
-    scrape_for_remote = 'remote' in [loc.lower() for loc in LOCATIONS]
-
-    for term in SEARCH_TERMS:
-        for location in physical_locations:
+    scraped_frames = []
+    seen_dropped = 0
+    for term, location in queries or build_search_queries():
+        if location == REMOTE_QUERY:
+            print(f"Scraping for REMOTE '{term}' jobs...")
+            location_args = {'is_remote': True}
+        else:
             print(f"Scraping for '{term}' in '{location}'...")
-            jobs_df = jobspy.scrape_jobs(
-                site_name=JOB_SITES,
-                search_term=term,
-                location=location,
-                results_wanted=RESULTS_WANTED,
-                country_indeed=COUNTRY_INDEED,
-                proxies=proxies_to_use,
-                hours_old=hours_old_window,
-                ca_cert=ca_cert_to_use,
-            )
-            if jobs_df is not None and not jobs_df.empty:
-                all_jobs_df = pd.concat(
-                    [all_jobs_df, jobs_df], ignore_index=True)
+            location_args = {'location': location}
+        for results_wanted, sites in _site_groups(term, location, plan).items():
+            with span('scrape_query', location='remote' if location == REMOTE_QUERY else 'onsite'):
+                jobs_df = jobspy.scrape_jobs(
+                    site_name=sites,
+                    search_term=term,
+                    results_wanted=results_wanted,
+                    country_indeed=COUNTRY_INDEED,
+                    proxies=proxies_to_use,
+                    hours_old=hours_old_window,
+                    ca_cert=ca_cert_to_use,
+                    linkedin_fetch_description=not USE_ENHANCED_DATA_FETCHING,
+                    **location_args,
+                )
+            _record_query_batch(jobs_df, term, location, sites, results_wanted, plan)
+            _count_scraped(jobs_df)
+            seen_dropped += _collect_batch(jobs_df, scraped_frames, is_seen)
 
-        if scrape_for_remote:
-            print(f"Scraping for REMOTE '{term}' jobs...")
-            jobs_df = jobspy.scrape_jobs(
-                site_name=JOB_SITES,
-                search_term=term,
-                is_remote=True,
-                results_wanted=RESULTS_WANTED,
-                country_indeed=COUNTRY_INDEED,
-                proxies=proxies_to_use,
-                hours_old=hours_old_window,
-                ca_cert=ca_cert_to_use,
-            )
-            if jobs_df is not None and not jobs_df.empty:
-                all_jobs_df = pd.concat(
-                    [all_jobs_df, jobs_df], ignore_index=True)
+    if seen_dropped:
+        print(f"🧹 Skipped {seen_dropped} previously processed job(s) while scraping.")
 
     # all_jobs_df.to_csv("all_scraped_jobs.csv", index=False)
-    if all_jobs_df.empty:
-        print("❌ No jobs found after scraping.")
+    if not scraped_frames:
+        print("❌ No new jobs found after scraping.")
         return []
 
-    all_jobs_df.drop_duplicates(subset=['job_url'], inplace=True)
+    all_jobs_df = pd.concat(scraped_frames, ignore_index=True)
+    all_jobs_df = _drop_duplicate_postings(all_jobs_df)
 
     if 'date_posted' in all_jobs_df.columns:
         cutoff_timestamp = datetime.utcnow() - timedelta(days=MAX_JOB_AGE_DAYS)
@@ -104,9 +309,16 @@ def run_scraper():
         print("❌ No jobs remain after applying recency filters.")
         return []
 
-    all_jobs_df['id'] = all_jobs_df['job_url'].apply(lambda x: str(hash(x)))
-    print(f"✅ Scraped a total of {len(all_jobs_df)} unique jobs.")
-    return all_jobs_df.to_dict('records')
+    all_jobs_df['id'] = all_jobs_df.apply(lambda row: job_id_for_job(row), axis=1)
+    jobs = JobTable.from_frame(all_jobs_df).views()
+    if USE_ENHANCED_DATA_FETCHING:
+        if listing_filter is not None:
+            jobs = drop_rejected_listings(jobs, listing_filter)
+        fetch_missing_descriptions(jobs, proxies_to_use, ca_cert_to_use)
+
+    increment('jobs_out', len(jobs), stage='scrape')
+    print(f"✅ Scraped a total of {len(jobs)} unique jobs.")
+    return jobs
 
 
 if __name__ == "__main__":
@@ -0,0 +1,178 @@
+import os
+import re
+import json
+import time
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from config import LOG_LEVEL, RUN_REPORT_JSON_PATH, RUN_REPORT_PROM_PATH
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+_LEVELS = {'DEBUG': DEBUG, 'INFO': INFO, 'WARNING': WARNING, 'ERROR': ERROR}
+
+METRIC_PREFIX = "jobassist"
+
+_lock = threading.Lock()
+_spans: Dict[Tuple, Dict] = {}
+_counters: Dict[Tuple, float] = {}
+_gauges: Dict[Tuple, float] = {}
+_run_started_at = datetime.now()
+_level = _LEVELS.get(os.getenv('LOG_LEVEL', LOG_LEVEL).upper(), INFO)
+
+
+def _key(name: str, labels: Dict) -> Tuple:
+    return (name,) + tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def log(level: int, message: str, *args):
+    """Prints a message only when its level is enabled. Formatting is deferred until then."""
+    if level < _level:
+        return
+    print(message % args if args else message)
+
+
+def increment(name: str, value: float = 1, /, **labels):
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def set_gauge(name: str, value: float, /, **labels):
+    with _lock:
+        _gauges[_key(name, labels)] = value
+
+
+@contextmanager
+def span(name: str, /, **labels):
+    """Times a block of work and aggregates its duration under the span name and labels."""
+    started = time.perf_counter()
+    status = 'ok'
+    try:
+        yield
+    except BaseException:
+        status = 'error'
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        key = _key(name, labels)
+        with _lock:
+            stats = _spans.setdefault(
+                key, {'count': 0, 'total_seconds': 0.0, 'max_seconds': 0.0, 'errors': 0})
+            stats['count'] += 1
+            stats['total_seconds'] += elapsed
+            stats['max_seconds'] = max(stats['max_seconds'], elapsed)
+            if status == 'error':
+                stats['errors'] += 1
+
+
+def _labels_of(key: Tuple) -> Dict[str, str]:
+    return dict(key[1:])
+
+
+def build_report() -> Dict:
+    with _lock:
+        return {
+            'run_started_at': _run_started_at.isoformat(),
+            'generated_at': datetime.now().isoformat(),
+            'spans': [
+                {'name': key[0], 'labels': _labels_of(key), **{
+                    k: round(v, 4) if isinstance(v, float) else v for k, v in stats.items()}}
+                for key, stats in sorted(_spans.items())
+            ],
+            'counters': [
+                {'name': key[0], 'labels': _labels_of(key), 'value': value}
+                for key, value in sorted(_counters.items())
+            ],
+            'gauges': [
+                {'name': key[0], 'labels': _labels_of(key), 'value': value}
+                for key, value in sorted(_gauges.items())
+            ],
+        }
+
+
+def _metric_name(name: str) -> str:
+    return f"{METRIC_PREFIX}_{re.sub(r'[^a-zA-Z0-9_]', '_', name)}"
+
+
+def _escape_label_value(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    parts = [f'{k}="{_escape_label_value(v)}"' for k, v in sorted(labels.items())]
+    return "{" + ",".join(parts) + "}"
+
+
+def render_prometheus(report: Optional[Dict] = None) -> str:
+    """Renders a run report in the Prometheus text exposition format."""
+    report = report or build_report()
+    lines = []
+    span_metric = _metric_name('span_duration_seconds')
+    lines.append(f"# TYPE {span_metric} summary")
+    for entry in report['spans']:
+        labels = {'span': entry['name'], **entry['labels']}
+        lines.append(f"{span_metric}_sum{_format_labels(labels)} {entry['total_seconds']}")
+        lines.append(f"{span_metric}_count{_format_labels(labels)} {entry['count']}")
+    lines.append(f"# TYPE {span_metric}_max gauge")
+    for entry in report['spans']:
+        labels = {'span': entry['name'], **entry['labels']}
+        lines.append(f"{span_metric}_max{_format_labels(labels)} {entry['max_seconds']}")
+
+    declared = set()
+    for entry in report['counters']:
+        metric = _metric_name(entry['name']) + "_total"
+        if metric not in declared:
+            lines.append(f"# TYPE {metric} counter")
+            declared.add(metric)
+        lines.append(f"{metric}{_format_labels(entry['labels'])} {entry['value']}")
+    for entry in report['gauges']:
+        metric = _metric_name(entry['name'])
+        if metric not in declared:
+            lines.append(f"# TYPE {metric} gauge")
+            declared.add(metric)
+        lines.append(f"{metric}{_format_labels(entry['labels'])} {entry['value']}")
+    return "\n".join(lines) + "\n"
+
+
+def write_report(json_path: str = RUN_REPORT_JSON_PATH, prom_path: str = RUN_REPORT_PROM_PATH):
+    """Writes the run report as JSON and as Prometheus text."""
+    report = build_report()
+    try:
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        with open(prom_path, 'w', encoding='utf-8') as f:
+            f.write(render_prometheus(report))
+        print(f"📊 Run report written to '{json_path}' and '{prom_path}'.")
+    except IOError as e:
+        print(f"⚠️ Could not write run report: {e}")
+
+
+def print_stage_summary():
+    """Prints the slowest spans so the console log shows where the minutes went."""
+    report = build_report()
+    spans = sorted(report['spans'], key=lambda s: s['total_seconds'], reverse=True)
+    if not spans:
+        return
+    print("\n--- Timing Summary ---")
+    for entry in spans[:10]:
+        labels = ", ".join(f"{k}={v}" for k, v in entry['labels'].items())
+        label_str = f" ({labels})" if labels else ""
+        print(
+            f"   ⏱️ {entry['name']}{label_str}: {entry['total_seconds']:.2f}s over {entry['count']} call(s)")
+
+
+def reset():
+    """Clears all recorded metrics, e.g. between scheduled runs in one process."""
+    global _run_started_at
+    with _lock:
+        _spans.clear()
+        _counters.clear()
+        _gauges.clear()
+        _run_started_at = datetime.now()
@@ -1,54 +1,573 @@
 import os
 import json
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 
-TRACKER_FILE = "processed_jobs.json"
+from config import (
+    TRACKER_DB_PATH, PROCESSED_JOBS_PATH, VERDICT_TTL_DAYS,
+    SEEN_FILTER_CAPACITY, SEEN_FILTER_ERROR_RATE, LEXICAL_INDEX_TTL_DAYS
+)
+from modules.bloom import BloomFilter
+from modules.url_utils import canonicalize_url, job_id_for_url, CANONICALIZATION_VERSION
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to SQLite's own locking only.
+    fcntl = None
+
 MAX_JOB_AGE_DAYS = 90
+# Keeps SQL statements under SQLite's bound-parameter limit.
+LOOKUP_BATCH_SIZE = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS processed_jobs (
+    canonical_url TEXT PRIMARY KEY,
+    job_id TEXT NOT NULL,
+    url TEXT NOT NULL,
+    title TEXT,
+    company TEXT,
+    site TEXT,
+    location TEXT,
+    added_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_processed_jobs_job_id ON processed_jobs(job_id);
+CREATE INDEX IF NOT EXISTS idx_processed_jobs_added_at ON processed_jobs(added_at);
+CREATE TABLE IF NOT EXISTS job_verdicts (
+    canonical_url TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    reason TEXT,
+    config_hash TEXT NOT NULL,
+    recorded_at REAL NOT NULL,
+    PRIMARY KEY (canonical_url, stage)
+);
+CREATE INDEX IF NOT EXISTS idx_job_verdicts_recorded_at ON job_verdicts(recorded_at);
+CREATE TABLE IF NOT EXISTS ranking_scores (
+    canonical_url TEXT NOT NULL,
+    scores_hash TEXT NOT NULL,
+    score REAL NOT NULL,
+    ranked_job TEXT NOT NULL,
+    recorded_at REAL NOT NULL,
+    PRIMARY KEY (canonical_url, scores_hash)
+);
+CREATE INDEX IF NOT EXISTS idx_ranking_scores_recorded_at ON ranking_scores(recorded_at);
+CREATE TABLE IF NOT EXISTS bloom_filters (
+    name TEXT PRIMARY KEY,
+    capacity INTEGER NOT NULL,
+    error_rate REAL NOT NULL,
+    item_count INTEGER NOT NULL,
+    bits BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS query_stats (
+    query_key TEXT PRIMARY KEY,
+    runs INTEGER NOT NULL,
+    requested REAL NOT NULL,
+    scraped REAL NOT NULL,
+    filtered REAL NOT NULL,
+    ranked REAL NOT NULL,
+    delivered REAL NOT NULL,
+    last_requested INTEGER,
+    last_scraped INTEGER,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS lexical_documents (
+    doc_key TEXT PRIMARY KEY,
+    term_counts TEXT NOT NULL,
+    added_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_lexical_documents_added_at ON lexical_documents(added_at);
+CREATE TABLE IF NOT EXISTS tracker_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+SEEN_FILTER_NAME = 'processed_urls'
+QUERY_YIELD_STAGES = ['requested', 'scraped', 'filtered', 'ranked', 'delivered']
+
+# The database in use; switched with use_database() when serving several candidates.
+_DEFAULT_DB_PATH = TRACKER_DB_PATH
+_connections = {}
+_connection_lock = threading.RLock()
+_seen_filters = {}
+
+
+@contextmanager
+def _file_lock():
+    """Holds an exclusive lock on a sidecar file so concurrent runs serialize their writes."""
+    if fcntl is None:
+        yield
+        return
+    with open(f"{TRACKER_DB_PATH}.lock", 'a') as lock_file:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def use_database(path: str):
+    """Points the tracker functions at another database; earlier connections stay open."""
+    global TRACKER_DB_PATH
+    with _connection_lock:
+        TRACKER_DB_PATH = path
+
+
+@contextmanager
+def _default_database():
+    """Temporarily points the tracker at the default database (for state shared by all candidates)."""
+    global TRACKER_DB_PATH
+    with _connection_lock:
+        previous_path = TRACKER_DB_PATH
+        TRACKER_DB_PATH = _DEFAULT_DB_PATH
+        try:
+            yield
+        finally:
+            TRACKER_DB_PATH = previous_path
+
+
+def get_connection() -> sqlite3.Connection:
+    """Returns the shared tracker connection, creating the schema and migrating on first use."""
+    with _connection_lock:
+        if TRACKER_DB_PATH not in _connections:
+            connection = sqlite3.connect(
+                TRACKER_DB_PATH, timeout=30, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            with _file_lock():
+                connection.executescript(_SCHEMA)
+                connection.commit()
+            _connections[TRACKER_DB_PATH] = connection
+            _upgrade_canonical_urls()
+            # The legacy JSON file belongs to the default tracker only.
+            if TRACKER_DB_PATH == _DEFAULT_DB_PATH:
+                migrate_json_tracker()
+            prune_expired_jobs()
+            prune_expired_verdicts()
+            prune_expired_lexical_documents()
+        return _connections[TRACKER_DB_PATH]
+
+
+@contextmanager
+def transaction():
+    """Runs a write transaction under both the file lock and the connection lock."""
+    connection = get_connection()
+    with _connection_lock, _file_lock():
+        try:
+            yield connection
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+
+
+def checkpoint():
+    """Folds the WAL back into the database files while keeping the connections open."""
+    with _connection_lock:
+        for path, connection in _connections.items():
+            try:
+                connection.execute("PRAGMA wal_checkpoint(PASSIVE)")
+            except sqlite3.Error as e:
+                print(f"⚠️ Could not checkpoint tracker database '{path}': {e}")
+
+
+def close():
+    """Checkpoints the WAL into the main database files and closes every connection."""
+    with _connection_lock:
+        _seen_filters.clear()
+        for path, connection in _connections.items():
+            try:
+                connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            except sqlite3.Error as e:
+                print(f"⚠️ Could not checkpoint tracker database '{path}': {e}")
+            connection.close()
+        _connections.clear()
+
 
-def load_processed_jobs():
-    """Loads job records from the local tracker file, filters out old ones, and returns recent URLs."""
-    if not os.path.exists(TRACKER_FILE):
-        print("Tracker file not found. Starting fresh.")
-        return set(), []
+def get_meta(key: str, default=None):
+    row = get_connection().execute(
+        "SELECT value FROM tracker_meta WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else default
+
+
+def set_meta(key: str, value: str):
+    with transaction() as connection:
+        connection.execute(
+            "INSERT OR REPLACE INTO tracker_meta (key, value) VALUES (?, ?)", (key, value))
+
+
+def _upgrade_canonical_urls():
+    """Recomputes stored canonical URLs when the canonicalization rules change."""
+    if get_meta('canonicalization_version') == str(CANONICALIZATION_VERSION):
+        return
+
+    connection = get_connection()
+    with _connection_lock:
+        rows = connection.execute(
+            "SELECT url, title, company, site, location, added_at FROM processed_jobs").fetchall()
+    with transaction() as connection:
+        connection.execute("DELETE FROM processed_jobs")
+        connection.executemany(
+            """INSERT OR REPLACE INTO processed_jobs
+               (canonical_url, job_id, url, title, company, site, location, added_at)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+            [(canonicalize_url(url), job_id_for_url(url), url, *rest) for url, *rest in rows
+             if canonicalize_url(url)])
+        # Verdicts don't keep the raw URL and are short-lived; let them rebuild.
+        connection.execute("DELETE FROM job_verdicts")
+        connection.execute("DELETE FROM ranking_scores")
+        connection.execute("DELETE FROM bloom_filters")
+        connection.execute(
+            "INSERT OR REPLACE INTO tracker_meta (key, value) VALUES ('canonicalization_version', ?)",
+            (str(CANONICALIZATION_VERSION),))
+    if rows:
+        print(f"🔁 Tracker: Re-keyed {len(rows)} record(s) with canonicalization v{CANONICALIZATION_VERSION}.")
+
+
+def prune_expired_jobs(max_age_days: int = MAX_JOB_AGE_DAYS) -> int:
+    """Deletes records older than the TTL using the added_at index."""
+    cutoff = (datetime.now() - timedelta(days=max_age_days)).timestamp()
+    with transaction() as connection:
+        deleted = connection.execute(
+            "DELETE FROM processed_jobs WHERE added_at < ?", (cutoff,)).rowcount
+        if deleted:
+            # Bloom filters can't forget items; rebuild it from the remaining rows.
+            connection.execute(
+                "DELETE FROM bloom_filters WHERE name = ?", (SEEN_FILTER_NAME,))
+    if deleted:
+        print(f"🧹 Tracker: Pruned {deleted} record(s) older than {max_age_days} days.")
+    return deleted
+
+
+def prune_expired_verdicts(max_age_days: int = VERDICT_TTL_DAYS) -> int:
+    """Deletes rejection verdicts and ranking scores for jobs that have left the scrape window."""
+    cutoff = (datetime.now() - timedelta(days=max_age_days)).timestamp()
+    with transaction() as connection:
+        connection.execute("DELETE FROM ranking_scores WHERE recorded_at < ?", (cutoff,))
+        return connection.execute(
+            "DELETE FROM job_verdicts WHERE recorded_at < ?", (cutoff,)).rowcount
+
+
+def prune_expired_lexical_documents(max_age_days: int = LEXICAL_INDEX_TTL_DAYS) -> int:
+    """Drops indexed job texts older than the TTL, so term statistics follow recent postings."""
+    cutoff = (datetime.now() - timedelta(days=max_age_days)).timestamp()
+    with transaction() as connection:
+        return connection.execute(
+            "DELETE FROM lexical_documents WHERE added_at < ?", (cutoff,)).rowcount
+
+
+def migrate_json_tracker(json_path: str = PROCESSED_JOBS_PATH):
+    """One-time import of the legacy processed_jobs.json file into the database."""
+    if not os.path.exists(json_path) or get_meta('json_migrated_from'):
+        return
 
     try:
-        with open(TRACKER_FILE, 'r', encoding='utf-8') as f:
+        with open(json_path, 'r', encoding='utf-8') as f:
             job_records = json.load(f)
-        
-        if not isinstance(job_records, list):
-            return set(), [] # Handle empty or malformed data
-
-        cutoff_date = datetime.now() - timedelta(days=MAX_JOB_AGE_DAYS)
-        recent_jobs = []
-        for job in job_records:
-            if isinstance(job, dict) and 'added_at' in job:
-                try:
-                    added_date = datetime.fromisoformat(job['added_at'])
-                    if added_date > cutoff_date:
-                        recent_jobs.append(job)
-                except (ValueError, TypeError):
-                    continue # Skip records with bad date formats
-
-        recent_urls = {job['url'] for job in recent_jobs}
-        print(f"Tracker: Loaded {len(job_records)} records, {len(recent_urls)} are recent.")
-        return recent_urls, recent_jobs
-
     except (json.JSONDecodeError, IOError) as e:
-        print(f"❌ Error reading tracker file: {e}. Starting fresh.")
-        return set(), []
-
-def update_processed_jobs(newly_processed_urls, existing_recent_jobs):
-    """Updates the job map and saves it to the local tracker file."""
-    print(f"📚 Saving {len(newly_processed_urls)} newly processed jobs to the tracker file...")
-    
-    processed_jobs_map = {job['url']: job for job in existing_recent_jobs}
-
-    for url in newly_processed_urls:
-        processed_jobs_map[url] = {'url': url, 'added_at': datetime.now().isoformat()}
-    
+        print(f"❌ Error reading legacy tracker file: {e}. Skipping migration.")
+        return
+
+    rows = []
+    for job in job_records if isinstance(job_records, list) else []:
+        if not isinstance(job, dict) or not canonicalize_url(job.get('url')):
+            continue
+        try:
+            added_at = datetime.fromisoformat(job['added_at']).timestamp()
+        except (KeyError, ValueError, TypeError):
+            continue  # Skip records with bad date formats
+        url = job['url']
+        rows.append((canonicalize_url(url), job_id_for_url(url), url, added_at))
+
+    with transaction() as connection:
+        connection.executemany(
+            "INSERT OR IGNORE INTO processed_jobs (canonical_url, job_id, url, added_at) VALUES (?, ?, ?, ?)",
+            rows)
+        connection.execute(
+            "INSERT OR REPLACE INTO tracker_meta (key, value) VALUES ('json_migrated_from', ?)",
+            (json_path,))
+    print(f"📦 Tracker: Migrated {len(rows)} record(s) from '{json_path}' to '{TRACKER_DB_PATH}'.")
+
+
+def count_processed_jobs() -> int:
+    return get_connection().execute("SELECT COUNT(*) FROM processed_jobs").fetchone()[0]
+
+
+def _select_by_canonical_urls(query: str, canonical_urls: list, params: tuple = ()) -> list:
+    """
+    Runs `query` (with an IN ({placeholders}) clause) over batches of canonical URLs;
+    `params` bind any placeholders that come before the IN clause.
+    """
+    connection = get_connection()
+    rows = []
+    for start in range(0, len(canonical_urls), LOOKUP_BATCH_SIZE):
+        batch = canonical_urls[start:start + LOOKUP_BATCH_SIZE]
+        placeholders = ",".join("?" * len(batch))
+        with _connection_lock:
+            rows.extend(connection.execute(
+                query.format(placeholders=placeholders), [*params, *batch]).fetchall())
+    return rows
+
+
+def find_processed_urls(urls) -> set:
+    """Returns the subset of `urls` whose canonical form is already in the tracker."""
+    canonical_to_urls = {}
+    for url in urls:
+        canonical_url = canonicalize_url(url)
+        if canonical_url:
+            canonical_to_urls.setdefault(canonical_url, []).append(url)
+
+    found = set()
+    rows = _select_by_canonical_urls(
+        "SELECT canonical_url FROM processed_jobs WHERE canonical_url IN ({placeholders})",
+        list(canonical_to_urls))
+    for (canonical_url,) in rows:
+        found.update(canonical_to_urls[canonical_url])
+    return found
+
+
+def _save_seen_filter(connection: sqlite3.Connection, seen_filter: BloomFilter):
+    connection.execute(
+        """INSERT OR REPLACE INTO bloom_filters (name, capacity, error_rate, item_count, bits)
+           VALUES (?, ?, ?, ?, ?)""",
+        (SEEN_FILTER_NAME, seen_filter.capacity, seen_filter.error_rate,
+         seen_filter.item_count, bytes(seen_filter.bits)))
+
+
+def get_seen_filter() -> BloomFilter:
+    """
+    Returns the persisted Bloom filter of processed canonical URLs. It is rebuilt
+    from the tracker when missing, saturated or configured with different sizing.
+    """
+    with _connection_lock:
+        if TRACKER_DB_PATH in _seen_filters:
+            return _seen_filters[TRACKER_DB_PATH]
+
+        connection = get_connection()
+        row = connection.execute(
+            "SELECT capacity, error_rate, item_count, bits FROM bloom_filters WHERE name = ?",
+            (SEEN_FILTER_NAME,)).fetchone()
+        if row and row[0] == SEEN_FILTER_CAPACITY and row[1] == SEEN_FILTER_ERROR_RATE:
+            try:
+                seen_filter = BloomFilter(row[0], row[1], bytearray(row[3]), row[2])
+                if not seen_filter.is_saturated:
+                    _seen_filters[TRACKER_DB_PATH] = seen_filter
+                    return seen_filter
+            except ValueError:
+                pass
+
+        seen_filter = BloomFilter(SEEN_FILTER_CAPACITY, SEEN_FILTER_ERROR_RATE)
+        for (canonical_url,) in connection.execute("SELECT canonical_url FROM processed_jobs"):
+            seen_filter.add(canonical_url)
+        with transaction() as write_connection:
+            _save_seen_filter(write_connection, seen_filter)
+        _seen_filters[TRACKER_DB_PATH] = seen_filter
+        return seen_filter
+
+
+def find_seen_urls(urls) -> set:
+    """
+    Returns the subset of `urls` already processed. The Bloom filter answers most
+    lookups in memory; only its positives are confirmed with an indexed query.
+    """
+    seen_filter = get_seen_filter()
+    candidates = []
+    for url in urls:
+        canonical_url = canonicalize_url(url)
+        if canonical_url and canonical_url in seen_filter:
+            candidates.append(url)
+    if not candidates:
+        return set()
+    return find_processed_urls(candidates)
+
+
+def filter_unprocessed_jobs(jobs: list[dict]) -> list[dict]:
+    """
+    Drops jobs that were already processed, using indexed lookups instead of a full
+    load. Jobs without a URL are never tracked, so they are always kept.
+    """
+    processed = find_processed_urls(job.get('job_url') for job in jobs)
+    return [job for job in jobs if not canonicalize_url(job.get('job_url'))
+            or job.get('job_url') not in processed]
+
+
+def record_processed_jobs(jobs: list[dict]):
+    """Appends newly processed jobs to the tracker; jobs without a URL are not tracked."""
+    print(f"📚 Saving {len(jobs)} newly processed jobs to the tracker database...")
+    now = time.time()
+    jobs = [job for job in jobs if canonicalize_url(job.get('job_url'))]
+    rows = [(
+        canonicalize_url(job.get('job_url')),
+        job_id_for_url(job.get('job_url')),
+        str(job.get('job_url')),
+        str(job.get('title', '')),
+        str(job.get('company', '')),
+        str(job.get('site', '')),
+        str(job.get('location', '')),
+        now,
+    ) for job in jobs]
+
+    try:
+        seen_filter = get_seen_filter()
+        with transaction() as connection:
+            connection.executemany(
+                """INSERT OR REPLACE INTO processed_jobs
+                   (canonical_url, job_id, url, title, company, site, location, added_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?)""", rows)
+            for row in rows:
+                seen_filter.add(row[0])
+            _save_seen_filter(connection, seen_filter)
+        print("✅ Local job tracker updated successfully.")
+    except sqlite3.Error as e:
+        print(f"❌ Error writing to tracker database: {e}")
+
+
+def filter_rejected_jobs(jobs: list[dict], stage_hashes: dict) -> list[dict]:
+    """
+    Drops jobs that an earlier run already rejected at some stage, as long as that
+    stage's config hash still matches. A changed threshold or resume changes the
+    hash, which silently invalidates the old verdicts.
+    """
+    canonical_urls = {canonicalize_url(job.get('job_url')) for job in jobs} - {None}
+    rows = _select_by_canonical_urls(
+        "SELECT canonical_url, stage, config_hash FROM job_verdicts WHERE canonical_url IN ({placeholders})",
+        list(canonical_urls))
+
+    rejected = {}
+    for canonical_url, stage, config_hash in rows:
+        if stage_hashes.get(stage) == config_hash:
+            rejected[canonical_url] = stage
+
+    if not rejected:
+        return jobs
+    remaining = [job for job in jobs
+                 if canonicalize_url(job.get('job_url')) not in rejected]
+    by_stage = {}
+    for stage in rejected.values():
+        by_stage[stage] = by_stage.get(stage, 0) + 1
+    summary = ", ".join(f"{stage}: {count}" for stage, count in sorted(by_stage.items()))
+    print(f"⏩ Skipped {len(jobs) - len(remaining)} job(s) rejected in earlier runs ({summary}).")
+    return remaining
+
+
+def record_job_verdicts(rejections: dict, stage_hashes: dict):
+    """Stores (job, reason) rejections per stage together with the stage's config hash."""
+    now = time.time()
+    rows = [
+        (canonicalize_url(job.get('job_url')), stage, reason, stage_hashes[stage], now)
+        for stage, entries in rejections.items() if stage in stage_hashes
+        for job, reason in entries if canonicalize_url(job.get('job_url'))
+    ]
+    if not rows:
+        return
+    try:
+        with transaction() as connection:
+            connection.executemany(
+                """INSERT OR REPLACE INTO job_verdicts
+                   (canonical_url, stage, reason, config_hash, recorded_at)
+                   VALUES (?, ?, ?, ?, ?)""", rows)
+    except sqlite3.Error as e:
+        print(f"⚠️ Could not save job verdicts to the tracker: {e}")
+
+
+def load_ranking_scores(jobs: list[dict], scores_hash: str) -> dict:
+    """Returns {canonical_url: ranked job dict} for the jobs already scored under `scores_hash`."""
+    canonical_urls = list({canonicalize_url(job.get('job_url')) for job in jobs} - {None})
+    rows = _select_by_canonical_urls(
+        "SELECT canonical_url, score, ranked_job FROM ranking_scores "
+        "WHERE scores_hash = ? AND canonical_url IN ({placeholders})", canonical_urls, (scores_hash,))
+    return {canonical_url: {**json.loads(ranked_job), 'score': score}
+            for canonical_url, score, ranked_job in rows}
+
+
+def record_ranking_scores(scored: list, scores_hash: str):
+    """Stores (job, ranked job dict) pairs so later runs only rank jobs they haven't seen."""
+    now = time.time()
+    rows = [(canonicalize_url(job.get('job_url')), scores_hash, ranked_job['score'],
+             json.dumps(ranked_job), now)
+            for job, ranked_job in scored if canonicalize_url(job.get('job_url'))]
+    if not rows:
+        return
+    try:
+        with transaction() as connection:
+            connection.executemany(
+                """INSERT OR REPLACE INTO ranking_scores
+                   (canonical_url, scores_hash, score, ranked_job, recorded_at)
+                   VALUES (?, ?, ?, ?, ?)""", rows)
+    except sqlite3.Error as e:
+        print(f"⚠️ Could not save ranking scores to the tracker: {e}")
+
+
+def get_query_stats() -> dict:
+    """
+    Returns the decayed yield statistics of every scrape query, keyed by query key.
+    They live in the default database because one scrape serves every candidate.
+    """
+    with _default_database():
+        connection = get_connection()
+        rows = connection.execute(
+            f"""SELECT query_key, runs, {', '.join(QUERY_YIELD_STAGES)}, last_requested, last_scraped
+                FROM query_stats""").fetchall()
+    stats = {}
+    for query_key, runs, *values, last_requested, last_scraped in rows:
+        stats[query_key] = dict(zip(QUERY_YIELD_STAGES, values), runs=runs,
+                                last_requested=last_requested, last_scraped=last_scraped)
+    return stats
+
+
+def record_query_yields(run_counts: dict, decay: float):
+    """
+    Folds one run's per-query counts ({query_key: {stage: count}}) into the stored
+    statistics. Older runs are weighted down by `decay`, so the planner follows
+    job boards whose results change over time.
+    """
+    if not run_counts:
+        return
+    try:
+        with _default_database(), transaction() as connection:
+            for query_key, counts in run_counts.items():
+                row = connection.execute(
+                    f"""SELECT runs, {', '.join(QUERY_YIELD_STAGES)}, last_requested, last_scraped
+                        FROM query_stats WHERE query_key = ?""", (query_key,)).fetchone()
+                if row is None:
+                    row = (0, *[0.0] * len(QUERY_YIELD_STAGES), None, None)
+                runs, *previous, last_requested, last_scraped = row
+                # A run resumed from a checkpoint adds later stages without scraping again.
+                scraped_this_run = 'requested' in counts
+                weight = decay if scraped_this_run else 1.0
+                values = [old * weight + counts.get(stage, 0)
+                          for stage, old in zip(QUERY_YIELD_STAGES, previous)]
+                if scraped_this_run:
+                    runs += 1
+                    last_requested, last_scraped = counts['requested'], counts.get('scraped', 0)
+                connection.execute(
+                    f"""INSERT OR REPLACE INTO query_stats
+                        (query_key, runs, {', '.join(QUERY_YIELD_STAGES)}, last_requested, last_scraped, updated_at)
+                        VALUES (?, ?, {', '.join('?' * len(QUERY_YIELD_STAGES))}, ?, ?, ?)""",
+                    (query_key, runs, *values, last_requested, last_scraped, time.time()))
+    except sqlite3.Error as e:
+        print(f"⚠️ Could not save query yield statistics to the tracker: {e}")
+
+
+def load_lexical_documents() -> list:
+    """Returns (doc_key, term counts) for every job text in the lexical index."""
+    with _default_database():
+        rows = get_connection().execute(
+            "SELECT doc_key, term_counts FROM lexical_documents").fetchall()
+    return [(doc_key, json.loads(term_counts)) for doc_key, term_counts in rows]
+
+
+def save_lexical_documents(documents: list):
+    """Persists (doc_key, term counts) pairs newly added to the lexical index."""
+    if not documents:
+        return
+    now = time.time()
     try:
-        with open(TRACKER_FILE, 'w', encoding='utf-8') as f:
-            json.dump(list(processed_jobs_map.values()), f, indent=2)
-        print("✅ Local job tracker file updated successfully.")
-    except IOError as e:
-        print(f"❌ Error writing to tracker file: {e}")
\ No newline at end of file
+        with _default_database(), transaction() as connection:
+            connection.executemany(
+                "INSERT OR IGNORE INTO lexical_documents (doc_key, term_counts, added_at) VALUES (?, ?, ?)",
+                [(doc_key, json.dumps(term_counts), now) for doc_key, term_counts in documents])
+    except sqlite3.Error as e:
+        print(f"⚠️ Could not save the lexical index to the tracker: {e}")
@@ -0,0 +1,103 @@
+import re
+import hashlib
+from typing import Mapping, Optional
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# Bump when canonicalization rules change so stored keys can be recomputed.
+CANONICALIZATION_VERSION = 4
+
+# Stripped on every host: ad-click and newsletter tracking that never identifies a posting.
+TRACKING_PARAMS = {'gclid', 'fbclid', 'msclkid'}
+TRACKING_PARAM_PREFIXES = ('utm_', 'mc_')
+# Generic names like `position` or `source` can be a posting id on an employer's own site,
+# so they are only stripped on the job boards known to use them for tracking.
+SITE_TRACKING_PARAMS = {
+    'linkedin.com': {
+        'trk', 'trkinfo', 'trackingid', 'refid', 'ref', 'referer', 'src', 'position', 'pagenum',
+        'originalsubdomain', 'lipi', 'midtoken', 'midsig', 'eba',
+    },
+    'indeed.com': {
+        'from', 'tk', 'vjs', 'advn', 'adid', 'sid', 'xid', 'searchid', 'src', 'source', 'ref',
+    },
+}
+_HOST_PREFIXES = ('www.', 'm.', 'mobile.')
+_LINKEDIN_JOB_PATH = re.compile(r'^/jobs/view/(?:[^/]*-)?(\d+)$')
+
+
+def _normalize_host(host: str) -> str:
+    host = host.lower().rstrip('.')
+    if host.endswith(':443') or host.endswith(':80'):
+        host = host.rsplit(':', 1)[0]
+    for prefix in _HOST_PREFIXES:
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+            break
+    # LinkedIn serves the same posting from country subdomains (e.g. in.linkedin.com).
+    if host.endswith('.linkedin.com'):
+        host = 'linkedin.com'
+    return host
+
+
+def _site_tracking_params(host: str) -> set:
+    for site, params in SITE_TRACKING_PARAMS.items():
+        if host == site or host.endswith('.' + site):
+            return params
+    return set()
+
+
+def _is_tracking_param(name: str, site_params: set) -> bool:
+    name = name.lower()
+    return name in TRACKING_PARAMS or name in site_params or name.startswith(TRACKING_PARAM_PREFIXES)
+
+
+def canonicalize_url(url) -> Optional[str]:
+    """
+    Normalizes a job URL so the same posting always maps to the same key:
+    lower-cased scheme and host without www/mobile prefixes, no tracking query
+    parameters (generic ones everywhere, board-specific ones on that board) or fragment, sorted remaining parameters and no trailing slash.
+    Returns None for a missing URL, so URL-less jobs never share a key.
+    """
+    # JobSpy frames hold NaN for a missing URL; it is truthy, so check it first.
+    if url is None or (isinstance(url, float) and url != url) or not str(url).strip():
+        return None
+    parts = urlsplit(str(url).strip())
+    host = _normalize_host(parts.netloc)
+    path = re.sub(r'/{2,}', '/', parts.path).rstrip('/') or '/'
+
+    if host == 'linkedin.com':
+        match = _LINKEDIN_JOB_PATH.match(path)
+        if match:
+            path = f"/jobs/view/{match.group(1)}"
+
+    site_params = _site_tracking_params(host)
+    query_params = sorted((name, value) for name, value in parse_qsl(parts.query, keep_blank_values=False)
+                          if not _is_tracking_param(name, site_params))
+    return urlunsplit(('https', host, path, urlencode(query_params), ''))
+
+
+def _field(job: Mapping, name: str) -> str:
+    value = job.get(name)
+    if value is None or (isinstance(value, float) and value != value):
+        return ''
+    return " ".join(str(value).lower().split())
+
+
+def job_key(job: Mapping) -> str:
+    """
+    The key a posting is deduplicated by: its canonical URL, or for URL-less jobs
+    its (site, company, title, location). Only the URL form is stored in the tracker.
+    """
+    canonical_url = canonicalize_url(job.get('job_url'))
+    if canonical_url:
+        return canonical_url
+    return "|".join(_field(job, name) for name in ('site', 'company', 'title', 'location'))
+
+
+def job_id_for_url(url) -> str:
+    """Returns a stable job id derived from the canonical URL."""
+    return hashlib.md5(canonicalize_url(url).encode('utf-8')).hexdigest()[:16]
+
+
+def job_id_for_job(job: Mapping) -> str:
+    """Returns a stable job id derived from the job's key (see `job_key`)."""
+    return hashlib.md5(job_key(job).encode('utf-8')).hexdigest()[:16]
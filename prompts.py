@@ -19,8 +19,18 @@ def get_resume_parsing_prompt(latex_source):
     """
 
 
-def get_ranking_prompt(resume_summary, job_postings_json):
+def get_ranking_prompt(resume_summary, job_postings_json, user_message=USER_MESSAGE,
+                       anchors_json=None, score_every_job=False):
     """Generates a prompt for Gemini to rank jobs."""
+    anchors = f"""
+    **Previously Scored Reference Jobs (JSON format):**
+    {anchors_json}
+    These were scored against the same summary. Score the new postings on the same scale, and do not include the reference jobs in your answer.
+""" if anchors_json else ""
+    task = (f"Deeply analyze the jobs against my summary. Score every posting from 0 to 100 for how well it fits me, "
+            f"and rank all of them, best match first.") if score_every_job else (
+            f"Deeply analyze the jobs against my summary and rank the top {GEMINI_TOP_N} absolute best matches for me. "
+            f"Score each from 0 to 100 for how well it fits me.")
     return f"""
     You are an expert career coach AI. Your task is to analyze my professional summary and a list of pre-filtered job descriptions to find the best-fit roles.
 
@@ -29,10 +39,10 @@ def get_ranking_prompt(resume_summary, job_postings_json):
 
     **Pre-filtered Job Postings (JSON format):**
     {job_postings_json}
-
+{anchors}
     **Your Task:**
-    Deeply analyze the jobs against my summary and rank the top {GEMINI_TOP_N} absolute best matches for me.
-    {USER_MESSAGE}
+    {task}
+    {user_message}
     """
 
 
@@ -57,7 +67,9 @@ def get_resume_content_prompt(latex_source, job_title, job_company, job_descript
         {{
             "summary_bullets": ["..."],
             "keywords": ["..."],
-            "highlight_bullets": ["..."]
+            "highlight_bullets": ["..."],
+            "compact": {{"summary_bullets": ["..."], "keywords": ["..."], "highlight_bullets": ["..."]}},
+            "minimal": {{"summary_bullets": ["..."], "keywords": ["..."], "highlight_bullets": ["..."]}}
         }}
         ```
 
@@ -65,6 +77,7 @@ def get_resume_content_prompt(latex_source, job_title, job_company, job_descript
         - Provide 2 to 3 concise summary bullets in "summary_bullets" emphasising fit for the job.
         - Include 6 to 8 high-impact, comma-free keyword phrases in "keywords". Prefer skills, tools, domains, or certifications mentioned in the job.
         - Provide 3 job-aligned achievement bullets in "highlight_bullets". Each must be <= 140 characters, start with a strong verb, and include measurable impact when possible.
+        - "compact" and "minimal" are shorter rewrites of the same content, used if the full version does not fit on one page. "compact": 2 summary bullets, 6 keywords, 2 to 3 highlight bullets of <= 100 characters. "minimal": 2 summary bullets, 4 to 5 keywords, 2 highlight bullets of <= 80 characters. Keep the strongest points; do not introduce new ones.
         - Use plain text only. Do NOT return LaTeX syntax, markdown, or additional commentary.
         - Do not invent experience I do not have. Prioritize items supported by the base resume or clearly implied by the description.
         - Ensure all strings are unique, single-line, and free of surrounding quotes beyond JSON requirements.